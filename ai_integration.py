@@ -3,6 +3,35 @@ import json
 import re
 from PIL import Image
 
+# Fields per batched prompt; keeps each response well inside the output token limit.
+BATCH_SIZE = 20
+
+# Amounts and intervals come from the local water balance; the model only writes the advice text.
+IRRIGATION_BATCH_EXAMPLE = {
+    "id": 0,
+    "best_time": "Early morning (5 AM - 8 AM)",
+    "method_feedback": "Drip irrigation is highly recommended for this crop to ensure water efficiency.",
+    "optimization_tips": "Use mulch to reduce soil moisture evaporation. Check soil moisture before watering."
+}
+# Doses come from the local rule tables; the model only writes the guidance text.
+FERTILIZER_BATCH_EXAMPLE = {
+    "id": 0,
+    "application_timing": "Apply as a basal dose during sowing.",
+    "application_method": "Mix with the top 5-10 cm of soil before planting.",
+    "organic_alternatives": "Well-decomposed farmyard manure (FYM) at 10 tons/acre."
+}
+
+
+def _valid_irrigation(answer):
+    return all(isinstance(answer.get(k), str) and answer[k].strip()
+               for k in ('best_time', 'method_feedback', 'optimization_tips'))
+
+
+def _valid_fertilizer(answer):
+    return all(isinstance(answer.get(k), str) and answer[k].strip()
+               for k in ('application_timing', 'application_method', 'organic_alternatives'))
+
+
 class KisanMitraAI:
     def __init__(self, api_key):
         """Initializes the AI system with the provided API key."""
@@ -31,6 +60,55 @@ class KisanMitraAI:
             print(f"❌ An unexpected error occurred during AI call: {e}")
             raise
 
+    def _get_batch_response(self, role, task, items, example, validate, generation_config, retries=1):
+        """
+        Asks about many items in as few prompts as possible. Items are packed
+        BATCH_SIZE at a time with an "id" each and the model answers with a
+        JSON array that is matched back by id. Answers that are missing or fail
+        `validate` are asked again, alone with the other failures, up to
+        `retries` times. Returns a list aligned with `items`, None where no
+        valid answer came back.
+        """
+        results = [None] * len(items)
+        pending = list(range(len(items)))
+        for _ in range(retries + 1):
+            failed = []
+            for start in range(0, len(pending), BATCH_SIZE):
+                chunk = pending[start:start + BATCH_SIZE]
+                prompt = f"""
+        As {role}, {task} for each of the {len(chunk)} fields below.
+        Your response MUST be a valid JSON array without any markdown formatting, with exactly one object per field.
+        Each object must carry the field's "id" and follow this exact JSON format:
+        {json.dumps(example)}
+
+        Fields:
+        {json.dumps([dict(items[i], id=i) for i in chunk], separators=(',', ':'))}
+        """
+                try:
+                    response = self._get_ai_response(prompt, generation_config)
+                except ValueError:
+                    response = []
+                if isinstance(response, dict):
+                    response = next((v for v in response.values() if isinstance(v, list)), [])
+                answers = {}
+                for answer in response if isinstance(response, list) else []:
+                    try:
+                        answers[int(answer.pop('id'))] = answer
+                    except (AttributeError, KeyError, TypeError, ValueError):
+                        continue
+                for i in chunk:
+                    answer = answers.get(i)
+                    if answer is not None and validate(answer):
+                        results[i] = dict(answer, ai_used=True)
+                    else:
+                        failed.append(i)
+            pending = failed
+            if not pending:
+                break
+        if pending:
+            print(f"⚠️ AI gave no valid answer for {len(pending)} of {len(items)} fields.")
+        return results
+
     def get_crop_recommendation(self, location, soil_type, irrigation, land_area, season, budget, generation_config):
         """Generates a detailed crop recommendation using the Gemini API."""
         prompt = f"""
@@ -109,6 +187,19 @@ class KisanMitraAI:
         """
         return self._get_ai_response(prompt, generation_config)
 
+    def get_irrigation_advice_batch(self, fields, generation_config):
+        """
+        Irrigation advice text for many fields in one prompt per BATCH_SIZE
+        fields. `fields` are dicts with crop, soil_type, land_area, weather and
+        growth_stage; returns one dict of best_time, method_feedback and
+        optimization_tips (or None) per field, in order.
+        """
+        keys = ('crop', 'soil_type', 'land_area', 'weather', 'growth_stage')
+        return self._get_batch_response(
+            "an agricultural irrigation expert for Maharashtra, India", "provide a detailed irrigation plan",
+            [{k: f.get(k) for k in keys} for f in fields], IRRIGATION_BATCH_EXAMPLE, _valid_irrigation, generation_config
+        )
+
     def get_fertilizer_advice(self, crop, soil_type, growth_stage, generation_config):
         """Generates fertilizer recommendations using the Gemini API."""
         prompt = f"""
@@ -135,6 +226,19 @@ class KisanMitraAI:
         """
         return self._get_ai_response(prompt, generation_config)
 
+    def get_fertilizer_advice_batch(self, fields, generation_config):
+        """
+        Fertilizer guidance text for many fields in one prompt per BATCH_SIZE
+        fields. `fields` are dicts with crop, soil_type and growth_stage;
+        returns one dict of application_timing, application_method and
+        organic_alternatives (or None) per field, in order.
+        """
+        keys = ('crop', 'soil_type', 'growth_stage')
+        return self._get_batch_response(
+            "an agronomist specializing in Indian agriculture", "provide fertilizer application guidance",
+            [{k: f.get(k) for k in keys} for f in fields], FERTILIZER_BATCH_EXAMPLE, _valid_fertilizer, generation_config
+        )
+
     def get_soil_health_analysis(self, soil_type, ph, organic_matter, nitrogen, phosphorus, potassium, generation_config):
         """Generates a soil health analysis using the Gemini API."""
         prompt = f"""
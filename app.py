@@ -1,54 +1,150 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Blueprint, flash
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Blueprint, flash, Response, stream_with_context, make_response, send_file, g, abort, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, literal, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import with_loader_criteria
 from sqlalchemy.sql import func
+import contextlib
+import contextvars
+import functools
+import hashlib
+import hmac
 import json
+import math
+import random
 import os
-from datetime import datetime, date
+import secrets
+import threading
+import time
+import numpy as np
+from datetime import datetime, date, timedelta
 import requests
 from werkzeug.utils import secure_filename
 
 # Use your config.py and ai_integration.py
 from ai_integration import KisanMitraAI
-from config import get_api_key
+from config import (get_api_key, DATABASE_URL, DEFAULT_FARM_ID, PRICE_REFRESH_SECONDS, SENSOR_RAW_RETENTION_DAYS,
+                    SENSOR_MINUTE_RETENTION_DAYS, SENSOR_TZ_OFFSET_SECONDS, STATIC_ASSETS, STATIC_MAX_AGE_SECONDS,
+                    SHARED_CACHE_PATH, MEMORY_CACHE_ENTRIES, AI_CACHE_SECONDS, MULTIPROCESS,
+                    FEED_RELAY_SECONDS, METRICS_PUBLISH_SECONDS, PROFILE_TOKEN, PROFILE_SAMPLE_RATE,
+                    PROFILE_INTERVAL_SECONDS, PROFILE_KEEP, SEARCH_MAX_RESULTS, NEARBY_MAX_RADIUS_KM,
+                    SYNC_BATCH_SIZE, SYNC_MAX_BATCH, DEBUG, HOST, PORT)
+from task_optimizer import optimize_assignments, MAX_TASKS_PER_WORKER
+import mandi_search
+from price_service import MarketPriceService
+import gazetteer
+from listing_feed import ListingFeed
+from order_book import MatchingEngine, BUY, SELL, QUANTITY_EPSILON
+from price_history import PriceHistoryStore
+from price_forecast import PriceForecaster
+from yield_model import YieldModel, season_for
+import scenario_sweep
+import irrigation_engine
+import soil_engine
+from sensor_store import SensorStore, BUCKETS
+import rotation_planner
+import seed_data
+import http_cache
+import asset_pipeline
+import cache_store
+from fragment_cache import FragmentCacheExtension
+from process_lock import ProcessLock
+import metrics
+import profiler
+import delta_sync
+import click
 
 app = Flask(__name__)
 app.secret_key = 'kisan_mitra_secret_key_2025'
 
 # --- 1. DATABASE SETUP ---
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///farm_management.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
 
 # --- 2. DATABASE MODELS ---
+def _current_farm_id():
+    """
+    Farm the current request works on; new farm-management rows default to it.
+    An X-Farm-Id header must come with the farm's X-Farm-Key unless the farm
+    has no key; a browser's selected farm was checked when it was selected.
+    """
+    if not has_request_context():
+        return DEFAULT_FARM_ID
+    if 'farm_id' not in g:
+        header_farm = request.headers.get('X-Farm-Id', type=int)
+        # Set before the lookup below, whose own query is scoped to this farm.
+        farm_id = g.farm_id = header_farm or session.get('farm_id') or DEFAULT_FARM_ID
+        if farm_id not in _known_farms:
+            farm = db.session.get(Farm, farm_id)
+            if farm is not None:
+                _known_farms[farm_id] = farm.access_key_hash
+        if farm_id not in _known_farms:
+            g.farm_error = (404, f"Unknown farm {farm_id}")
+        elif header_farm and not _farm_key_matches(_known_farms[farm_id], request.headers.get('X-Farm-Key')):
+            g.farm_error = (403, f"X-Farm-Key does not open farm {farm_id}")
+    # Raised again on every call, so a view that catches the first one still cannot read the farm's rows.
+    if g.get('farm_error'):
+        abort(*g.farm_error)
+    return g.farm_id
+
+_known_farms = {}  # farm id -> access key hash, None for a farm without a key
+
+def _hash_farm_key(key):
+    # Keys are long random tokens, so a plain digest is enough and keeps the per-request check cheap.
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def _farm_key_matches(key_hash, key):
+    return key_hash is None or (bool(key) and hmac.compare_digest(key_hash, _hash_farm_key(key)))
+
+class Farm(db.Model):
+    """A member farm; land, workers, tasks, inventory and transactions each belong to one."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(150), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    access_key_hash = db.Column(db.String(64)) # sha256 of the key that opens the farm; NULL leaves it open
+
 class Land(db.Model):
+    __table_args__ = (db.Index('ix_land_farm_name', 'farm_id', 'name'),)
     id = db.Column(db.Integer, primary_key=True)
+    farm_id = db.Column(db.Integer, db.ForeignKey('farm.id'), nullable=False, default=_current_farm_id)
     name = db.Column(db.String(100), nullable=False)
     area = db.Column(db.Float, nullable=False)
     soil_type = db.Column(db.String(100))
     irrigation_type = db.Column(db.String(100))
+    crop = db.Column(db.String(100))
     status = db.Column(db.String(50), default='Fallow')
 
 class Worker(db.Model):
+    __table_args__ = (db.UniqueConstraint('farm_id', 'phone'), db.Index('ix_worker_farm_name', 'farm_id', 'full_name'))
     id = db.Column(db.Integer, primary_key=True)
+    farm_id = db.Column(db.Integer, db.ForeignKey('farm.id'), nullable=False, default=_current_farm_id)
     full_name = db.Column(db.String(150), nullable=False)
-    phone = db.Column(db.String(15), unique=True)
+    phone = db.Column(db.String(15))
     daily_wage = db.Column(db.Integer, nullable=False)
     skills = db.Column(db.Text)
 
 class Task(db.Model):
+    __table_args__ = (db.Index('ix_task_farm_id', 'farm_id', 'id'),
+                      db.Index('ix_task_farm_completed', 'farm_id', 'status', 'completed_date'))
     id = db.Column(db.Integer, primary_key=True)
+    farm_id = db.Column(db.Integer, db.ForeignKey('farm.id'), nullable=False, default=_current_farm_id)
     name = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text)
     priority = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), default='Pending')
     field_id = db.Column(db.Integer, db.ForeignKey('land.id'), nullable=False)
     worker_id = db.Column(db.Integer, db.ForeignKey('worker.id'), nullable=True)
+    completed_date = db.Column(db.Date, index=True)
     field = db.relationship('Land', backref=db.backref('tasks', lazy=True))
     worker = db.relationship('Worker', backref=db.backref('tasks', lazy=True))
 
 class InventoryItem(db.Model):
+    __table_args__ = (db.Index('ix_inventory_item_farm_name', 'farm_id', 'name'),)
     id = db.Column(db.Integer, primary_key=True)
+    farm_id = db.Column(db.Integer, db.ForeignKey('farm.id'), nullable=False, default=_current_farm_id)
     name = db.Column(db.String(100), nullable=False)
     category = db.Column(db.String(100))
     stock = db.Column(db.Float, nullable=False, default=0)
@@ -56,13 +152,29 @@ class InventoryItem(db.Model):
     alert_threshold = db.Column(db.Float)
 
 class Transaction(db.Model):
+    __table_args__ = (db.Index('ix_transaction_farm_date', 'farm_id', 'date'),
+                      db.Index('ix_transaction_farm_type', 'farm_id', 'type', 'amount'))
     id = db.Column(db.Integer, primary_key=True)
+    farm_id = db.Column(db.Integer, db.ForeignKey('farm.id'), nullable=False, default=_current_farm_id)
     description = db.Column(db.String(200), nullable=False)
     category = db.Column(db.String(100))
     amount = db.Column(db.Float, nullable=False)
     type = db.Column(db.String(10), nullable=False) # 'Income' or 'Expense'
     date = db.Column(db.Date, nullable=False, default=date.today)
 
+class PayrollPosting(db.Model):
+    """A worker's wages for one pay period, posted as a Labor expense; overlapping periods are refused."""
+    __table_args__ = (db.Index('ix_payroll_posting_farm_worker', 'farm_id', 'worker_id', 'start_date'),)
+    id = db.Column(db.Integer, primary_key=True)
+    farm_id = db.Column(db.Integer, db.ForeignKey('farm.id'), nullable=False, default=_current_farm_id)
+    worker_id = db.Column(db.Integer, db.ForeignKey('worker.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    transaction_id = db.Column(db.Integer, db.ForeignKey('transaction.id'), nullable=False)
+    # Deleting the expense frees its period to be posted again.
+    transaction = db.relationship('Transaction', backref=db.backref('payroll_posting', uselist=False,
+                                                                    cascade='all, delete-orphan'))
+
 class Produce(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     farmer_name = db.Column(db.String(150))
@@ -72,7 +184,434 @@ class Produce(db.Model):
     expected_price = db.Column(db.Integer, nullable=False) # Price per quintal
     harvest_date = db.Column(db.Date, nullable=False)
     description = db.Column(db.Text)
-    date_listed = db.Column(db.DateTime, default=datetime.utcnow)
+    date_listed = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geo_cell = db.Column(db.Integer, index=True) # gazetteer grid cell, see gazetteer.cell_for
+    quantity_filled = db.Column(db.Float, nullable=False, default=0) # Quintals sold through the order book
+
+class Bid(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    buyer_name = db.Column(db.String(150))
+    location = db.Column(db.String(100), nullable=False)
+    crop_type = db.Column(db.String(100), nullable=False)
+    quantity = db.Column(db.Float, nullable=False)
+    quantity_filled = db.Column(db.Float, nullable=False, default=0)
+    max_price = db.Column(db.Integer, nullable=False) # Price per quintal
+    status = db.Column(db.String(20), nullable=False, default='Open') # 'Open', 'Filled' or 'Cancelled'
+    date_placed = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Trade(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    produce_id = db.Column(db.Integer, db.ForeignKey('produce.id'), index=True)
+    bid_id = db.Column(db.Integer, db.ForeignKey('bid.id'), index=True)
+    crop_type = db.Column(db.String(100), nullable=False)
+    location = db.Column(db.String(100), nullable=False)
+    quantity = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Integer, nullable=False) # Price per quintal
+    executed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CropHistory(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    field_id = db.Column(db.Integer, db.ForeignKey('land.id'), nullable=False, index=True)
+    crop = db.Column(db.String(100), nullable=False)
+    season = db.Column(db.String(20))
+    year = db.Column(db.Integer)
+    field = db.relationship('Land', backref=db.backref('crop_history', lazy=True, cascade='all, delete-orphan'))
+
+class ListingEvent(db.Model):
+    """Listing feed events, relayed between worker processes when serving multi-process."""
+    id = db.Column(db.Integer, primary_key=True)
+    event = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    origin_pid = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class DataVersion(db.Model):
+    """Change counter per table, bumped in the same transaction as every write; feeds HTTP validators."""
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeLog(db.Model):
+    """
+    One row per insert, update or delete of a synced row, written in the same
+    transaction; `version` orders every change and is what sync clients track.
+    """
+    __table_args__ = (db.Index('ix_change_log_farm_version', 'farm_id', 'version'),
+                      db.Index('ix_change_log_row', 'table_name', 'row_id', 'version'),
+                      db.Index('ix_change_log_client', 'farm_id', 'client_id'),
+                      {'sqlite_autoincrement': True})  # versions are never reused, even after compaction
+    version = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(64), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    farm_id = db.Column(db.Integer, nullable=False) # 0 for rows every farm sees (produce)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    client_id = db.Column(db.String(64)) # Offline client's id for a row it created, so a retried push is not applied twice
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# --- 2b. DATA VERSIONS AND CONDITIONAL GET ---
+_BUMP_VERSION = text(
+    "INSERT INTO data_version (table_name, version) VALUES (:name, 1) "
+    "ON CONFLICT (table_name) DO UPDATE SET version = version + 1"
+)
+
+def _bump_versions(connection, tables):
+    for name in sorted(tables):
+        connection.execute(_BUMP_VERSION, {'name': name})
+
+TENANT_MODELS = (Land, Worker, Task, InventoryItem, Transaction)
+TENANT_TABLES = {model.__tablename__ for model in TENANT_MODELS}
+
+def _version_name(obj):
+    # A write to one farm's rows only moves that farm's version, so other farms keep their cached pages.
+    table = obj.__table__.name
+    return f"{table}@{obj.farm_id}" if table in TENANT_TABLES and obj.farm_id is not None else table
+
+@event.listens_for(db.session, 'after_flush')
+def _track_flushed_tables(session, flush_context):
+    tables = {_version_name(obj) for obj in (*session.new, *session.dirty, *session.deleted)}
+    tables.discard(DataVersion.__tablename__)
+    if tables:
+        _bump_versions(session.connection(), tables)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _track_bulk_writes(state):
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None:
+        _bump_versions(state.session.connection(), {state.bind_mapper.local_table.name})
+
+# Tables whose changes mobile clients sync; farm-management rows belong to a farm, listings to everyone.
+SYNC_MODELS = {model.__tablename__: model for model in (*TENANT_MODELS, Produce)}
+
+def _log_entry(table, row_id, farm_id, deleted=False, client_id=None):
+    return {'table_name': table, 'row_id': row_id, 'farm_id': farm_id or 0, 'deleted': deleted, 'client_id': client_id}
+
+@event.listens_for(db.session, 'after_flush')
+def _log_synced_changes(session, flush_context):
+    entries = [
+        _log_entry(obj.__table__.name, obj.id, getattr(obj, 'farm_id', None), obj in session.deleted,
+                   getattr(obj, 'sync_client_id', None))
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if obj.__table__.name in SYNC_MODELS and (obj not in session.dirty or session.is_modified(obj))
+    ]
+    if entries:
+        session.connection().execute(ChangeLog.__table__.insert(), entries)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _log_bulk_changes(state):
+    """Bulk UPDATE/DELETE skip the flush, so the rows they will touch are looked up and logged first."""
+    if not (state.is_update or state.is_delete) or state.bind_mapper is None:
+        return
+    model = SYNC_MODELS.get(state.bind_mapper.local_table.name)
+    if model is None:
+        return
+    farm = model.farm_id if model in TENANT_MODELS else literal(0)
+    touched = select(model.id, farm)
+    if isinstance(state.parameters, list):  # bulk UPDATE by primary key: one parameter set per row
+        touched = touched.where(model.id.in_([params['id'] for params in state.parameters]))
+    elif state.statement.whereclause is not None:
+        touched = touched.where(state.statement.whereclause)
+    entries = [_log_entry(model.__tablename__, row_id, farm_id, state.is_delete)
+               for row_id, farm_id in state.session.execute(touched)]
+    if entries:
+        state.session.connection().execute(ChangeLog.__table__.insert(), entries)
+
+def _log_existing_rows(connection, after):
+    """Logs rows written around the ORM (seeding, data from before sync) as inserts; `after` is {table: last id already logged}."""
+    log = ChangeLog.__table__
+    for name, floor in after.items():
+        table = SYNC_MODELS[name].__table__
+        farm = table.c.farm_id if name in TENANT_TABLES else literal(0)
+        connection.execute(log.insert().from_select(
+            ['table_name', 'row_id', 'farm_id', 'deleted', 'changed_at'],
+            select(literal(name), table.c.id, farm, literal(False), literal(datetime.utcnow()))
+            .where(table.c.id > floor).order_by(table.c.id)
+        ))
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _scope_to_farm(state):
+    """Limits every ORM query and bulk write on farm-management models to the request's farm."""
+    if not has_request_context() or state.is_column_load or state.is_relationship_load:
+        return
+    farm_id = _current_farm_id()
+    state.statement = state.statement.options(*(
+        with_loader_criteria(model, lambda cls: cls.farm_id == farm_id, include_aliases=True)
+        for model in TENANT_MODELS
+    ))
+
+def _data_versions(tables):
+    """
+    Version per table. In a request, farm-management tables report both the
+    table-wide version (bulk writes, imports) and the current farm's own.
+    """
+    if not tables:
+        return []
+    farm_id = _current_farm_id() if has_request_context() and TENANT_TABLES.intersection(tables) else None
+    names = list(tables) + [f"{t}@{farm_id}" for t in tables if farm_id and t in TENANT_TABLES]
+    found = dict(db.session.query(DataVersion.table_name, DataVersion.version)
+                 .filter(DataVersion.table_name.in_(names)).all())
+    return [f"{found.get(t, 0)}.{farm_id}.{found.get(f'{t}@{farm_id}', 0)}" if farm_id and t in TENANT_TABLES
+            else found.get(t, 0) for t in tables]
+
+def _release_stamp():
+    """Changes whenever the code, templates or assets are redeployed, so cached pages never outlive them."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(root, 'app.py')] + [os.path.join(root, 'static', name) for name in STATIC_ASSETS] + [
+        os.path.join(folder, name) for folder, _, names in os.walk(os.path.join(root, 'templates')) for name in names
+    ]
+    return http_cache.data_etag(*sorted((p, os.path.getmtime(p)) for p in paths))
+
+_RELEASE = _release_stamp()
+
+# Rendered fragments, AI responses and price forecasts; shared by all worker processes when configured.
+shared_cache = cache_store.open_cache(SHARED_CACHE_PATH, MEMORY_CACHE_ENTRIES)
+
+app.jinja_env.add_extension(FragmentCacheExtension)
+app.jinja_env.fragment_cache = shared_cache
+app.jinja_env.fragment_cache_prefix = _RELEASE
+
+class _Lazy(dict):
+    """Template data computed on first use, so a fragment served from cache never runs its queries."""
+    def __init__(self, **loaders):
+        super().__init__()
+        self._loaders = loaders
+
+    def __missing__(self, key):
+        if key not in self._loaders:
+            raise KeyError(key)
+        value = self[key] = self._loaders[key]()
+        return value
+
+def _view_versions(*tables):
+    """{table: data version} for fragment cache keys; reuses what cached_view already read."""
+    known = g.get('data_versions', {})
+    missing = [t for t in tables if t not in known]
+    return dict(known, **dict(zip(missing, _data_versions(missing))))
+
+def cached_view(*tables, max_age=0, public=False, extra=None):
+    """
+    Conditional GET for a read-only view. The weak ETag comes from the data
+    versions of `tables` (plus `extra()` for data held in memory), so an
+    unchanged resource is answered 304 before any query or template runs.
+    Private pages revalidate every time; public JSON may be reused for `max_age`.
+    """
+    cache_control = ('public' if public else 'private') + (f", max-age={max_age}" if max_age else ", no-cache")
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = _data_versions(tables)
+            g.data_versions = dict(zip(tables, versions))
+            # A pending flash message belongs in the next render, not in a cached copy.
+            if not public and '_flashes' in session:
+                return view(*args, **kwargs)
+            etag = http_cache.data_etag(_RELEASE, request.full_path, *versions, *(extra() if extra else ()))
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+@app.after_request
+def _compress(response):
+    return http_cache.compress_response(response, request.accept_encodings)
+
+def _build_assets():
+    """Minified, fingerprinted copies of the site's CSS/JS; the source files are served if the build fails."""
+    try:
+        return asset_pipeline.build(app.static_folder, STATIC_ASSETS)
+    except OSError as e:
+        print(f"⚠️ Static asset build failed, serving source files: {e}")
+        return {}
+
+_asset_manifest = _build_assets()
+
+@app.url_defaults
+def _fingerprint_static(endpoint, values):
+    if endpoint == 'static' and values.get('filename') in _asset_manifest:
+        values['filename'] = _asset_manifest[values['filename']]
+
+@app.after_request
+def _cache_static(response):
+    """Fingerprinted assets never change under their name: cache them for a year, gzipped when accepted."""
+    filename = (request.view_args or {}).get('filename', '') if request.endpoint == 'static' else ''
+    if not filename.startswith(asset_pipeline.OUTPUT_DIR + '/') or response.status_code != 200:
+        return response
+    compressed = os.path.join(app.static_folder, filename + '.gz')
+    if request.accept_encodings['gzip'] and os.path.exists(compressed):
+        mimetype = response.mimetype
+        response.close()
+        response = send_file(compressed, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = f"public, max-age={STATIC_MAX_AGE_SECONDS}, immutable"
+    return response
+
+
+# --- 2c. REQUEST METRICS ---
+metrics_registry = metrics.Registry()
+metrics_registry.counter('kisan_http_requests_total', "Requests served, by route, method and status.")
+metrics_registry.histogram('kisan_http_request_duration_seconds', "Time to serve a request, by route.")
+metrics_registry.gauge('kisan_http_requests_in_flight', "Requests being served right now.")
+metrics_registry.histogram('kisan_sql_queries_per_request', "SQL statements run per request, by route.",
+                           metrics.QUERY_COUNT_BUCKETS)
+metrics_registry.histogram('kisan_sql_duration_seconds', "Time spent in SQL per request, by route.")
+metrics_registry.histogram('kisan_upload_bytes', "Size of multipart upload bodies, by route.", metrics.SIZE_BUCKETS)
+metrics_registry.counter('kisan_cache_hits_total', "Shared cache lookups that found an entry.")
+metrics_registry.counter('kisan_cache_misses_total', "Shared cache lookups that found nothing.")
+metrics_registry.gauge('kisan_cache_hit_ratio', "Share of shared cache lookups that hit, across workers.")
+_metrics_published_at = 0.0
+# [started, status, sql queries, sql seconds] for the request being served. A context
+# variable rather than flask.g, because the SQL hooks run on every statement.
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats[2] += 1
+        stats[3] += time.perf_counter() - conn.info.pop('query_started')
+
+@app.before_request
+def _start_request_metrics():
+    _request_stats.set([time.perf_counter(), 500, 0, 0.0])
+    metrics_registry.inc('kisan_http_requests_in_flight')
+
+@app.after_request
+def _note_status(response):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats[1] = response.status_code
+    return response
+
+@app.teardown_request
+def _record_request_metrics(exc):
+    stats = _request_stats.get()
+    if stats is None:
+        return
+    _request_stats.set(None)
+    started, status, queries, sql_seconds = stats
+    req = request._get_current_object()
+    # Label by route pattern rather than path, so ids and 404 probes don't multiply series.
+    route = (('route', req.url_rule.rule if req.url_rule else 'unmatched'),)
+    observations = [('kisan_http_request_duration_seconds', time.perf_counter() - started, route),
+                    ('kisan_sql_queries_per_request', queries, route),
+                    ('kisan_sql_duration_seconds', sql_seconds, route)]
+    if req.content_length and req.mimetype == 'multipart/form-data':
+        observations.append(('kisan_upload_bytes', req.content_length, route))
+    metrics_registry.record(
+        [('kisan_http_requests_in_flight', -1, ()),
+         ('kisan_http_requests_total', 1, route + (('method', req.method), ('status', str(status))))],
+        observations
+    )
+    if MULTIPROCESS and started - _metrics_published_at > METRICS_PUBLISH_SECONDS:
+        _publish_metrics()
+
+def _metrics_snapshot():
+    metrics_registry.set('kisan_cache_hits_total', shared_cache.hits)
+    metrics_registry.set('kisan_cache_misses_total', shared_cache.misses)
+    return metrics_registry.snapshot()
+
+def _publish_metrics():
+    """Shares this worker's metrics through the shared cache, where /metrics on any worker can sum them."""
+    global _metrics_published_at
+    _metrics_published_at = time.perf_counter()
+    try:
+        shared_cache.set(f"metrics:{os.getpid()}", _metrics_snapshot(), 86400)
+    except Exception as e:
+        print(f"⚠️ Could not publish worker metrics: {e}")
+
+def retire_worker_metrics():
+    """Drops an exiting worker's published metrics (gunicorn worker_exit hook)."""
+    shared_cache.delete(f"metrics:{os.getpid()}")
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape target; with several workers, the sum of every worker's last published metrics."""
+    snapshots = {os.getpid(): _metrics_snapshot()}
+    if MULTIPROCESS:
+        for key, snapshot in shared_cache.items('metrics:').items():
+            snapshots.setdefault(int(key.split(':', 1)[1]), snapshot)
+    merged = metrics.merge(snapshots.values())
+    hits, misses = merged['values'].get(('kisan_cache_hits_total', ()), 0), merged['values'].get(('kisan_cache_misses_total', ()), 0)
+    if hits + misses:
+        merged['values'][('kisan_cache_hit_ratio', ())] = hits / (hits + misses)
+    return Response(metrics.render(merged), content_type=metrics.CONTENT_TYPE, headers={'Cache-Control': 'no-store'})
+
+
+# --- 2d. ON-DEMAND PROFILING ---
+def _holds_profile_token(supplied):
+    return bool(PROFILE_TOKEN and supplied) and hmac.compare_digest(supplied, PROFILE_TOKEN)
+
+def _start_profile():
+    """Samples this request's stack when it carries the profile token (header or ?profile=) or is drawn by the sample rate."""
+    if request.endpoint in ('profiles', 'profile_stacks'):
+        return
+    supplied = request.headers.get('X-Profile-Token') or request.args.get('profile')
+    if _holds_profile_token(supplied) or random.random() < PROFILE_SAMPLE_RATE:
+        g.profile = profiler.StackSampler(threading.get_ident(), PROFILE_INTERVAL_SECONDS).start()
+
+def _store_profile(exc):
+    sampler = g.pop('profile', None)
+    if sampler is None:
+        return
+    stacks = sampler.stop()
+    stats = _request_stats.get() or [0, 500, 0, 0.0]
+    key = f"profile:{time.time_ns():020d}-{os.getpid()}"
+    shared_cache.set(key, {
+        'id': key.split(':', 1)[1], 'route': request.url_rule.rule if request.url_rule else None,
+        'method': request.method, 'path': request.path, 'status': stats[1],
+        'args': {k: v for k, v in request.args.items() if k != 'profile'},
+        'recorded_at': datetime.utcnow().isoformat(timespec='seconds'), 'duration_ms': round(sampler.duration * 1000, 1),
+        'samples': sampler.samples, 'sql_queries': stats[2], 'sql_ms': round(stats[3] * 1000, 1), 'stacks': dict(stacks)
+    })
+    for old in sorted(shared_cache.items('profile:'))[:-PROFILE_KEEP]:
+        shared_cache.delete(old)
+
+# Hooks are only installed when profiling is configured, so an unprofiled deployment pays nothing.
+if PROFILE_TOKEN or PROFILE_SAMPLE_RATE:
+    app.before_request(_start_profile)
+    app.teardown_request(_store_profile)
+
+def _profile_admin_denied():
+    if not PROFILE_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    supplied = request.headers.get('X-Profile-Token') or request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not _holds_profile_token(supplied):
+        return jsonify({"error": "A valid profile token is required."}), 403
+    return None
+
+@app.route('/admin/profiles')
+def profiles():
+    """The most recent request profiles, newest first, with their hottest frames."""
+    denied = _profile_admin_denied()
+    if denied:
+        return denied
+    found = [p for _, p in sorted(shared_cache.items('profile:').items(), reverse=True)]
+    return jsonify(profiles=[
+        {**{k: v for k, v in p.items() if k != 'stacks'}, 'hottest': profiler.hottest(p['stacks'])} for p in found
+    ])
+
+@app.route('/admin/profiles/<profile_id>')
+def profile_stacks(profile_id):
+    """One profile as folded stacks, ready for flamegraph.pl or speedscope."""
+    denied = _profile_admin_denied()
+    if denied:
+        return denied
+    found = shared_cache.get(f"profile:{profile_id}")
+    if found is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return Response(profiler.folded(found['stacks']), mimetype='text/plain',
+                    headers={'Content-Disposition': f'inline; filename="{profile_id}.folded"'})
 
 
 # --- 3. BLUEPRINT DEFINITIONS ---
@@ -86,6 +625,7 @@ mandi_bp = Blueprint('mandi', __name__, url_prefix='/mandi')
 
 # --- Farm Management Routes (FULLY IMPLEMENTED) ---
 @land_bp.route('/land')
+@cached_view('land')
 def list_fields():
     all_lands = Land.query.order_by(Land.name).all()
     return render_template('land/index.html', lands=all_lands)
@@ -97,7 +637,7 @@ def add_field():
             new_field = Land(
                 name=request.form.get('name'), area=float(request.form.get('area')),
                 soil_type=request.form.get('soil_type'), irrigation_type=request.form.get('irrigation_type'),
-                status=request.form.get('status')
+                crop=request.form.get('crop'), status=request.form.get('status')
             )
             db.session.add(new_field)
             db.session.commit()
@@ -117,6 +657,12 @@ def edit_field(id):
             field_to_edit.area = float(request.form.get('area'))
             field_to_edit.soil_type = request.form.get('soil_type')
             field_to_edit.irrigation_type = request.form.get('irrigation_type')
+            new_crop = request.form.get('crop')
+            if field_to_edit.crop and field_to_edit.crop != new_crop:
+                # Keep the replaced crop for rotation planning.
+                db.session.add(CropHistory(field_id=field_to_edit.id, crop=field_to_edit.crop,
+                                           season=season_for(), year=date.today().year))
+            field_to_edit.crop = new_crop
             field_to_edit.status = request.form.get('status')
             db.session.commit()
             flash('Field updated successfully!', 'success')
@@ -139,6 +685,7 @@ def delete_field(id):
     return redirect(url_for('land.list_fields'))
 
 @labor_bp.route('/workers')
+@cached_view('worker')
 def list_workers():
     all_workers = Worker.query.order_by(Worker.full_name).all()
     return render_template('labor/index.html', workers=all_workers)
@@ -189,21 +736,40 @@ def delete_worker(id):
         flash(f'Error deleting worker: {e}', 'danger')
     return redirect(url_for('labor.list_workers'))
 
+def _stamp_completion(task, completed_on=None):
+    """Records the day a task was completed (today unless given as YYYY-MM-DD); payroll counts worked days from it."""
+    if task.status == 'Completed':
+        completed_on = datetime.strptime(completed_on, '%Y-%m-%d').date() if completed_on else None
+        task.completed_date = completed_on or task.completed_date or date.today()
+    else:
+        task.completed_date = None
+
 @tasks_bp.route('/tasks')
+@cached_view('task', 'worker', 'land')
 def list_tasks():
     all_tasks = Task.query.order_by(Task.id.desc()).all()
     return render_template('tasks/index.html', tasks=all_tasks)
 
+def _task_assignment(form):
+    """(field_id, worker_id) from the task form, refusing a field or worker of another farm."""
+    field_id, worker_id = int(form.get('field_id')), int(form.get('worker_id')) if form.get('worker_id') else None
+    if db.session.get(Land, field_id) is None:
+        raise ValueError(f"unknown field {field_id}")
+    if worker_id is not None and db.session.get(Worker, worker_id) is None:
+        raise ValueError(f"unknown worker {worker_id}")
+    return field_id, worker_id
+
 @tasks_bp.route('/tasks/add', methods=['GET', 'POST'])
 def add_task():
     if request.method == 'POST':
         try:
-            worker_id = request.form.get('worker_id')
+            field_id, worker_id = _task_assignment(request.form)
             new_task = Task(
                 name=request.form.get('name'), description=request.form.get('description'),
                 priority=request.form.get('priority'), status=request.form.get('status'),
-                field_id=int(request.form.get('field_id')), worker_id=int(worker_id) if worker_id else None
+                field_id=field_id, worker_id=worker_id
             )
+            _stamp_completion(new_task, request.form.get('completed_date'))
             db.session.add(new_task)
             db.session.commit()
             flash('Task added successfully!', 'success')
@@ -220,13 +786,13 @@ def edit_task(id):
     task_to_edit = Task.query.get_or_404(id)
     if request.method == 'POST':
         try:
-            worker_id = request.form.get('worker_id')
+            field_id, worker_id = _task_assignment(request.form)
             task_to_edit.name = request.form.get('name')
             task_to_edit.description = request.form.get('description')
             task_to_edit.priority = request.form.get('priority')
             task_to_edit.status = request.form.get('status')
-            task_to_edit.field_id = int(request.form.get('field_id'))
-            task_to_edit.worker_id = int(worker_id) if worker_id else None
+            task_to_edit.field_id, task_to_edit.worker_id = field_id, worker_id
+            _stamp_completion(task_to_edit, request.form.get('completed_date'))
             db.session.commit()
             flash('Task updated successfully!', 'success')
         except Exception as e:
@@ -250,6 +816,7 @@ def delete_task(id):
     return redirect(url_for('tasks.list_tasks'))
 
 @inventory_bp.route('/inventory')
+@cached_view('inventory_item')
 def list_items():
     all_items = InventoryItem.query.order_by(InventoryItem.name).all()
     return render_template('inventory/index.html', items=all_items)
@@ -302,7 +869,51 @@ def delete_item(id):
         flash(f'Error deleting item: {e}', 'danger')
     return redirect(url_for('inventory.list_items'))
 
+def _compute_payroll(start_date, end_date):
+    """
+    Wage bill per worker for completed tasks in [start_date, end_date].
+    A worker is paid one daily wage per distinct day on which they completed a task.
+    """
+    worked = (
+        db.session.query(Task.worker_id.label('worker_id'), db.func.count(db.distinct(Task.completed_date)).label('days'))
+        .filter(Task.status == 'Completed', Task.worker_id.isnot(None),
+                Task.completed_date >= start_date, Task.completed_date <= end_date)
+        .group_by(Task.worker_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(Worker.id, Worker.full_name, Worker.daily_wage, worked.c.days,
+                         (worked.c.days * Worker.daily_wage).label('amount'))
+        .join(worked, worked.c.worker_id == Worker.id)
+        .order_by(Worker.full_name)
+        .all()
+    )
+    return [{'worker_id': r.id, 'worker': r.full_name, 'daily_wage': r.daily_wage,
+             'days_worked': r.days, 'amount': r.amount} for r in rows]
+
+def _undated_tasks():
+    """Completed tasks with no completion day (finished before days were recorded); payroll cannot count them."""
+    rows = (
+        db.session.query(Task.id, Task.name, Worker.id.label('worker_id'), Worker.full_name)
+        .join(Worker, Task.worker_id == Worker.id)
+        .filter(Task.status == 'Completed', Task.completed_date.is_(None))
+        .order_by(Task.id)
+        .all()
+    )
+    return [{'task_id': r.id, 'task': r.name, 'worker_id': r.worker_id, 'worker': r.full_name} for r in rows]
+
+def _posted_payroll(worker_ids, start_date, end_date):
+    """Earlier postings for these workers whose pay period overlaps [start_date, end_date]."""
+    return (
+        PayrollPosting.query
+        .filter(PayrollPosting.farm_id == _current_farm_id(), PayrollPosting.worker_id.in_(worker_ids),
+                PayrollPosting.start_date <= end_date, PayrollPosting.end_date >= start_date)
+        .order_by(PayrollPosting.start_date)
+        .all()
+    )
+
 @finance_bp.route('/finance')
+@cached_view('transaction')
 def list_transactions():
     all_transactions = Transaction.query.order_by(Transaction.date.desc()).all()
     total_income = db.session.query(db.func.sum(Transaction.amount)).filter(Transaction.type == 'Income').scalar() or 0.0
@@ -365,31 +976,201 @@ def delete_transaction(id):
         flash(f'Error deleting transaction: {e}', 'danger')
     return redirect(url_for('finance.list_transactions'))
 
+listing_feed = ListingFeed(max_pending=100)
+_feed_relay_pid = None
+
+def _publish_listing(event, payload):
+    """Publishes to this process's feed subscribers and, when multi-process, logs it for the other workers."""
+    listing_feed.publish(event, payload)
+    if MULTIPROCESS:
+        db.session.add(ListingEvent(event=event, payload=json.dumps(payload), origin_pid=os.getpid()))
+        db.session.commit()
+
+def _start_feed_relay():
+    """Starts, once per worker process, the thread that relays other workers' listing events."""
+    global _feed_relay_pid
+    if MULTIPROCESS and _feed_relay_pid != os.getpid():
+        _feed_relay_pid = os.getpid()
+        threading.Thread(target=_relay_listing_events, name='listing-relay', daemon=True).start()
+
+def _relay_listing_events():
+    with app.app_context():
+        last = db.session.query(func.max(ListingEvent.id)).scalar() or 0
+        db.session.remove()
+        pruned_at = time.monotonic()
+        while True:
+            time.sleep(FEED_RELAY_SECONDS)
+            try:
+                for row in ListingEvent.query.filter(ListingEvent.id > last).order_by(ListingEvent.id):
+                    if row.origin_pid != os.getpid():
+                        listing_feed.publish(row.event, json.loads(row.payload))
+                    last = row.id
+                if time.monotonic() - pruned_at > 600:
+                    pruned_at = time.monotonic()
+                    ListingEvent.query.filter(ListingEvent.created_at < datetime.utcnow() - timedelta(hours=1)).delete()
+                    db.session.commit()
+            except Exception as e:
+                print(f"❌ Error relaying listing events: {e}")
+            finally:
+                db.session.remove()
+
+def _listing_payload(listing):
+    return {"id": listing.id, "farmer_name": listing.farmer_name, "location": listing.location,
+            "crop_type": listing.crop_type, "quantity": listing.quantity, "expected_price": listing.expected_price,
+            "harvest_date": listing.harvest_date.strftime('%d %b %Y'), "description": listing.description}
+
+_matching_engine = None
+_matching_version = None  # the 'order_book' data version the in-memory books reflect
+os.makedirs(app.instance_path, exist_ok=True)
+_order_book_lock = ProcessLock(os.path.join(app.instance_path, 'order_book.lock'))
+
+def _get_matching_engine():
+    """
+    The in-memory order books, built from open listings and bids on first use
+    and rebuilt whenever another worker process has changed them since.
+    """
+    global _matching_engine, _matching_version
+    [version] = _data_versions(['order_book'])
+    if _matching_engine is not None and version == _matching_version:
+        return _matching_engine
+    with _order_book_lock:
+        [version] = _data_versions(['order_book'])
+        if _matching_engine is not None and version == _matching_version:
+            return _matching_engine
+        engine = MatchingEngine()
+        fills = []
+        orders = [(p.date_listed, SELL, p.id, p.crop_type, p.location, p.expected_price, p.quantity - p.quantity_filled)
+                  for p in Produce.query.filter(Produce.quantity_filled < Produce.quantity - QUANTITY_EPSILON)]
+        orders += [(b.date_placed, BUY, b.id, b.crop_type, b.location, b.max_price, b.quantity - b.quantity_filled)
+                   for b in Bid.query.filter(Bid.status == 'Open')]
+        for placed, side, order_id, crop, location, price, remaining in sorted(orders, key=lambda o: (o[0] or datetime.min, o[1], o[2])):
+            fills += [(f, crop, location) for f in engine.submit(side, order_id, crop, location, price, remaining)]
+        _matching_engine, _matching_version = engine, version
+        _record_fills(fills)
+    return _matching_engine
+
+@contextlib.contextmanager
+def _order_book_change():
+    """
+    Serializes an order-book change across worker processes: yields the
+    up-to-date books, then bumps the shared book version so the other
+    processes resync. A failed change drops this process's books instead.
+    """
+    global _matching_engine, _matching_version
+    with _order_book_lock:
+        try:
+            yield _get_matching_engine()
+        except Exception:
+            _matching_engine = None
+            raise
+        _bump_versions(db.session.connection(), {'order_book'})
+        db.session.commit()
+        [_matching_version] = _data_versions(['order_book'])
+
+def _record_fills(fills):
+    """Persists matched trades and the filled quantities on both orders."""
+    if not fills:
+        return
+    for fill, crop, location in fills:
+        db.session.add(Trade(produce_id=fill['sell_id'], bid_id=fill['buy_id'], crop_type=crop, location=location,
+                             quantity=fill['quantity'], price=fill['price']))
+        Produce.query.filter_by(id=fill['sell_id']).update(
+            {Produce.quantity_filled: Produce.quantity_filled + fill['quantity']}, synchronize_session=False)
+        Bid.query.filter_by(id=fill['buy_id']).update(
+            {Bid.quantity_filled: Bid.quantity_filled + fill['quantity']}, synchronize_session=False)
+    bid_ids = {fill['buy_id'] for fill, _, _ in fills}
+    Bid.query.filter(Bid.id.in_(bid_ids), Bid.quantity_filled >= Bid.quantity - QUANTITY_EPSILON).update(
+        {Bid.status: 'Filled'}, synchronize_session=False)
+    db.session.commit()
+
+def _submit_order(side, order):
+    """Sends a committed Produce (sell) or Bid (buy) row to its book and records any trades."""
+    price = order.expected_price if side == SELL else order.max_price
+    fills = _get_matching_engine().submit(side, order.id, order.crop_type, order.location, price, order.quantity)
+    _record_fills([(f, order.crop_type, order.location) for f in fills])
+    return fills
+
 @mandi_bp.route('/')
+@cached_view('produce', 'price_history', extra=lambda: (price_service.version(),))
 def market():
-    listings = Produce.query.order_by(Produce.date_listed.desc()).all()
-    with app.test_request_context():
-        market_prices_data = market_prices().get_json()
+    # The query runs only if the listings fragment is not cached for this data version.
+    listings = Produce.query.order_by(Produce.date_listed.desc())
     return render_template(
         'mandi_connect/market.html', 
         listings=listings, 
-        market_prices=market_prices_data
+        market_prices=price_service.market_summary('Nashik'),
+        versions=_view_versions('produce'), price_version=price_service.version()
     )
 
+def _geocode_listing(listing):
+    """Normalizes the listing location to the gazetteer and stamps its grid cell."""
+    place = gazetteer.resolve_location(listing.location)
+    if place:
+        listing.location = place['name']
+        listing.latitude, listing.longitude = place['lat'], place['lon']
+        listing.geo_cell = gazetteer.cell_for(place['lat'], place['lon'])
+
+def _backfill_listing_locations():
+    """Geocodes listings saved before they carried coordinates, one UPDATE per distinct location."""
+    locations = [row[0] for row in db.session.query(Produce.location).filter(Produce.geo_cell.is_(None)).distinct()]
+    for location in locations:
+        place = gazetteer.resolve_location(location)
+        if place:
+            Produce.query.filter(Produce.location == location, Produce.geo_cell.is_(None)).update({
+                'location': place['name'], 'latitude': place['lat'], 'longitude': place['lon'],
+                'geo_cell': gazetteer.cell_for(place['lat'], place['lon'])
+            }, synchronize_session=False)
+    db.session.commit()
+
+def _listings_near(place, radius_km, crop=None, max_price=None, limit=100):
+    """
+    Listings within radius_km of a gazetteer place, nearest first, as (Produce, km) pairs.
+    Walks grid-cell rings outward and stops once `limit` hits are closer than the next ring.
+    """
+    lat, lon = place['lat'], place['lon']
+    # Equirectangular distance is enough to pick each ring's closest rows in SQL.
+    approx = (Produce.latitude - lat) * (Produce.latitude - lat) \
+        + (Produce.longitude - lon) * (Produce.longitude - lon) * math.cos(math.radians(lat)) ** 2
+    found = []
+    for cells, min_km in gazetteer.cell_rings(lat, lon, radius_km):
+        if len(found) >= limit and found[limit - 1][0] <= min_km:
+            break
+        query = db.session.query(Produce.id, Produce.latitude, Produce.longitude).filter(Produce.geo_cell.in_(cells))
+        if crop:
+            query = query.filter(Produce.crop_type.ilike(f"%{crop}%"))
+        if max_price is not None:
+            query = query.filter(Produce.expected_price <= max_price)
+        rows = query.order_by(approx, Produce.date_listed.desc()).limit(limit).all()
+        if rows:
+            ids, lats, lons = zip(*rows)
+            distances = gazetteer.haversine_km(lat, lon, lats, lons)
+            found.extend((float(km), pid) for km, pid in zip(distances, ids) if km <= radius_km)
+            found.sort()
+    found = found[:limit]
+    by_id = {p.id: p for p in Produce.query.filter(Produce.id.in_([pid for _, pid in found])).all()}
+    return [(by_id[pid], round(km, 1)) for km, pid in found]
+
 @mandi_bp.route('/sell', methods=['GET', 'POST'])
 def sell_produce():
     if request.method == 'POST':
         try:
             harvest_date_str = request.form.get('harvestDate')
             harvest_date_obj = datetime.strptime(harvest_date_str, '%Y-%m-%d').date()
-            new_listing = Produce(
-                farmer_name=request.form.get('farmer_name', "Anonymous Farmer"), location=request.form.get('location'),
-                crop_type=request.form.get('cropType'), quantity=float(request.form.get('quantity')),
-                expected_price=int(request.form.get('price')), harvest_date=harvest_date_obj,
-                description=request.form.get('description')
-            )
-            db.session.add(new_listing)
-            db.session.commit()
+            # The books are loaded (under the lock) before this listing is committed.
+            with _order_book_change():
+                new_listing = Produce(
+                    farmer_name=request.form.get('farmer_name', "Anonymous Farmer"), location=request.form.get('location'),
+                    crop_type=request.form.get('cropType'), quantity=float(request.form.get('quantity')),
+                    expected_price=int(request.form.get('price')), harvest_date=harvest_date_obj,
+                    description=request.form.get('description')
+                )
+                _geocode_listing(new_listing)
+                db.session.add(new_listing)
+                db.session.commit()
+                _publish_listing('created', _listing_payload(new_listing))
+                fills = _submit_order(SELL, new_listing)
+            if fills:
+                flash('Part of your produce was matched with waiting buyers.', 'info')
             flash('Your produce has been listed successfully!', 'success')
             return redirect(url_for('mandi.market'))
         except Exception as e:
@@ -397,21 +1178,57 @@ def sell_produce():
             flash(f'There was an error listing your produce: {e}', 'danger')
     return render_template('mandi_connect/sell_form.html')
 
+_search_index_ready = None
+
+def _produce_search_enabled():
+    """Lazily creates the full-text listing index; False on databases without FTS5."""
+    global _search_index_ready
+    if _search_index_ready is None:
+        try:
+            _search_index_ready = mandi_search.ensure_search_index(db.engine)
+        except Exception as e:
+            print(f"⚠️ Full-text search unavailable, falling back to LIKE filters: {e}")
+            _search_index_ready = False
+    return _search_index_ready
+
 @mandi_bp.route('/search', methods=['POST'])
 def search_produce():
     try:
         data = request.get_json()
-        query = Produce.query
-        if data.get('crop') and data.get('crop').strip():
-            query = query.filter(Produce.crop_type.ilike(f"%{data['crop'].strip()}%"))
-        if data.get('location') and data.get('location').strip():
-            query = query.filter(Produce.location.ilike(f"%{data['location'].strip()}%"))
-        if data.get('price') and data.get('price').strip():
-            query = query.filter(Produce.expected_price <= int(data['price']))
-        results = query.order_by(Produce.date_listed.desc()).all()
+        max_price = int(data['price']) if data.get('price') and data.get('price').strip() else None
+        limit = min(max(int(data.get('limit', 100)), 1), SEARCH_MAX_RESULTS)
+        distances = {}
+        near = data.get('near') and data.get('near').strip()
+        if near:
+            place = gazetteer.resolve_location(near)
+            if not place:
+                return jsonify(success=False, error=f"Unknown location: {near}")
+            try:
+                radius_km = float(data.get('radius_km', 50))
+            except (TypeError, ValueError):
+                radius_km = None
+            if radius_km is None or not 0 < radius_km <= NEARBY_MAX_RADIUS_KM:
+                return jsonify(success=False, error=f"radius_km must be between 0 and {NEARBY_MAX_RADIUS_KM} km."), 400
+            nearby = _listings_near(place, radius_km, (data.get('crop') or '').strip(), max_price, limit)
+            results = [p for p, _ in nearby]
+            distances = {p.id: km for p, km in nearby}
+        else:
+            match = mandi_search.build_match_query(data.get('crop'), data.get('location'), data.get('q'))
+            if match and _produce_search_enabled():
+                ids = mandi_search.search_listing_ids(db.engine, match, max_price=max_price, limit=limit)
+                by_id = {p.id: p for p in Produce.query.filter(Produce.id.in_(ids)).all()} if ids else {}
+                results = [by_id[i] for i in ids if i in by_id]
+            else:
+                query = Produce.query
+                if data.get('crop') and data.get('crop').strip():
+                    query = query.filter(Produce.crop_type.ilike(f"%{data['crop'].strip()}%"))
+                if data.get('location') and data.get('location').strip():
+                    query = query.filter(Produce.location.ilike(f"%{data['location'].strip()}%"))
+                if max_price is not None:
+                    query = query.filter(Produce.expected_price <= max_price)
+                results = query.order_by(Produce.date_listed.desc()).limit(limit).all()
         results_list = [
-            {"farmer_name": r.farmer_name, "location": r.location, "crop_type": r.crop_type, "quantity": r.quantity,
-             "expected_price": r.expected_price, "harvest_date": r.harvest_date.strftime('%d %b %Y'), "description": r.description}
+            {**_listing_payload(r), **({"distance_km": distances[r.id]} if r.id in distances else {})}
             for r in results
         ]
         return jsonify(success=True, listings=results_list)
@@ -419,12 +1236,73 @@ def search_produce():
         print(f"❌ Error during search: {e}")
         return jsonify(success=False, error=str(e))
 
+@mandi_bp.route('/feed')
+def listing_stream():
+    """Server-Sent Events stream of listings created or removed after the page loaded."""
+    _start_feed_relay()
+    subscription = listing_feed.subscribe(request.args.get('crop'), request.args.get('location'),
+                                          request.args.get('max_price', type=int))
+    return Response(
+        stream_with_context(listing_feed.stream(subscription)), mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@mandi_bp.route('/bids', methods=['POST'])
+def place_bid():
+    """Posts a buy order; it fills against the cheapest, oldest listings at or below max_price."""
+    data = request.get_json(silent=True) or {}
+    try:
+        quantity, price = float(data.get('quantity')), int(data.get('price'))
+    except (TypeError, ValueError):
+        quantity = price = None
+    if quantity is None or not 0 < quantity < float('inf') or price <= 0:
+        return jsonify(success=False, error="quantity and price must be positive numbers."), 400
+    try:
+        location = data.get('location', '')
+        place = gazetteer.resolve_location(location)
+        with _order_book_change():
+            bid = Bid(
+                buyer_name=data.get('buyer_name', 'Anonymous Buyer'), location=place['name'] if place else location,
+                crop_type=data.get('crop'), quantity=quantity, max_price=price
+            )
+            db.session.add(bid)
+            db.session.commit()
+            fills = _submit_order(BUY, bid)
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error placing bid: {e}")
+        return jsonify(success=False, error=str(e)), 400
+    return jsonify(success=True, bid_id=bid.id, status=bid.status, filled=bid.quantity_filled,
+                   trades=[{'listing_id': f['sell_id'], 'quantity': f['quantity'], 'price': f['price']} for f in fills])
+
+@mandi_bp.route('/bids/<int:id>/cancel', methods=['POST'])
+def cancel_bid(id):
+    bid = Bid.query.get_or_404(id)
+    if bid.status == 'Open':
+        with _order_book_change() as engine:
+            engine.cancel(BUY, bid.id, bid.crop_type, bid.location)
+            bid.status = 'Cancelled'
+            db.session.commit()
+    return jsonify(success=True, bid_id=bid.id, status=bid.status)
+
+@mandi_bp.route('/book')
+def order_book():
+    """Best bid/ask price levels for one crop at one mandi."""
+    crop = request.args.get('crop', '')
+    place = gazetteer.resolve_location(request.args.get('location', ''))
+    location = place['name'] if place else request.args.get('location', '')
+    return jsonify(crop=crop, location=location, **_get_matching_engine().depth(crop, location, int(request.args.get('levels', 5))))
+
 @mandi_bp.route('/listing/<int:id>/delete', methods=['POST'])
 def delete_listing(id):
     listing_to_delete = Produce.query.get_or_404(id)
     try:
-        db.session.delete(listing_to_delete)
-        db.session.commit()
+        payload = _listing_payload(listing_to_delete)
+        with _order_book_change() as engine:
+            engine.cancel(SELL, listing_to_delete.id, listing_to_delete.crop_type, listing_to_delete.location)
+            db.session.delete(listing_to_delete)
+            db.session.commit()
+        _publish_listing('deleted', payload)
         flash('Listing removed successfully.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -454,11 +1332,21 @@ try:
 except Exception as e:
     print(f"❌ Error initializing KisanMitraAI class: {e}")
 
+def _cached_ai(key, fetch):
+    """An AI response from the shared cache, fetched and stored on a miss; failed responses are not cached."""
+    cached = shared_cache.get(f"ai:{key}")
+    if cached is not None:
+        return cached
+    response = fetch()
+    if isinstance(response, dict) and 'error' not in response:
+        shared_cache.set(f"ai:{key}", response, AI_CACHE_SECONDS)
+    return response
+
 def _get_news_data():
     if not ai_system or not ai_system.model:
         return {"error": "AI system not available", "articles": []}
     try:
-        return ai_system.get_agricultural_news(generation_config={"temperature": 0.8})
+        return _cached_ai('news', lambda: ai_system.get_agricultural_news(generation_config={"temperature": 0.8}))
     except Exception as e:
         print(f"❌ Error fetching AI news: {e}")
         return {"error": str(e), "articles": []}
@@ -467,7 +1355,7 @@ def _get_schemes_data():
     if not ai_system or not ai_system.model:
         return {"error": "AI system not available", "schemes": []}
     try:
-        return ai_system.get_government_schemes(generation_config={"temperature": 0.3})
+        return _cached_ai('schemes', lambda: ai_system.get_government_schemes(generation_config={"temperature": 0.3}))
     except Exception as e:
         print(f"❌ Error fetching AI schemes: {e}")
         return {"error": str(e), "schemes": []}
@@ -476,7 +1364,8 @@ def _get_weather_data(location='Kalyan'):
     if not ai_system or not ai_system.model:
         return {"location": location, "current": {"temperature_celsius": "N/A"}, "forecast": [], "agricultural_impact": "Weather data unavailable."}
     try:
-        return ai_system.get_weather_analysis(location=location, generation_config={"temperature": 0.2})
+        return _cached_ai(f"weather:{location.lower()}", lambda: ai_system.get_weather_analysis(
+            location=location, generation_config={"temperature": 0.2}))
     except Exception as e:
         print(f"❌ Error fetching AI weather: {e}")
         return {"error": str(e)}
@@ -489,6 +1378,84 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 CROP_DATA = {'soybean': {'name': 'Soybean', 'msp': 4800}, 'cotton': {'name': 'Cotton', 'msp': 7100}, 'moong': {'name': 'Moong', 'msp': 8600}}
 MARKET_DATA = {'nashik': {'soybean': 5200, 'cotton': 7500, 'moong': 9000}}
 
+def _price_history():
+    return PriceHistoryStore(db.engine)
+
+def _load_price_tables():
+    """Latest modal prices from the historical store; the static table until prices are imported."""
+    with app.app_context():
+        store = _price_history()
+        store.ensure_schema()
+        tables = store.latest_tables()
+    if not tables:
+        print("📊 No imported mandi prices yet, using built-in market data")
+    return tables or MARKET_DATA
+
+price_forecaster = PriceForecaster(_price_history, cache=shared_cache)
+yield_model = YieldModel()
+crop_planner = rotation_planner.RotationPlanner(yield_model)
+
+def _forecast_insights(location):
+    """Trend and 30-day forecast text for a market, from the cached batch forecasts."""
+    forecasts = price_forecaster.market_forecasts(location)
+    if not forecasts:
+        return {}
+    ranked = sorted(forecasts.items(), key=lambda item: item[1]['change_pct'], reverse=True)
+    def describe(change):
+        return 'rising' if change >= 3 else 'falling' if change <= -3 else 'stable'
+    return {
+        'market_trend': ', '.join(f"{crop.capitalize()} {describe(f['change_pct'])} ({f['change_pct']:+.1f}%)" for crop, f in ranked[:5]),
+        'price_forecast': '; '.join(f"{crop.capitalize()}: ₹{f['forecast'][-1]:,} in {price_forecaster.horizon} days" for crop, f in ranked[:5]),
+        'forecasts': forecasts
+    }
+
+price_service = MarketPriceService(_load_price_tables, refresh_seconds=PRICE_REFRESH_SECONDS, insights=_forecast_insights,
+                                  cache=shared_cache)
+
+@app.cli.command('import-prices')
+@click.argument('paths', nargs=-1, required=True)
+def import_prices(paths):
+    """Bulk-load daily APMC price CSV files into the historical price store."""
+    with app.app_context():
+        _price_history().ingest_csv(paths)
+        with db.engine.begin() as conn:
+            _bump_versions(conn, {'price_history'})
+    price_service.invalidate()
+
+def seed_demo_data(scale=None, seed=42):
+    """Appends synthetic farm and mandi rows (see seed_data) and invalidates everything cached over them."""
+    tables = {name: db.metadata.tables[name] for name in seed_data.DEFAULT_SCALE}
+    with app.app_context():
+        db.create_all()
+        _produce_search_enabled()
+        with db.engine.begin() as conn:
+            last_ids = {name: conn.execute(select(func.coalesce(func.max(SYNC_MODELS[name].__table__.c.id), 0))).scalar()
+                        for name in SYNC_MODELS}
+            counts = seed_data.generate(conn, tables, scale, seed)
+            _log_existing_rows(conn, last_ids)
+            _bump_versions(conn, set(tables) | {'order_book'})
+    shared_cache.clear()
+    return counts
+
+@app.cli.command('seed-demo')
+@click.option('--seed', default=42, show_default=True, help="Random seed; the same seed gives the same data.")
+@click.option('--scale', default=1.0, show_default=True, help="Multiplier on the default row counts.")
+@click.option('--farms', type=int, help="Farms the rows are spread over (default 1k).")
+@click.option('--fields', type=int, help="Land rows (default 10k).")
+@click.option('--workers', type=int, help="Worker rows (default 2k).")
+@click.option('--tasks', type=int, help="Task rows (default 50k).")
+@click.option('--inventory', type=int, help="Inventory rows (default 2k).")
+@click.option('--transactions', type=int, help="Transaction rows (default 1M).")
+@click.option('--listings', type=int, help="Produce listings (default 500k).")
+def seed_demo(seed, scale, **sizes):
+    """Fill the database with synthetic farm and mandi data for load testing."""
+    tables = dict(zip(sizes, ('farm', 'land', 'worker', 'task', 'inventory_item', 'transaction', 'produce')))
+    counts = {table: sizes[option] if sizes[option] is not None else int(seed_data.DEFAULT_SCALE[table] * scale)
+              for option, table in tables.items()}
+    started = time.perf_counter()
+    seed_demo_data(counts, seed)
+    print(f"✅ Seeded {sum(counts.values())} rows in {time.perf_counter() - started:.0f}s")
+
 
 # =====================================================================
 # --- MAIN PAGE ROUTES ---
@@ -497,22 +1464,67 @@ MARKET_DATA = {'nashik': {'soybean': 5200, 'cotton': 7500, 'moong': 9000}}
 def index():
     return render_template('index.html')
 
+@app.route('/farms', methods=['GET', 'POST'])
+def farms():
+    """
+    Lists the farms this deployment serves (GET) or registers a new one
+    (POST {"name"}). The new farm's access key is returned once and only
+    its hash is stored.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or request.form
+        name = (data.get('name') or '').strip()
+        if not name:
+            return jsonify({"error": "A farm name is required."}), 400
+        key = secrets.token_urlsafe(24)
+        farm = Farm(name=name, access_key_hash=_hash_farm_key(key))
+        db.session.add(farm)
+        db.session.commit()
+        return jsonify(id=farm.id, name=farm.name, access_key=key), 201
+    return jsonify(current=_current_farm_id(), farms=[{'id': f.id, 'name': f.name} for f in Farm.query.order_by(Farm.name)])
+
+@app.route('/farms/<int:id>/select', methods=['POST'])
+def select_farm(id):
+    """Makes `id` this browser's farm given its access_key; API clients send X-Farm-Id and X-Farm-Key instead."""
+    farm = Farm.query.get_or_404(id)
+    data = request.get_json(silent=True) or request.form
+    if not _farm_key_matches(farm.access_key_hash, data.get('access_key')):
+        abort(403, description=f"Wrong access key for farm {id}")
+    session['farm_id'] = farm.id
+    flash(f'Now managing {farm.name}.', 'info')
+    return redirect(request.referrer or url_for('farm_management'))
+
+@app.cli.command('farm-key')
+@click.argument('farm_id', type=int)
+def farm_key(farm_id):
+    """Issue a new access key for a farm (also for farms made before keys existed); the old key stops working."""
+    with app.app_context():
+        farm = db.session.get(Farm, farm_id)
+        if farm is None:
+            raise click.ClickException(f"Unknown farm {farm_id}")
+        key = secrets.token_urlsafe(24)
+        farm.access_key_hash = _hash_farm_key(key)
+        db.session.commit()
+    print(f"🔑 Access key for {farm.name} (farm {farm_id}): {key}")
+
 @app.route('/farm-management')
+@cached_view('land', 'worker', 'task', 'transaction', extra=lambda: (date.today(),))
 def farm_management():
-    total_land = db.session.query(db.func.sum(Land.area)).scalar() or 0
-    field_count = Land.query.count()
-    active_crops = Land.query.filter(Land.status.in_(['Planted', 'Growing'])).count()
-    worker_count = Worker.query.count()
-    total_income = db.session.query(db.func.sum(Transaction.amount)).filter(Transaction.type == 'Income').scalar() or 0
-    total_expense = db.session.query(db.func.sum(Transaction.amount)).filter(Transaction.type == 'Expense').scalar() or 0
-    net_profit = (total_income or 0) - (total_expense or 0)
-    recent_tasks = Task.query.order_by(Task.id.desc()).limit(5).all()
-    stats = {
-        'total_land': total_land, 'field_count': field_count,
-        'active_crops': active_crops, 'worker_count': worker_count,
-        'monthly_profit': net_profit, 'recent_tasks': recent_tasks
-    }
-    return render_template('farm_management.html', stats=stats, today=date.today())
+    def profit():
+        totals = dict(db.session.query(Transaction.type, db.func.sum(Transaction.amount))
+                      .filter(Transaction.type.in_(['Income', 'Expense'])).group_by(Transaction.type).all())
+        return (totals.get('Income') or 0) - (totals.get('Expense') or 0)
+    # Each stat is queried only when its dashboard fragment is not cached for the current data versions.
+    stats = _Lazy(
+        total_land=lambda: db.session.query(db.func.sum(Land.area)).scalar() or 0,
+        field_count=lambda: Land.query.count(),
+        active_crops=lambda: Land.query.filter(Land.status.in_(['Planted', 'Growing'])).count(),
+        worker_count=lambda: Worker.query.count(),
+        monthly_profit=profit,
+        recent_tasks=lambda: Task.query.order_by(Task.id.desc()).limit(5).all()
+    )
+    return render_template('farm_management.html', stats=stats, today=date.today(),
+                           versions=_view_versions('land', 'worker', 'task', 'transaction'))
 
 @app.route('/fasal-salah')
 def fasal_salah():
@@ -525,17 +1537,10 @@ def mandi_connect():
 
 @app.route('/gyan-kendra')
 def gyan_kendra():
-    """Pre-fetches data for all Gyan Kendra tabs."""
-    news_data = _get_news_data()
-    schemes_data = _get_schemes_data()
-    weather_data = _get_weather_data()
-    
-    return render_template(
-        'gyan_kendra.html',
-        news_articles=news_data.get('articles', []),
-        schemes=schemes_data.get('schemes', []),
-        weather=weather_data
-    )
+    """Data for all Gyan Kendra tabs; only panels the AI filled are cached, so a failed fetch is retried next time."""
+    panels = _Lazy(news=lambda: _get_news_data().get('articles', []),
+                   schemes=lambda: _get_schemes_data().get('schemes', []))
+    return render_template('gyan_kendra.html', panels=panels, weather=_get_weather_data(), today=date.today())
 
 @app.route('/paudha-rakshak')
 def paudha_rakshak():
@@ -568,12 +1573,9 @@ def crop_recommendation():
         return jsonify({'location': location, 'recommendations': recommendations, 'market_data': MARKET_DATA.get('nashik', {}), 'ai_used': False})
     try:
         data = request.get_json()
-        ai_response = ai_system.get_crop_recommendation(
-            location=data.get('location'), soil_type=data.get('soil_type'),
-            irrigation=data.get('irrigation'), land_area=data.get('land_area'),
-            season=data.get('season'), budget=data.get('budget'),
-            generation_config={"temperature": 0.7}
-        )
+        inputs = {k: data.get(k) for k in ('location', 'soil_type', 'irrigation', 'land_area', 'season', 'budget')}
+        ai_response = _cached_ai(f"crop:{json.dumps(inputs, sort_keys=True)}", lambda: ai_system.get_crop_recommendation(
+            **inputs, generation_config={"temperature": 0.7}))
         return jsonify(ai_response)
     except Exception as e:
         print(f"❌ Error in /api/crop-recommendation: {e}")
@@ -603,95 +1605,487 @@ def disease_detection():
     return jsonify({"error": "An unknown error occurred."}), 500
 
 @app.route('/api/market-prices')
+@cached_view('price_history', max_age=60, public=True, extra=lambda: (price_service.version(),))
 def market_prices():
     location = request.args.get('location', 'Nashik')
-    print("📊 Using mock data for market prices")
-    return jsonify({
-        'location': location, 'current_prices': MARKET_DATA.get(location.lower(), {}),
-        'market_trend': 'Prices are stable', 'price_forecast': 'Expected 5-10% increase',
-        'demand_analysis': 'High demand for pulses', 'ai_used': False
-    })
+    return jsonify(price_service.market_summary(location))
+
+@app.route('/api/price-history')
+@cached_view('price_history', max_age=300, public=True, extra=lambda: (date.today(),))
+def price_history():
+    commodity = request.args.get('commodity', '')
+    market = request.args.get('market', 'Nashik')
+    store = _price_history()
+    if not request.args.get('start'):
+        return jsonify({'commodity': commodity, 'market': market, 'latest': store.latest(commodity, market)})
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('end') or date.today().isoformat(), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD."}), 400
+    return jsonify({'commodity': commodity, 'market': market, 'prices': store.price_range(commodity, market, start, end)})
+
+_sensor_schema_ready = False
+_last_sensor_prune = 0.0
+
+def _sensor_store():
+    global _sensor_schema_ready
+    store = SensorStore(db.engine, SENSOR_RAW_RETENTION_DAYS, SENSOR_MINUTE_RETENTION_DAYS, SENSOR_TZ_OFFSET_SECONDS)
+    if not _sensor_schema_ready:
+        store.ensure_schema()
+        _sensor_schema_ready = True
+    return store
+
+@app.route('/api/sensors/readings', methods=['POST'])
+def ingest_sensor_readings():
+    """
+    Batched sensor upload, either as {"readings": [{field_id, sensor, metric, ts, value}]}
+    or column-wise as {"series": [{field_id, sensor, metric, timestamps: [...], values: [...]}]}.
+    Timestamps are epoch seconds. The irrigation engine reads the metrics soil_moisture (%),
+    air_temperature (C), humidity (%) and wind_speed (m/s).
+    """
+    global _last_sensor_prune
+    data = request.get_json(silent=True) or {}
+    field_ids, metrics, sensors, timestamps, values = [], [], [], [], []
+    try:
+        for r in data.get('readings') or []:
+            field_ids.append(int(r['field_id'])); metrics.append(str(r['metric'])); sensors.append(str(r.get('sensor') or 'default'))
+            timestamps.append(int(r['ts'])); values.append(float(r['value']))
+        for s in data.get('series') or []:
+            count = len(s['timestamps'])
+            if len(s['values']) != count:
+                raise ValueError("timestamps and values differ in length")
+            field_ids.extend([int(s['field_id'])] * count); metrics.extend([str(s['metric'])] * count)
+            sensors.extend([str(s.get('sensor') or 'default')] * count)
+            timestamps.extend(int(t) for t in s['timestamps']); values.extend(float(v) for v in s['values'])
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid sensor readings: {e}"}), 400
+
+    known = {row[0] for row in db.session.query(Land.id).filter(Land.id.in_(set(field_ids))).all()} if field_ids else set()
+    keep = [i for i, f in enumerate(field_ids) if f in known]
+    try:
+        store = _sensor_store()
+        stored = store.ingest([field_ids[i] for i in keep], [metrics[i] for i in keep], [sensors[i] for i in keep],
+                              [timestamps[i] for i in keep], [values[i] for i in keep])
+        if time.monotonic() - _last_sensor_prune > 3600:
+            _last_sensor_prune = time.monotonic()
+            store.prune()
+    except Exception as e:
+        print(f"❌ Error in /api/sensors/readings: {e}")
+        return jsonify({"error": "Failed to store sensor readings."}), 500
+    return jsonify({'stored': stored, 'rejected': len(field_ids) - stored,
+                    'unknown_fields': sorted(set(field_ids) - known)})
+
+@app.route('/api/sensors/<int:field_id>', methods=['GET'])
+def field_sensors(field_id):
+    Land.query.get_or_404(field_id)
+    return jsonify({'field_id': field_id, 'series': _sensor_store().series(field_id)})
+
+@app.route('/api/sensors/<int:field_id>/<metric>', methods=['GET'])
+def field_sensor_rollups(field_id, metric):
+    """Rolled-up readings: ?bucket=minute|hour|day&start=&end= (epoch seconds, default the last day)."""
+    Land.query.get_or_404(field_id)
+    bucket = request.args.get('bucket', 'hour')
+    if bucket not in BUCKETS:
+        return jsonify({"error": f"bucket must be one of {', '.join(BUCKETS)}."}), 400
+    try:
+        end = int(request.args.get('end') or time.time())
+        start = int(request.args.get('start') or end - 86400)
+    except ValueError:
+        return jsonify({"error": "start and end must be epoch seconds."}), 400
+    return jsonify({'field_id': field_id, 'metric': metric, 'bucket': bucket,
+                    'points': _sensor_store().rollups(field_id, metric, start, end, bucket)})
+
+@app.cli.command('prune-sensor-data')
+def prune_sensor_data():
+    """Drop raw sensor readings and minute rollups past their retention window."""
+    with app.app_context():
+        _sensor_store().prune()
+
+def _sensor_conditions(field_ids):
+    """
+    Per-field irrigation inputs from sensor rollups: current volumetric soil
+    moisture (last 6 hours) and the last 7 days' weather. NaN where a field
+    has no sensor of that kind.
+    """
+    store, now = _sensor_store(), time.time()
+
+    def row_mean(values):
+        counts = (~np.isnan(values)).sum(axis=1)
+        return np.where(counts > 0, np.nansum(values, axis=1) / np.maximum(counts, 1), np.nan)
+
+    moisture = store.summary(field_ids, 'soil_moisture', now - 6 * 3600, now, bucket='hour')['mean']
+    seen = ~np.isnan(moisture)
+    newest = moisture.shape[1] - 1 - seen[:, ::-1].argmax(axis=1)
+    temperature = store.summary(field_ids, 'air_temperature', now - 7 * 86400, now)
+    return {
+        'soil_moisture': np.where(seen.any(axis=1), moisture[np.arange(len(field_ids)), newest], np.nan) / 100,
+        'tmax': row_mean(temperature['max']),
+        'tmin': row_mean(temperature['min']),
+        'rh_mean': row_mean(store.summary(field_ids, 'humidity', now - 7 * 86400, now)['mean']),
+        'wind': row_mean(store.summary(field_ids, 'wind_speed', now - 7 * 86400, now)['mean']),
+    }
+
+def _plan_days(data):
+    # The engine allocates fields x days arrays, so the horizon is capped at a year.
+    return min(max(int(data.get('days', 30)), 1), 366)
+
+def _irrigation_plan(fields, weather, location=None, days=30):
+    """
+    Runs the FAO-56 water balance for a list of field dicts (crop, soil_type,
+    irrigation_type, growth stage or days sown). Fields with an id use their
+    sensors' soil moisture, and their measured weather when none is given.
+    """
+    place = gazetteer.resolve_location(location) if location else None
+    inputs = irrigation_engine.weather_inputs(weather)
+    soil_moisture = None
+    field_ids = [f.get('id') for f in fields]
+    if any(field_ids):
+        sensed = _sensor_conditions([f or 0 for f in field_ids])
+        soil_moisture = sensed['soil_moisture']
+        if not weather:
+            inputs = {k: np.where(np.isnan(sensed[k]), v, sensed[k])[:, None] if k in sensed else v
+                      for k, v in inputs.items()}
+    return irrigation_engine.irrigation_schedule(
+        [f.get('crop') for f in fields], [f.get('soil_type') for f in fields], [f.get('irrigation_type') for f in fields],
+        inputs, date.today().timetuple().tm_yday,
+        days_after_sowing=[f.get('days_after_sowing') for f in fields], growth_stages=[f.get('growth_stage') for f in fields],
+        soil_moisture=soil_moisture, days=days, latitude=place['lat'] if place else irrigation_engine.DEFAULT_LATITUDE
+    )
 
 @app.route('/api/irrigation-calculator', methods=['POST'])
 def irrigation_calculator():
-    if not ai_system or not ai_system.model:
-        return jsonify({"error": "AI system not available"}), 503
+    data = request.get_json(silent=True) or {}
+    crop, soil_type, method = data.get('crop_type'), data.get('soil_type'), data.get('irrigation_type') or 'Drip'
     try:
-        data = request.get_json()
-        ai_response = ai_system.get_irrigation_advice(
-            crop=data.get('crop_type'), soil_type=data.get('soil_type'),
-            land_area=data.get('land_area'), weather=data.get('weather'),
-            growth_stage=data.get('growth_stage'), generation_config={"temperature": 0.3}
-        )
-        return jsonify(ai_response)
+        field_id = int(data['field_id']) if data.get('field_id') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "field_id must be a field id."}), 400
+    if field_id is not None:
+        Land.query.get_or_404(field_id)  # only the current farm's sensors
+    try:
+        plan = _irrigation_plan([{
+            'id': field_id, 'crop': crop, 'soil_type': soil_type, 'irrigation_type': method,
+            'growth_stage': data.get('growth_stage'), 'days_after_sowing': data.get('days_after_sowing')
+        }], data.get('weather'), data.get('location'), days=_plan_days(data))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid irrigation inputs: {e}"}), 400
+    summary = irrigation_engine.summarize(plan['gross_irrigation'][0])
+    efficiency = irrigation_engine.application_efficiency(method)
+    method_feedback = f"{method} irrigation gets about {efficiency:.0%} of applied water to the root zone."
+    if efficiency < 0.75:
+        method_feedback += f" Switching to drip would cut the water needed by about {1 - efficiency / 0.9:.0%}."
+    tips = "Use mulch to reduce soil moisture evaporation. Check soil moisture before watering."
+    if 'sand' in (soil_type or '').lower():
+        tips = "Sandy soil holds little water: irrigate lightly and often, and add organic matter to improve retention."
+    elif 'black' in (soil_type or '').lower():
+        tips = "Black soil holds water well but cracks when dry: avoid over-watering and irrigate before cracks widen."
+    if summary['interval_days']:
+        frequency = f"Every {summary['interval_days']:g} days"
+    elif summary['events']:
+        frequency = f"Once, on day {summary['events'][0]['day'] + 1}"
+    else:
+        frequency = "Not needed in this period"
+    result = {
+        'water_needed_liters_per_acre': summary['litres_per_acre'],
+        'frequency': frequency,
+        'best_time': "Early morning (5 AM - 8 AM)",
+        'method_feedback': method_feedback,
+        'optimization_tips': tips,
+        'et0_mm_per_day': round(float(plan['et0'][0].mean()), 2),
+        'crop_water_use_mm_per_day': round(float(plan['etc'][0].mean()), 2),
+        'schedule': summary['events'],
+        'ai_used': False
+    }
+    # The numbers are always local; the AI only rewrites the advice text when available.
+    if data.get('explain', True) and ai_system and ai_system.model:
+        try:
+            prose = ai_system.get_irrigation_advice(
+                crop=crop, soil_type=soil_type, land_area=data.get('land_area'), weather=data.get('weather'),
+                growth_stage=data.get('growth_stage'), generation_config={"temperature": 0.3}
+            )
+            result.update({k: prose[k] for k in ('best_time', 'method_feedback', 'optimization_tips') if prose.get(k)})
+            result['ai_used'] = True
+        except Exception as e:
+            print(f"❌ Error adding AI irrigation advice: {e}")
+    return jsonify(result)
+
+def _merge_ai_advice(advise, fields, results, keys):
+    """
+    Rewrites the advice text of many local results with one batched AI call.
+    Fields the AI gave no valid answer for keep their local text.
+    """
+    if not (ai_system and ai_system.model) or not fields:
+        return
+    try:
+        answers = advise(fields, generation_config={"temperature": 0.3})
     except Exception as e:
-        print(f"❌ Error in /api/irrigation-calculator: {e}")
-        return jsonify({"error": "Failed to get AI irrigation advice."}), 500
+        print(f"❌ Error adding batched AI advice: {e}")
+        return
+    for result, answer in zip(results, answers):
+        if answer:
+            result.update({k: answer[k] for k in keys if answer.get(k)})
+            result['ai_used'] = True
+
+@app.route('/api/irrigation-schedule', methods=['POST'])
+def irrigation_schedule():
+    """30-day irrigation schedules for every field (or the given field_ids) in one pass."""
+    data = request.get_json(silent=True) or {}
+    query = db.session.query(Land.id, Land.name, Land.area, Land.crop, Land.soil_type, Land.irrigation_type)
+    if data.get('field_ids'):
+        query = query.filter(Land.id.in_(data['field_ids']))
+    fields = [dict(row._mapping, growth_stage=data.get('growth_stage')) for row in query.all() if row.crop]
+    if not fields:
+        return jsonify({'schedules': [], 'ai_used': False})
+    try:
+        plan = _irrigation_plan(fields, data.get('weather'), data.get('location'), days=_plan_days(data))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid irrigation inputs: {e}"}), 400
+    schedules = []
+    for i, field in enumerate(fields):
+        summary = irrigation_engine.summarize(plan['gross_irrigation'][i])
+        schedules.append({
+            'field_id': field['id'], 'name': field['name'], 'crop': field['crop'],
+            'litres_per_acre': summary['litres_per_acre'], 'interval_days': summary['interval_days'],
+            'total_litres': int(plan['gross_irrigation'][i].sum() * irrigation_engine.LITRES_PER_MM_ACRE * field['area']),
+            'events': summary['events'], 'ai_used': False
+        })
+    if data.get('explain'):
+        _merge_ai_advice(ai_system.get_irrigation_advice_batch if ai_system else None, [dict(
+            f, land_area=f['area'], weather=data.get('weather')) for f in fields
+        ], schedules, ('best_time', 'method_feedback', 'optimization_tips'))
+    return jsonify({'days': plan['et0'].shape[1], 'schedules': schedules,
+                    'ai_used': any(s['ai_used'] for s in schedules)})
 
 @app.route('/api/fertilizer-recommendation', methods=['POST'])
 def fertilizer_recommendation():
-    if not ai_system or not ai_system.model:
-        return jsonify({"error": "AI system not available"}), 503
+    data = request.get_json(silent=True) or {}
     try:
-        data = request.get_json()
-        ai_response = ai_system.get_fertilizer_advice(
-            crop=data.get('crop_type'), soil_type=data.get('soil_type'),
-            growth_stage=data.get('growth_stage'), generation_config={"temperature": 0.5}
-        )
-        return jsonify(ai_response)
-    except Exception as e:
-        print(f"❌ Error in /api/fertilizer-recommendation: {e}")
-        return jsonify({"error": "Failed to get AI fertilizer advice."}), 500
+        return jsonify(soil_engine.fertilizer_plan(
+            data.get('crop_type'), data.get('growth_stage'),
+            nitrogen=data.get('nitrogen'), phosphorus=data.get('phosphorus'), potassium=data.get('potassium')
+        ))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Soil test values must be numbers."}), 400
+
+@app.route('/api/fertilizer-recommendation/batch', methods=['POST'])
+def fertilizer_recommendation_batch():
+    """Stage doses for every cropped field (or the given field_ids), optionally with AI-written guidance."""
+    data = request.get_json(silent=True) or {}
+    query = db.session.query(Land.id, Land.name, Land.crop, Land.soil_type)
+    if data.get('field_ids'):
+        query = query.filter(Land.id.in_(data['field_ids']))
+    stages = data.get('growth_stages') or {}
+    fields = [dict(row._mapping, growth_stage=stages.get(str(row.id)) or data.get('growth_stage'))
+              for row in query.all() if row.crop]
+    results = [dict(soil_engine.fertilizer_plan(f['crop'], f['growth_stage']), field_id=f['id'], name=f['name'], crop=f['crop'])
+               for f in fields]
+    if data.get('explain'):
+        _merge_ai_advice(ai_system.get_fertilizer_advice_batch if ai_system else None, fields, results,
+                         ('application_timing', 'application_method', 'organic_alternatives'))
+    return jsonify({'results': results, 'ai_used': any(r['ai_used'] for r in results)})
 
 @app.route('/api/soil-health-analysis', methods=['POST'])
 def soil_health_analysis():
-    if not ai_system or not ai_system.model:
-        return jsonify({"error": "AI system not available"}), 503
+    data = request.get_json(silent=True) or {}
     try:
-        data = request.get_json()
-        ai_response = ai_system.get_soil_health_analysis(
-            soil_type=data.get('soil_type'), ph=data.get('ph_level'),
-            organic_matter=data.get('organic_matter'), nitrogen=data.get('nitrogen'),
-            phosphorus=data.get('phosphorus'), potassium=data.get('potassium'),
-            generation_config={"temperature": 0.5}
-        )
-        return jsonify(ai_response)
-    except Exception as e:
-        print(f"❌ Error in /api/soil-health-analysis: {e}")
-        return jsonify({"error": "Failed to get AI soil analysis."}), 500
+        [report] = soil_engine.soil_health_reports([data])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "ph_level, organic_matter, nitrogen, phosphorus and potassium are required numbers."}), 400
+    return jsonify(report)
+
+@app.route('/api/soil-health-analysis/batch', methods=['POST'])
+def soil_health_analysis_batch():
+    """Scores a soil-test camp's samples in one call; results keep the order (and sample_id) of the input."""
+    data = request.get_json(silent=True) or {}
+    samples = data.get('samples') or []
+    try:
+        reports = soil_engine.soil_health_reports(samples)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({"error": "Each sample needs numeric ph_level, organic_matter, nitrogen, phosphorus and potassium."}), 400
+    status_counts = {}
+    for sample, report in zip(samples, reports):
+        if 'sample_id' in sample:
+            report['sample_id'] = sample['sample_id']
+        status_counts[report['health_status']] = status_counts.get(report['health_status'], 0) + 1
+    return jsonify({'results': reports, 'summary': status_counts, 'ai_used': False})
+
+def _predict_yields(fields, location='Nashik', season=None):
+    """
+    Yield and revenue predictions for many fields in one model call. Each field
+    is a dict with crop, area, soil_type and irrigation_type; revenue uses the
+    location's current mandi price, falling back to MSP.
+    """
+    prediction = yield_model.predict(
+        [f.get('crop') for f in fields], [float(f.get('area') or 0) for f in fields],
+        [f.get('soil_type') for f in fields], [f.get('irrigation_type') for f in fields],
+        [season] * len(fields)
+    )
+    prices = price_service.get_prices(location)
+    results = []
+    for field, per_acre, total, known in zip(fields, prediction['per_acre'], prediction['total'], prediction['known_inputs']):
+        crop = (field.get('crop') or '').strip().lower()
+        if prices.get(crop):
+            price, source = prices[crop], f"{location} mandi price"
+        elif crop in CROP_DATA:
+            price, source = CROP_DATA[crop]['msp'], "MSP"
+        else:
+            price, source = 5000, "default price"
+        results.append(dict(field, **{
+            'expected_yield_per_acre': round(float(per_acre), 2), 'total_expected_yield': round(float(total), 2),
+            'price_per_quintal': price, 'price_source': source, 'expected_revenue': int(total * price),
+            'confidence_level': ('Low', 'Low', 'Medium', 'High')[int(known)]
+        }))
+    return results
 
 @app.route('/api/crop-yield-prediction', methods=['POST'])
 def crop_yield_prediction():
-    # ... (This still uses mock data, can be upgraded later)
-    data = request.get_json()
-    crop = data.get('crop')
-    land_area = data.get('land_area', 1)
-    soil_type = data.get('soil_type', 'Black Soil')
-    print("📊 Using DYNAMIC mock data for yield prediction")
-    base_yields = {'soybean': 12, 'cotton': 8, 'moong': 6}
-    base_yield = base_yields.get(crop.lower(), 10)
-    if "Black Soil" in soil_type:
-        base_yield *= 1.1
-    total_yield = round(base_yield * land_area, 2)
-    expected_revenue = int(total_yield * (CROP_DATA.get(crop.lower(), {}).get('msp', 5000)))
+    data = request.get_json(silent=True) or {}
+    crop = data.get('crop') or ''
+    try:
+        [result] = _predict_yields([{
+            'crop': crop, 'area': data.get('land_area', 1),
+            'soil_type': data.get('soil_type', 'Black Soil'), 'irrigation_type': data.get('irrigation_type', 'Rain-fed')
+        }], data.get('location') or 'Nashik', data.get('season'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "land_area must be a number."}), 400
     return jsonify({
-        'expected_yield_per_acre': f"{round(base_yield, 2)} quintals", 'total_expected_yield': f"{total_yield} quintals",
-        'confidence_level': 'Medium', 'expected_revenue': f"₹{expected_revenue:,}",
-        'market_price_assumption': f"Based on MSP of ₹{CROP_DATA.get(crop.lower(), {}).get('msp', 5000)}/quintal",
+        'expected_yield_per_acre': f"{result['expected_yield_per_acre']} quintals",
+        'total_expected_yield': f"{result['total_expected_yield']} quintals",
+        'confidence_level': result['confidence_level'], 'expected_revenue': f"₹{result['expected_revenue']:,}",
+        'market_price_assumption': f"Based on {result['price_source']} of ₹{result['price_per_quintal']:,}/quintal",
         'ai_used': False
     })
 
+@app.route('/api/crop-yield-prediction/batch', methods=['POST'])
+def crop_yield_prediction_batch():
+    """
+    Predictions for a whole farm in one request: every Land row (or the given
+    field_ids), or an explicit `fields` list for co-op members' plots.
+    """
+    data = request.get_json(silent=True) or {}
+    season = data.get('season') or season_for()
+    try:
+        if data.get('fields'):
+            fields = [{
+                'name': f.get('name'), 'crop': f.get('crop') or data.get('crop'), 'area': float(f.get('area') or 0),
+                'soil_type': f.get('soil_type'), 'irrigation_type': f.get('irrigation_type')
+            } for f in data['fields']]
+        else:
+            query = db.session.query(Land.id, Land.name, Land.crop, Land.area, Land.soil_type, Land.irrigation_type)
+            if data.get('field_ids'):
+                query = query.filter(Land.id.in_(data['field_ids']))
+            fields = [{
+                'field_id': row.id, 'name': row.name, 'crop': row.crop or data.get('crop'), 'area': row.area,
+                'soil_type': row.soil_type, 'irrigation_type': row.irrigation_type
+            } for row in query.all()]
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({"error": "fields must be a list of objects with a numeric area."}), 400
+
+    skipped = [f.get('field_id', f['name']) for f in fields if not f['crop']]
+    try:
+        predictions = _predict_yields([f for f in fields if f['crop']], data.get('location') or 'Nashik', season)
+    except Exception as e:
+        print(f"❌ Error in /api/crop-yield-prediction/batch: {e}")
+        return jsonify({"error": "Failed to predict yields."}), 500
+    return jsonify({
+        'season': season, 'predictions': predictions, 'skipped_without_crop': skipped,
+        'totals': {
+            'area': round(sum(p['area'] for p in predictions), 2),
+            'expected_yield': round(sum(p['total_expected_yield'] for p in predictions), 2),
+            'expected_revenue': sum(p['expected_revenue'] for p in predictions)
+        },
+        'ai_used': False
+    })
+
+def _json_grid(values):
+    """Nested lists for JSON, rounded to 2 decimals, with undefined cells (e.g. zero yield) as null."""
+    rounded = np.round(values, 2).astype(object)
+    rounded[~np.isfinite(values)] = None
+    return rounded.tolist()
+
+def _yield_per_acre(data):
+    """
+    The request's yield in quintals per acre, as both calculator modes use it:
+    `yield_per_acre`, or the older `expected_yield` (whole land) divided by the
+    area. None when neither is given.
+    """
+    if data.get('yield_per_acre') is not None:
+        return float(data['yield_per_acre'])
+    if data.get('expected_yield') is not None:
+        area = float(data.get('land_area', 1))
+        if area <= 0:
+            raise ValueError("land_area must be positive")
+        return float(data['expected_yield']) / area
+    return None
+
+def _farming_sweep(data):
+    spec = data['sweep']
+    crops = [str(c).strip().lower() for c in (spec.get('crops') or [data.get('crop') or 'soybean'])]
+    location = data.get('location') or 'Nashik'
+    areas = scenario_sweep.parse_range(spec.get('land_area', data.get('land_area', 1)), 'land_area')
+    costs = scenario_sweep.parse_range(spec.get('cost_per_acre', data.get('cost_per_acre', scenario_sweep.DEFAULT_COST_PER_ACRE)),
+                                       'cost_per_acre')
+    # Axes left out of the sweep take the single-scenario value when given, else each crop's own
+    # current price and modelled yield.
+    spec = dict(spec)
+    for axis, value in (('price', data.get('price')), ('yield_per_acre', _yield_per_acre(data))):
+        if axis not in spec and value is not None:
+            spec[axis] = value
+    if 'price' in spec:
+        prices = np.tile(scenario_sweep.parse_range(spec['price'], 'price'), (len(crops), 1))
+    else:
+        market = price_service.get_prices(location)
+        prices = np.array([[market.get(c) or CROP_DATA.get(c, {}).get('msp', scenario_sweep.DEFAULT_PRICE)] for c in crops], dtype=float)
+    if 'yield_per_acre' in spec:
+        yields = np.tile(scenario_sweep.parse_range(spec['yield_per_acre'], 'yield_per_acre'), (len(crops), 1))
+    else:
+        modelled = yield_model.predict(crops, [1] * len(crops), [data.get('soil_type')] * len(crops),
+                                       [data.get('irrigation_type')] * len(crops), [data.get('season')] * len(crops))
+        yields = modelled['per_acre'][:, None]
+
+    scenarios = len(crops) * len(areas) * prices.shape[1] * yields.shape[1] * len(costs)
+    if scenarios > scenario_sweep.MAX_SCENARIOS:
+        raise ValueError(f"Sweep has {scenarios:,} scenarios; the limit is {scenario_sweep.MAX_SCENARIOS:,}")
+    if data.get('include_surface') and scenarios > scenario_sweep.MAX_SURFACE_CELLS:
+        raise ValueError(f"profit_surface is only returned for up to {scenario_sweep.MAX_SURFACE_CELLS:,} scenarios; "
+                         f"this sweep has {scenarios:,}")
+    result = scenario_sweep.sweep(crops, areas, prices, yields, costs, top_k=int(data.get('top_k', 10)))
+
+    response = {
+        'scenarios': scenarios,
+        'axes': {'crop': crops, 'land_area': areas.tolist(), 'price': prices.tolist(),
+                 'yield_per_acre': yields.tolist(), 'cost_per_acre': costs.tolist()},
+        'top_scenarios': result['top'],
+        'break_even': {c: {'price': _json_grid(result['break_even_price'][i]), 'yield_per_acre': _json_grid(result['break_even_yield'][i])}
+                       for i, c in enumerate(crops)},
+        'profitable_share': dict(zip(crops, result['profitable_share'].round(3).tolist())),
+        'ai_used': False
+    }
+    if data.get('include_surface'):
+        response['profit_surface'] = _json_grid(result['profit'])
+    return response
+
 @app.route('/api/farming-calculator', methods=['POST'])
 def farming_calculator():
-    # ... (This still uses mock data)
-    data = request.get_json()
-    land_area = data.get('land_area', 1)
-    expected_yield = data.get('expected_yield', 10)
-    total_cost = 15000 * land_area
-    revenue = int(expected_yield) * 5000
-    profit = revenue - total_cost
-    print("📊 Using mock data for farming calculator")
-    return jsonify({'total_cost': f"₹{total_cost:,}", 'expected_revenue': f"₹{revenue:,}", 'net_profit': f"₹{profit:,}", 'ai_used': False})
+    data = request.get_json(silent=True) or {}
+    if data.get('sweep'):
+        try:
+            return jsonify(_farming_sweep(data))
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+    # One scenario of the sweep, so both modes compute the same economics from per-acre figures.
+    try:
+        land_area = float(data.get('land_area', 1))
+        per_acre = _yield_per_acre({'expected_yield': 10, **data})
+        price = float(data.get('price', scenario_sweep.DEFAULT_PRICE))
+        cost = float(data.get('cost_per_acre', scenario_sweep.DEFAULT_COST_PER_ACRE))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    crop = str(data.get('crop') or 'soybean').strip().lower()
+    scenario = scenario_sweep.sweep([crop], [land_area], [[price]], [[per_acre]], [cost], top_k=1)['top'][0]
+    return jsonify({'total_cost': f"₹{scenario['total_cost']:,.0f}", 'expected_revenue': f"₹{scenario['revenue']:,.0f}",
+                    'net_profit': f"₹{scenario['net_profit']:,.0f}", 'yield_per_acre': round(per_acre, 2), 'ai_used': False})
 
 @app.route('/api/farm-analytics', methods=['POST'])
 def farm_analytics():
@@ -703,16 +2097,163 @@ def farm_analytics():
         'ai_used': False
     })
 
+@app.route('/api/rotation-plan', methods=['POST'])
+def rotation_plan():
+    """
+    Multi-season crop plan for every field (or field_ids). Optional per-season
+    limits: water_m3, budget, labor_days (a number or one per season); labour
+    defaults to the worker roster's capacity.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        season_count = min(max(int(data.get('seasons', 3)), 1), 9)
+        query = db.session.query(Land.id, Land.name, Land.area, Land.soil_type, Land.irrigation_type, Land.crop)
+        if data.get('field_ids'):
+            query = query.filter(Land.id.in_(data['field_ids']))
+        lands = query.order_by(Land.id).all()
+        last_crop = {}
+        history = db.session.query(CropHistory.field_id, CropHistory.crop).join(Land, Land.id == CropHistory.field_id)
+        for field_id, crop in history.order_by(CropHistory.id):
+            last_crop[field_id] = crop
+        past = {int(k): v for k, v in (data.get('past_crops') or {}).items()}
+        fields = [{
+            'id': row.id, 'name': row.name, 'area': row.area, 'soil_type': row.soil_type,
+            'irrigation_type': row.irrigation_type,
+            'previous_crop': past.get(row.id) or row.crop or last_crop.get(row.id)
+        } for row in lands]
+
+        limits = dict(data.get('limits') or {})
+        if 'labor_days' not in limits:
+            workers = Worker.query.count()
+            limits['labor_days'] = workers * rotation_planner.WORKING_DAYS_PER_SEASON if workers else None
+        seasons = rotation_planner.upcoming_seasons(date.today(), season_count)
+        location = data.get('location') or 'Nashik'
+        market = price_service.get_prices(location)
+        prices = {c: market.get(c) or CROP_DATA.get(c, {}).get('msp') or rotation_planner.REFERENCE_PRICES[c]
+                  for c in rotation_planner.CANDIDATES[1:]}
+        result = crop_planner.plan(fields, seasons, prices, limits)
+    except (AttributeError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid planning inputs: {e}"}), 400
+    except Exception as e:
+        print(f"❌ Error in /api/rotation-plan: {e}")
+        return jsonify({"error": "Failed to build the rotation plan."}), 500
+
+    crops = rotation_planner.CANDIDATES
+    plan = [{
+        'field_id': f['id'], 'name': f['name'], 'area': f['area'], 'previous_crop': f['previous_crop'],
+        'seasons': [{
+            'season': season, 'year': year, 'crop': crops[result['plan'][i, s]],
+            'expected_margin': int(result['margin'][i, s]), 'water_m3': round(float(result['usage'][i, s, 0]), 1),
+            'cost': int(result['usage'][i, s, 1]), 'labor_days': round(float(result['usage'][i, s, 2]), 1)
+        } for s, (season, year) in enumerate(seasons)]
+    } for i, f in enumerate(fields)]
+    totals = [dict({'season': season, 'year': year}, **{
+        name: {'used': round(float(result['totals'][s, r]), 1),
+               'limit': float(result['caps'][s, r]) if np.isfinite(result['caps'][s, r]) else None}
+        for r, name in enumerate(rotation_planner.RESOURCES)
+    }) for s, (season, year) in enumerate(seasons)]
+    return jsonify({
+        'plan': plan, 'season_totals': totals, 'expected_margin': int(result['objective']),
+        'feasible': result['feasible'], 'iterations': result['iterations'],
+        'solve_seconds': result['solve_seconds'], 'cached': result['cached'], 'ai_used': False
+    })
+
 @app.route('/api/task-optimization', methods=['POST'])
 def task_optimization():
-    # ... (This still uses mock data)
-    print("📊 Using mock data for task optimization")
+    data = request.get_json(silent=True) or {}
+    try:
+        max_per_worker = int(data.get('max_tasks_per_worker', 1))
+    except (TypeError, ValueError):
+        max_per_worker = None
+    if max_per_worker is None or not 1 <= max_per_worker <= MAX_TASKS_PER_WORKER:
+        return jsonify({"error": f"max_tasks_per_worker must be a whole number from 1 to {MAX_TASKS_PER_WORKER}."}), 400
+    try:
+        pending = Task.query.filter(Task.status == 'Pending')
+        if not data.get('reassign'):
+            pending = pending.filter(Task.worker_id.is_(None))
+        tasks = pending.all()
+        workers = Worker.query.all()
+        current_load = {}
+        if not data.get('reassign'):
+            current_load = dict(
+                db.session.query(Task.worker_id, db.func.count(Task.id))
+                .filter(Task.status == 'Pending', Task.worker_id.isnot(None))
+                .group_by(Task.worker_id).all()
+            )
+        assignments = optimize_assignments(tasks, workers, max_tasks_per_worker=max_per_worker, current_load=current_load)
+
+        if data.get('apply') and assignments:
+            db.session.execute(update(Task), [{'id': a['task_id'], 'worker_id': a['worker_id']} for a in assignments])
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error in /api/task-optimization: {e}")
+        return jsonify({"error": "Failed to optimize task assignments."}), 500
+
+    task_names = {t.id: t.name for t in tasks}
+    worker_names = {w.id: w.full_name for w in workers}
+    task_fields = {t.id: t.field_id for t in tasks}
+    field_names = dict(db.session.query(Land.id, Land.name).all())
+    schedule = [{
+        'task': task_names[a['task_id']], 'worker': worker_names[a['worker_id']],
+        'field': field_names.get(task_fields[a['task_id']]),
+        'task_id': a['task_id'], 'worker_id': a['worker_id'], 'cost': a['cost']
+    } for a in assignments]
+    improvements = []
+    unassigned = len(tasks) - len(assignments)
+    if unassigned:
+        improvements.append(f"{unassigned} pending tasks could not be assigned; add workers or raise max_tasks_per_worker")
     return jsonify({
-        'optimized_schedule': [{'task': 'Irrigation', 'worker': 'Ramesh Kumar', 'field': 'Field 1'}],
-        'efficiency_improvements': ['Group similar tasks'],
+        'optimized_schedule': schedule,
+        'efficiency_improvements': improvements,
+        'applied': bool(data.get('apply')),
         'ai_used': False
     })
     
+@app.route('/api/payroll', methods=['POST'])
+def payroll():
+    data = request.get_json(silent=True) or {}
+    try:
+        start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d').date()
+        end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return jsonify({"error": "start_date and end_date are required as YYYY-MM-DD."}), 400
+    if end_date < start_date:
+        return jsonify({"error": "end_date must not be before start_date."}), 400
+    try:
+        entries = _compute_payroll(start_date, end_date)
+        undated = _undated_tasks()
+        if data.get('post_expenses') and entries:
+            posted = _posted_payroll([e['worker_id'] for e in entries], start_date, end_date)
+            if posted:
+                names = {e['worker_id']: e['worker'] for e in entries}
+                return jsonify({
+                    "error": "Wages for part of this period are already posted; delete those expenses to post again.",
+                    "already_posted": [{'worker_id': p.worker_id, 'worker': names[p.worker_id],
+                                        'start_date': p.start_date.isoformat(), 'end_date': p.end_date.isoformat()}
+                                       for p in posted]
+                }), 409
+            period = f"{start_date:%d %b %Y} - {end_date:%d %b %Y}"
+            # Added as objects so the flush hooks bump the finance version and log the rows for sync.
+            db.session.add_all([PayrollPosting(
+                worker_id=e['worker_id'], start_date=start_date, end_date=end_date,
+                transaction=Transaction(
+                    description=f"Wages: {e['worker']} ({e['days_worked']} days, {period})",
+                    category='Labor', amount=float(e['amount']), type='Expense', date=end_date
+                )
+            ) for e in entries])
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error in /api/payroll: {e}")
+        return jsonify({"error": "Failed to compute payroll."}), 500
+    return jsonify({
+        'start_date': start_date.isoformat(), 'end_date': end_date.isoformat(),
+        'payroll': entries, 'total': sum(e['amount'] for e in entries),
+        'posted': bool(data.get('post_expenses') and entries),
+        'undated_tasks': undated
+    })
+
 # In app.py, add/replace these API routes
 
 @app.route('/api/agricultural-news', methods=['GET'])
@@ -720,7 +2261,7 @@ def agricultural_news():
     if not ai_system or not ai_system.model:
         return jsonify({"error": "AI system not available"}), 503
     try:
-        ai_response = ai_system.get_agricultural_news(generation_config={"temperature": 0.8})
+        ai_response = _cached_ai('news', lambda: ai_system.get_agricultural_news(generation_config={"temperature": 0.8}))
         return jsonify(ai_response)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -731,7 +2272,8 @@ def weather_analysis():
     if not ai_system or not ai_system.model:
         return jsonify({"error": "AI system not available"}), 503
     try:
-        ai_response = ai_system.get_weather_analysis(location=location, generation_config={"temperature": 0.2})
+        ai_response = _cached_ai(f"weather:{location.lower()}", lambda: ai_system.get_weather_analysis(
+            location=location, generation_config={"temperature": 0.2}))
         return jsonify(ai_response)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -742,14 +2284,202 @@ def government_schemes():
     if not ai_system or not ai_system.model:
         return jsonify({"error": "AI system not available"}), 503
     try:
-        ai_response = ai_system.get_government_schemes(generation_config={"temperature": 0.3})
+        ai_response = _cached_ai('schemes', lambda: ai_system.get_government_schemes(generation_config={"temperature": 0.3}))
         return jsonify(ai_response)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-if __name__ == '__main__':
+# =====================================================================
+# --- DELTA SYNC API (offline mobile clients) ---
+# =====================================================================
+def _row_versions(rows):
+    """{(table, id): version of its latest change} for rows of the current farm or shared tables."""
+    by_table = {}
+    for table, row_id in rows:
+        by_table.setdefault(table, []).append(row_id)
+    found = {}
+    for table, ids in by_table.items():
+        found.update(((table, row_id), version) for row_id, version in
+                     db.session.query(ChangeLog.row_id, func.max(ChangeLog.version))
+                     .filter(ChangeLog.farm_id.in_((0, _current_farm_id())), ChangeLog.table_name == table,
+                             ChangeLog.row_id.in_(ids)).group_by(ChangeLog.row_id))
+    return found
+
+def _write_synced_fields(row, fields):
+    for name, value in delta_sync.decode(row.__table__, fields, new=row.id is None).items():
+        setattr(row, name, value)
+    if isinstance(row, Task):
+        row.field_id, row.worker_id = _task_assignment({'field_id': row.field_id, 'worker_id': row.worker_id})
+        _stamp_completion(row)
+
+def _apply_synced_change(change):
+    """Applies one pushed edit in its own savepoint, so a rejected edit leaves the rest of the push intact."""
+    if not isinstance(change, dict):
+        return {'status': 'rejected', 'error': "each change must be an object"}
+    result = {k: change[k] for k in ('table', 'id', 'client_id') if change.get(k) is not None}
+    model, op, row_id = SYNC_MODELS.get(change.get('table')), change.get('op'), change.get('id')
+    try:
+        if model not in TENANT_MODELS:
+            # Listings change through the order book, which matches them against bids.
+            raise ValueError("table is not writable by sync clients")
+        if op not in ('upsert', 'delete'):
+            raise ValueError("op must be 'upsert' or 'delete'")
+        if row_id is None:
+            if op == 'delete':
+                raise ValueError("a delete needs the row id")
+            client_id = change.get('client_id')
+            if client_id is not None:
+                client_id = str(client_id)
+                if len(client_id) > 64:
+                    raise ValueError("client_id is longer than 64 characters")
+                done = ChangeLog.query.filter_by(farm_id=_current_farm_id(), table_name=model.__tablename__,
+                                                 client_id=client_id).first()
+                if done:  # a retry of a push whose response never reached the client
+                    return dict(result, status='applied', id=done.row_id)
+            with db.session.begin_nested():
+                row = model()
+                row.sync_client_id = client_id
+                _write_synced_fields(row, change.get('fields'))
+                db.session.add(row)
+                db.session.flush()
+            return dict(result, status='applied', id=row.id)
+
+        row = db.session.get(model, row_id)
+        current = _row_versions([(model.__tablename__, row_id)]).get((model.__tablename__, row_id), 0)
+        if row is None:
+            if op == 'delete':
+                return dict(result, status='applied')
+            return dict(result, status='conflict', version=current, deleted=True)
+        base = change.get('base_version')
+        if not isinstance(base, int) or isinstance(base, bool) or current > base:
+            columns = delta_sync.columns_of(model.__table__)
+            return dict(result, status='conflict', version=current, row=delta_sync.row_dict(row, columns))
+        with db.session.begin_nested():
+            if op == 'delete':
+                db.session.delete(row)
+            else:
+                _write_synced_fields(row, change.get('fields'))
+            db.session.flush()
+        return dict(result, status='applied')
+    except (ValueError, SQLAlchemyError) as e:
+        return dict(result, status='rejected', error=str(getattr(e, 'orig', None) or e))
+
+@app.route('/api/sync/changes')
+def sync_changes():
+    """
+    Rows of the current farm (and mandi listings) changed after version
+    `since`, oldest change first, at most `limit` rows. Each row comes once,
+    in its latest state or as a deletion, so catching up costs what changed,
+    not the size of the data. Clients keep `version` and pull again while
+    `more` is true; since=0 downloads everything.
+    """
+    since = request.args.get('since', 0, type=int)
+    limit = min(request.args.get('limit', SYNC_BATCH_SIZE, type=int), SYNC_MAX_BATCH)
+    tables = request.args.get('tables', ','.join(SYNC_MODELS)).split(',')
+    unknown = set(tables) - set(SYNC_MODELS)
+    if unknown or since < 0 or limit < 1:
+        return jsonify({"error": f"Unknown tables: {', '.join(sorted(unknown))}." if unknown else
+                        "since must be 0 or more and limit at least 1."}), 400
+
+    latest = func.max(ChangeLog.version).label('version')
+    changed = (db.session.query(ChangeLog.table_name, ChangeLog.row_id, latest)
+               .filter(ChangeLog.farm_id.in_((0, _current_farm_id())), ChangeLog.version > since,
+                       ChangeLog.table_name.in_(tables))
+               .group_by(ChangeLog.table_name, ChangeLog.row_id).order_by(latest).limit(limit).all())
+    deleted = {version for (version,) in db.session.query(ChangeLog.version).filter(
+        ChangeLog.version.in_([c.version for c in changed]), ChangeLog.deleted)}
+
+    versions = {}
+    for table, row_id, version in changed:
+        versions.setdefault(table, {})[row_id] = version
+    payload = {}
+    for table, row_versions in versions.items():
+        model = SYNC_MODELS[table]
+        live = [row_id for row_id, version in row_versions.items() if version not in deleted]
+        rows = model.query.filter(model.id.in_(live)).order_by(model.id).all() if live else []
+        payload[table] = delta_sync.pack(rows, delta_sync.columns_of(model.__table__), row_versions)
+        found = {row.id for row in rows}
+        payload[table]['deleted'] = [[version, row_id] for row_id, version in row_versions.items() if row_id not in found]
+    return jsonify(since=since, version=changed[-1].version if changed else since, more=len(changed) == limit,
+                   tables=payload)
+
+@app.route('/api/sync/push', methods=['POST'])
+def sync_push():
+    """
+    Applies edits queued offline, in order: {"changes": [{"table", "op":
+    "upsert" | "delete", "id", "base_version", "fields": {...}}]}. An edit
+    to a row changed on the server after its `base_version` is not applied
+    and comes back as a conflict with the server's row. New rows have no id
+    and should carry a `client_id`; the result maps it to the server id.
+    """
+    changes = (request.get_json(silent=True) or {}).get('changes')
+    if not isinstance(changes, list) or not 0 < len(changes) <= SYNC_MAX_BATCH:
+        return jsonify({"error": f"Send 1 to {SYNC_MAX_BATCH} edits as a list under \"changes\"."}), 400
+    results = [_apply_synced_change(change) for change in changes]
+    db.session.commit()
+    applied = [r for r in results if r['status'] == 'applied']
+    versions = _row_versions((r['table'], r['id']) for r in applied)
+    for r in applied:
+        r['version'] = versions.get((r['table'], r['id']))
+    return jsonify(results=results)
+
+@app.cli.command('compact-sync-log')
+def compact_sync_log():
+    """Drop change-log entries superseded by a later change to the same row; pulls return the same data."""
+    log = ChangeLog.__table__
+    latest = select(func.max(log.c.version)).group_by(log.c.table_name, log.c.row_id)
+    with db.engine.begin() as conn:
+        # Inserts pushed by offline clients stay, so a late retry of that push is still recognised.
+        removed = conn.execute(log.delete().where(log.c.version.not_in(latest), log.c.client_id.is_(None))).rowcount
+    print(f"✅ Removed {removed} superseded change-log entries")
+
+
+def _upgrade_schema():
+    """
+    Adds columns introduced since a database was created, which create_all
+    leaves out of existing tables, then any missing indexes. NOT NULL columns
+    are backfilled with their default; rows from before farms existed belong
+    to the default farm. Completed tasks get no completed_date and are
+    reported by payroll as undated.
+    """
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        for table in db.metadata.sorted_tables:
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(conn.dialect)}"
+                default = DEFAULT_FARM_ID if column.name == 'farm_id' else (
+                    column.default.arg if column.default is not None and column.default.is_scalar else None)
+                if not column.nullable and default is not None:
+                    ddl += f" NOT NULL DEFAULT {literal(default).compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})}"
+                conn.execute(text(ddl))
+                print(f"🔧 Added {table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def prepare_app():
+    """Creates tables and one-off indexes; run once before serving, by the dev server or the WSGI entry point."""
     with app.app_context():
         db.create_all()
+        _upgrade_schema()
+        _price_history().ensure_schema()
+        _sensor_store()
+        _produce_search_enabled()
+        _backfill_listing_locations()
+        if db.session.get(Farm, DEFAULT_FARM_ID) is None:
+            db.session.add(Farm(id=DEFAULT_FARM_ID, name='My Farm'))
+            db.session.commit()
+        # Rows from before the change log existed become inserts at its start, so a first sync downloads them.
+        unlogged = {name: 0 for name in SYNC_MODELS
+                    if not db.session.query(ChangeLog.query.filter_by(table_name=name).exists()).scalar()}
+        with db.engine.begin() as conn:
+            _log_existing_rows(conn, unlogged)
         print("Database tables created successfully.")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+
+if __name__ == '__main__':
+    prepare_app()
+    app.run(debug=DEBUG, host=HOST, port=PORT)
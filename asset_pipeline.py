@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+OUTPUT_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+_CSS_STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+_CSS_COMMENTS = re.compile(r'(' + _CSS_STRING + r')|/\*.*?\*/', re.DOTALL)
+_CSS_STRINGS = re.compile(_CSS_STRING)
+
+# A "/" starts a regex literal (not a division) after one of these, or after these keywords.
+_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^\n')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'in', 'of', 'delete', 'void', 'throw')
+_JS_TIGHT = set('{}()[];,:=<>?!&|')
+
+
+def _tighten_css(css):
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return re.sub(r':\s+', ':', css).replace(';}', '}')
+
+
+def minify_css(source):
+    """Drops comments and collapses whitespace outside strings."""
+    source = _CSS_COMMENTS.sub(lambda m: m.group(1) or ' ', source)
+    pieces, pos = [], 0
+    for match in _CSS_STRINGS.finditer(source):
+        pieces += [_tighten_css(source[pos:match.start()]), match.group()]
+        pos = match.end()
+    pieces.append(_tighten_css(source[pos:]))
+    return ''.join(pieces).strip()
+
+
+def minify_js(source):
+    """
+    Conservative JS minifier: drops comments and indentation and collapses
+    whitespace around punctuation, leaving strings, template literals and
+    regex literals untouched. Line breaks are kept where they may end a
+    statement, so automatic semicolon insertion behaves the same.
+    """
+    out = []
+    i, n = 0, len(source)
+    pending_space = pending_newline = False
+
+    def last_significant():
+        for chunk in reversed(out):
+            stripped = chunk.rstrip(' ')
+            if stripped:
+                return stripped
+        return ''
+
+    def emit(token):
+        nonlocal pending_space, pending_newline
+        prev = out[-1][-1] if out else ''
+        if pending_newline and prev and prev not in '{;,(' and token[0] not in '})]':
+            out.append('\n')
+        elif (pending_space or pending_newline) and prev and prev not in _JS_TIGHT and token[0] not in _JS_TIGHT:
+            out.append(' ')
+        pending_space = pending_newline = False
+        out.append(token)
+
+    while i < n:
+        c = source[i]
+        if c in ' \t\r':
+            pending_space = True
+            i += 1
+        elif c == '\n':
+            pending_newline = True
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            if '\n' in source[i:end]:
+                pending_newline = True
+            else:
+                pending_space = True
+            i = n if end < 0 else end + 2
+        elif c in '"\'`' or (c == '/' and _starts_regex(last_significant())):
+            j = _literal_end(source, i)
+            emit(source[i:j])
+            i = j
+        else:
+            j = i + 1
+            if c.isalnum() or c in '_$':
+                while j < n and (source[j].isalnum() or source[j] in '_$'):
+                    j += 1
+            emit(source[i:j])
+            i = j
+    return ''.join(out).strip()
+
+
+def _starts_regex(previous):
+    if not previous:
+        return True
+    if previous[-1] in _REGEX_AFTER:
+        return True
+    word = re.search(r'[A-Za-z_$]+$', previous)
+    return bool(word) and word.group() in _REGEX_KEYWORDS
+
+
+def _literal_end(source, start):
+    """Index just past the string, template or regex literal opening at `start`."""
+    quote = source[start]
+    i, in_class = start + 1, False
+    while i < len(source):
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if quote == '/':
+            if c == '[':
+                in_class = True
+            elif c == ']':
+                in_class = False
+            elif c == '/' and not in_class:
+                i += 1
+                while i < len(source) and source[i].isalpha():
+                    i += 1
+                return i
+        elif c == quote:
+            return i + 1
+        i += 1
+    return i
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def build(static_folder, files):
+    """
+    Minifies `files` (paths relative to the static folder) into content-hashed
+    copies under static/dist, with gzipped siblings for text assets, and
+    writes a manifest. Returns {source: built} as static-relative paths;
+    files that are missing are left out.
+    """
+    manifest = {}
+    for name in files:
+        path = os.path.join(static_folder, name)
+        if not os.path.exists(path):
+            continue
+        root, ext = os.path.splitext(name)
+        minify = MINIFIERS.get(ext)
+        if minify:
+            with open(path, encoding='utf-8') as f:
+                content = minify(f.read()).encode('utf-8')
+        else:
+            with open(path, 'rb') as f:
+                content = f.read()
+        built = f"{OUTPUT_DIR}/{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+        target = os.path.join(static_folder, built)
+        if not os.path.exists(target):
+            _write(target, content)
+            if minify:
+                _write(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+        manifest[name] = built
+    _write(os.path.join(static_folder, OUTPUT_DIR, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _write(path, content):
+    # Write then rename, so parallel workers building at startup never serve a partial file.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, 'wb') as f:
+        f.write(content)
+    os.replace(partial, path)
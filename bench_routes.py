@@ -0,0 +1,174 @@
+"""
+Times every farm management and mandi route against a seeded database.
+
+    python bench_routes.py [--scale 0.1] [--repeat 5] [--label before-index]
+
+Uses its own database (DATABASE_URL, default instance/bench.db) and seeds it
+with `flask seed-demo` data at `--scale` when it is empty. Farm pages are
+requested as the farm with the most fields (or `--farm`). Each route is
+requested once with caches cleared (cold), then `--repeat` more times
+(warm), stopping early once `--budget` seconds are spent on it. Results,
+with the row counts they were measured at, are appended to
+bench_results.jsonl and compared with the previous run at the same scale.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///bench.db')
+os.environ.setdefault('KISAN_DEBUG', 'false')
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from app import (app, db, prepare_app, seed_demo_data, shared_cache, Farm, Land, Worker, Task,  # noqa: E402
+                 InventoryItem, Transaction, Produce)
+import seed_data  # noqa: E402
+from config import DEFAULT_FARM_ID  # noqa: E402
+
+MODELS = {'farm': Farm, 'land': Land, 'worker': Worker, 'task': Task, 'inventory_item': InventoryItem,
+          'transaction': Transaction, 'produce': Produce}
+# Path parameter values come from the first row of the blueprint's model.
+BLUEPRINT_MODELS = {'land': Land, 'labor': Worker, 'tasks': Task, 'inventory': InventoryItem,
+                    'finance': Transaction, 'mandi': Produce}
+SKIP = {'mandi.listing_stream'}  # an open-ended event stream, not a request
+SEARCHES = {
+    'crop': {'crop': 'soybean'},
+    'crop+location': {'crop': 'onion', 'location': 'Nashik'},
+    'keywords': {'q': 'organic'},
+    'price cap': {'crop': 'cotton', 'price': '7000'},
+    'near 50km': {'near': 'Pune', 'radius_km': 50, 'crop': 'wheat'},
+}
+
+_queries = [0]
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _count_query(*args):
+    _queries[0] += 1
+
+
+def row_counts():
+    with app.app_context():
+        return {name: model.query.count() for name, model in MODELS.items()}
+
+
+def largest_farm():
+    with app.app_context():
+        return db.session.query(Land.farm_id).group_by(Land.farm_id).order_by(db.func.count().desc()).limit(1).scalar()
+
+
+def cases(farm_id):
+    """(name, method, url, json body) for every GET route of the benchmarked blueprints plus the searches."""
+    found = [('dashboard', 'GET', '/farm-management', None)]
+    with app.app_context():
+        first_ids = {}
+        for bp, model in BLUEPRINT_MODELS.items():
+            query = db.session.query(model.id)
+            if hasattr(model, 'farm_id'):
+                query = query.filter(model.farm_id == farm_id)
+            first_ids[bp] = query.order_by(model.id).limit(1).scalar()
+        for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+            blueprint = rule.endpoint.split('.')[0]
+            if blueprint not in BLUEPRINT_MODELS or 'GET' not in rule.methods or rule.endpoint in SKIP:
+                continue
+            args = {arg: first_ids[blueprint] for arg in rule.arguments}
+            url = app.url_map.bind('localhost').build(rule.endpoint, args)
+            if rule.endpoint == 'mandi.order_book':
+                url += '?crop=Soybean&location=Latur'
+            found.append((rule.endpoint, 'GET', url, None))
+    found += [(f"mandi.search ({name})", 'POST', '/mandi/search', body) for name, body in SEARCHES.items()]
+    return found
+
+
+def measure(client, method, url, body, repeat, budget, farm_id):
+    def once():
+        _queries[0] = 0
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body, headers={'X-Farm-Id': str(farm_id)})
+        data = response.get_data()
+        return time.perf_counter() - started, response.status_code, len(data), _queries[0]
+
+    shared_cache.clear()
+    cold, status, size, queries = once()
+    warm, deadline = [], time.perf_counter() + budget
+    while len(warm) < repeat and time.perf_counter() < deadline:
+        warm.append(once()[0])
+    ordered = sorted(warm) or [cold]
+    return {
+        'status': status, 'bytes': size, 'queries': queries, 'cold_ms': round(cold * 1000, 2),
+        'p50_ms': round(statistics.median(ordered) * 1000, 2),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2), 'runs': len(warm),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _previous(path, counts):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    same_scale = [r for r in runs if r['rows'] == counts]
+    return same_scale[-1] if same_scale else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help="Seed size as a multiple of the default row counts")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help="Warm requests per route")
+    parser.add_argument('--budget', type=float, default=30, help="Seconds of warm requests per route at most")
+    parser.add_argument('--output', default='bench_results.jsonl')
+    parser.add_argument('--farm', type=int, help="Farm to request pages as (default: the one with the most fields)")
+    parser.add_argument('--label', default='', help="Free-text note stored with the run")
+    args = parser.parse_args()
+
+    prepare_app()
+    counts = row_counts()
+    if not any(n for table, n in counts.items() if table != 'farm'):
+        scale = {table: int(n * args.scale) for table, n in seed_data.DEFAULT_SCALE.items()}
+        started = time.perf_counter()
+        seed_demo_data(scale, args.seed)
+        print(f"✅ Seeded {sum(scale.values())} rows in {time.perf_counter() - started:.0f}s")
+        counts = row_counts()
+    farm_id = args.farm or largest_farm() or DEFAULT_FARM_ID
+    with app.app_context():
+        farm_rows = {name: model.query.filter(model.farm_id == farm_id).count()
+                     for name, model in MODELS.items() if hasattr(model, 'farm_id')}
+    print(f"📊 Rows: {', '.join(f'{k}={v}' for k, v in counts.items())}")
+    print(f"📊 Farm {farm_id}: {', '.join(f'{k}={v}' for k, v in farm_rows.items())}")
+
+    previous = _previous(args.output, counts)
+    client = app.test_client()
+    results = {}
+    print(f"{'route':<34} {'status':>6} {'cold ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'KB':>8}  vs last p50")
+    for name, method, url, body in cases(farm_id):
+        r = results[name] = dict(measure(client, method, url, body, args.repeat, args.budget, farm_id), url=url)
+        before = previous and previous['results'].get(name)
+        change = f"{(r['p50_ms'] / before['p50_ms'] - 1) * 100:+.0f}%" if before and before['p50_ms'] else ''
+        print(f"{name:<34} {r['status']:>6} {r['cold_ms']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['queries']:>8} {r['bytes'] / 1024:>8.1f}  {change}")
+
+    with open(args.output, 'a') as f:
+        f.write(json.dumps({
+            'run_at': datetime.utcnow().isoformat(timespec='seconds'), 'revision': _git_revision(), 'label': args.label,
+            'python': platform.python_version(), 'rows': counts, 'farm': farm_id, 'farm_rows': farm_rows,
+            'results': results,
+        }) + '\n')
+    print(f"✅ Results appended to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Compares request throughput of the Flask dev server and gunicorn.
+
+    python bench_serving.py [--seconds 10] [--concurrency 16] [--workers N]
+
+Each server is started on a free port against the local database, warmed
+with one pass over the URLs, then hit by `concurrency` client threads for
+`seconds`. Prints requests/second and p50/p95 latency for each.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+URLS = ('/', '/farm-management', '/farm/land', '/farm/workers', '/gyan-kendra',
+        '/mandi/', '/api/market-prices?location=Nashik', '/static/css/style.css')
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(base, proc, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            urllib.request.urlopen(base + '/', timeout=2).read()
+            return
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            time.sleep(0.25)
+    raise RuntimeError("server did not start")
+
+
+def _fetch(url):
+    request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+def _load(base, seconds, concurrency):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+
+    def client(offset):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                _fetch(base + URLS[i % len(URLS)])
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(e)
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies) or [0.0]
+    return {
+        'requests': len(latencies), 'errors': len(errors), 'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+    }
+
+
+def run(name, command, port, seconds, concurrency, env):
+    base = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_up(base, proc)
+        for path in URLS:
+            _fetch(base + path)
+        result = _load(base, seconds, concurrency)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    print(f"{name:<10} {result['rps']:>8.1f} req/s   p50 {result['p50_ms']:>7.1f} ms   "
+          f"p95 {result['p95_ms']:>7.1f} ms   ({result['requests']} ok, {result['errors']} errors)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=None, help="gunicorn workers (default from gunicorn.conf.py)")
+    args = parser.parse_args()
+
+    dev_port, prod_port = _free_port(), _free_port()
+    dev_env = dict(os.environ, KISAN_DEBUG='false', PORT=str(dev_port))
+    run('dev', [sys.executable, 'app.py'], dev_port, args.seconds, args.concurrency, dev_env)
+
+    prod_env = dict(os.environ, PORT=str(prod_port))
+    if args.workers:
+        prod_env['WEB_CONCURRENCY'] = str(args.workers)
+    run('gunicorn', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        prod_port, args.seconds, args.concurrency, prod_env)
+
+
+if __name__ == '__main__':
+    main()
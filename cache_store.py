@@ -0,0 +1,130 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with optional per-entry expiry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[1] is not None and entry[1] < time.time()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def items(self, prefix):
+        """{key: value} for the live entries whose key starts with `prefix`; not counted as hits."""
+        now = time.time()
+        with self._lock:
+            return {key: value for key, (value, expires_at) in self._entries.items()
+                    if key.startswith(prefix) and (expires_at is None or expires_at >= now)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """
+    Cache shared by every worker process on the host, kept in one SQLite file
+    in WAL mode so readers never block. Values are pickled. Each thread (and
+    each forked process) opens its own connection.
+    """
+
+    # Trim to max_entries once every this many writes rather than on each one.
+    TRIM_EVERY = 200
+
+    def __init__(self, path, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = self.misses = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires_at REAL, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (stored_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)", (key, time.time())
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + ttl if ttl else None, now)
+        )
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+            conn.execute(
+                "DELETE FROM cache WHERE stored_at < (SELECT stored_at FROM cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def items(self, prefix):
+        """{key: value} for the live entries whose key starts with `prefix`; not counted as hits."""
+        rows = self._connection().execute(
+            "SELECT key, value FROM cache WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (prefix, prefix + '\uffff', time.time())
+        ).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+
+
+def open_cache(path=None, max_entries=1024):
+    """The shared SQLite cache at `path` if one is configured, else an in-process LRU."""
+    if path:
+        try:
+            return SQLiteCache(path)
+        except sqlite3.Error as e:
+            print(f"⚠️ Shared cache at {path} unavailable, using an in-process cache: {e}")
+    return MemoryCache(max_entries)
@@ -14,17 +14,59 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY') or SECRET_API_KEY or ""
 
 # Flask Configuration
 SECRET_KEY = 'kisan_mitra_secret_key_2025'
-DEBUG = True
+DEBUG = os.getenv('KISAN_DEBUG', 'true').lower() in ('1', 'true', 'yes')
+HOST = '0.0.0.0'
+PORT = int(os.getenv('PORT', 5000))
+
+# Database Configuration
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///farm_management.db')  # Relative SQLite paths live in instance/
+DEFAULT_FARM_ID = 1  # Farm served when a request names none (no X-Farm-Id header or selected farm)
 
 # Upload Configuration
 UPLOAD_FOLDER = 'static/uploads'
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
+# Static Asset Configuration
+STATIC_ASSETS = ('css/style.css', 'js/main.js', 'images/favicon.svg')  # Minified and fingerprinted at startup
+STATIC_MAX_AGE_SECONDS = 31536000  # Fingerprinted names change with their content, so browsers keep them a year
+
+# Cache Configuration
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH')  # SQLite file shared by worker processes; unset keeps caches in-process
+MEMORY_CACHE_ENTRIES = 512  # Fragments, AI answers and forecasts kept by the in-process cache
+AI_CACHE_SECONDS = 3600  # How long news, scheme, weather and crop answers are reused across requests
+
+# Serving Configuration
+MULTIPROCESS = os.getenv('KISAN_MULTIPROCESS') == '1'  # Set by gunicorn.conf.py; relays listing events between workers
+FEED_RELAY_SECONDS = 1  # How often each worker polls for listing events published by the others
+METRICS_PUBLISH_SECONDS = 5  # How often each worker shares its metrics for /metrics to aggregate
+
+# Mandi Search Configuration
+SEARCH_MAX_RESULTS = 500  # Most listings one /mandi/search returns, whatever limit the client asks for
+NEARBY_MAX_RADIUS_KM = 300  # Widest "near" search; Maharashtra is about 800 km end to end
+
+# Sync Configuration
+SYNC_BATCH_SIZE = 500  # Changes per /api/sync/changes page unless the client asks for fewer
+SYNC_MAX_BATCH = 5000  # Most changes one pull page or one push may carry
+
+# Profiling Configuration
+PROFILE_TOKEN = os.getenv('KISAN_PROFILE_TOKEN')  # Unset disables on-demand profiling and /admin/profiles entirely
+PROFILE_SAMPLE_RATE = float(os.getenv('KISAN_PROFILE_SAMPLE_RATE', 0))  # Fraction of all requests profiled unasked
+PROFILE_INTERVAL_SECONDS = 0.005  # Stack sampling period while a request is profiled
+PROFILE_KEEP = 50  # Most recent profiles kept for /admin/profiles
+
 # AI Configuration
 AI_ENABLED = True
 AI_MODEL = 'gemini-1.5-flash'
 AI_VISION_MODEL = 'gemini-1.5-flash'
 
+# Market Price Configuration
+PRICE_REFRESH_SECONDS = 300  # How long cached mandi price tables are served before reloading
+
+# Field Sensor Configuration
+SENSOR_RAW_RETENTION_DAYS = 30  # Raw readings older than this are pruned; rollups keep the history
+SENSOR_MINUTE_RETENTION_DAYS = 180  # Minute rollups are pruned after this; hour and day rollups are kept
+SENSOR_TZ_OFFSET_SECONDS = 19800  # Hour and day buckets follow IST (UTC+5:30)
+
 def get_api_key():
     """Get API key from environment variable, secrets file, or config file"""
     # First try to get from environment variable
@@ -0,0 +1,46 @@
+"""
+Shared pytest fixtures. The app reads its database URL at import time, so
+the environment is pointed at a scratch SQLite file before `app` is imported.
+"""
+import os
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix='kisan-test-')
+DB_PATH = os.path.join(_DB_DIR, 'test.db')
+os.environ['DATABASE_URL'] = f"sqlite:///{DB_PATH}"
+os.environ['KISAN_DEBUG'] = 'false'
+os.environ.pop('SHARED_CACHE_PATH', None)
+os.environ.pop('KISAN_MULTIPROCESS', None)
+os.environ.pop('KISAN_PROFILE_TOKEN', None)
+
+import app as kisan  # noqa: E402
+from price_forecast import PriceForecaster  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """A test client over a fresh database holding only the default farm."""
+    with kisan.app.app_context():
+        kisan.db.engine.dispose()
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    # Module-level state that remembers the previous database.
+    monkeypatch.setattr(kisan, '_search_index_ready', None)
+    monkeypatch.setattr(kisan, '_sensor_schema_ready', False)
+    monkeypatch.setattr(kisan, '_matching_engine', None)
+    monkeypatch.setattr(kisan, '_matching_version', None)
+    monkeypatch.setattr(kisan, 'price_forecaster', PriceForecaster(kisan._price_history, cache=kisan.shared_cache))
+    kisan._known_farms.clear()
+    kisan.shared_cache.clear()
+    kisan.price_service.invalidate()
+    kisan.prepare_app()
+    return kisan.app.test_client()
+
+
+@pytest.fixture
+def app_context():
+    with kisan.app.app_context():
+        yield
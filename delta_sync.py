@@ -0,0 +1,77 @@
+from datetime import date, datetime
+
+# Columns a client never sends: the key is the server's, the farm comes from the request.
+SERVER_COLUMNS = ('id', 'farm_id')
+
+
+def columns_of(table):
+    """Synced columns of a table, in table order."""
+    return [c for c in table.columns if c.name != 'farm_id']
+
+
+def encode(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def pack(rows, columns, versions):
+    """
+    One table's rows as {"columns": [...], "rows": [[version, value, ...]]}:
+    column names are sent once per batch instead of once per row.
+    """
+    return {
+        'columns': ['version'] + [c.name for c in columns],
+        'rows': [[versions[row.id]] + [encode(getattr(row, c.key)) for c in columns] for row in rows],
+    }
+
+
+def row_dict(row, columns):
+    return {c.name: encode(getattr(row, c.key)) for c in columns}
+
+
+def _decode_value(column, value):
+    kind = column.type.python_type
+    if kind is datetime:
+        return datetime.fromisoformat(value)
+    if kind is date:
+        return date.fromisoformat(value)
+    if kind is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if kind is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if kind is str and isinstance(value, str):
+        if column.type.length and len(value) > column.type.length:
+            raise ValueError(f"{column.name} is longer than {column.type.length} characters")
+        return value
+    if kind is bool and isinstance(value, bool):
+        return value
+    raise ValueError(f"{column.name} must be a {kind.__name__}")
+
+
+def decode(table, fields, new):
+    """
+    Column values for a client's `fields` ({name: JSON value}), checked
+    against the table's columns; dates come as ISO strings. A new row must
+    carry every required column. Raises ValueError naming the bad field.
+    """
+    if not isinstance(fields, dict):
+        raise ValueError("fields must be an object")
+    values = {}
+    for name, value in fields.items():
+        column = table.columns.get(name)
+        if column is None or name in SERVER_COLUMNS:
+            raise ValueError(f"unknown field {name}")
+        if value is None:
+            if not column.nullable:
+                raise ValueError(f"{name} is required")
+            values[name] = None
+            continue
+        try:
+            values[name] = _decode_value(column, value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(str(e) if str(e).startswith(name) else f"{name}: {e}") from None
+    if new:
+        missing = [c.name for c in table.columns if c.name not in SERVER_COLUMNS and not c.nullable
+                   and c.default is None and c.name not in values]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+    return values
@@ -0,0 +1,51 @@
+import hashlib
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Adds a ``{% cache name, key, ... [, ttl=seconds] %}...{% endcache %}``
+    block. The rendered body is stored under the name and the keys, which
+    should be data versions for everything the body shows; a later render
+    with the same keys returns the stored HTML without evaluating the body.
+    The backend is ``environment.fragment_cache`` (anything with get/set);
+    ``environment.fragment_cache_prefix`` separates deployments.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None, fragment_cache_prefix='')
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args, kwargs = [], []
+        while parser.stream.current.type != 'block_end':
+            if args or kwargs:
+                parser.stream.expect('comma')
+            if parser.stream.current.type == 'name' and parser.stream.look().type == 'assign':
+                key = parser.stream.current.value
+                parser.stream.skip(2)
+                kwargs.append(nodes.Keyword(key, parser.parse_expression()))
+            else:
+                args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_cache_support', [nodes.List(args)], kwargs)
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _cache_support(self, keys, caller, ttl=None):
+        backend = self.environment.fragment_cache
+        if backend is None or not keys:
+            return caller()
+        name, parts = keys[0], keys[1:]
+        digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+        key = f"fragment:{self.environment.fragment_cache_prefix}:{name}:{digest}"
+        html = backend.get(key)
+        if html is None:
+            html = str(caller())
+            backend.set(key, html, ttl)
+        return Markup(html)
@@ -0,0 +1,190 @@
+import difflib
+import math
+import re
+
+import numpy as np
+
+# Offline gazetteer of Maharashtra district headquarters and major taluka /
+# market towns: (name, district, latitude, longitude). Coordinates are town
+# centres, which is as precise as a free-text listing location gets.
+PLACES = [
+    # Konkan
+    ('Mumbai', 'Mumbai', 19.0760, 72.8777), ('Navi Mumbai', 'Thane', 19.0330, 73.0297),
+    ('Thane', 'Thane', 19.2183, 72.9781), ('Kalyan', 'Thane', 19.2437, 73.1355),
+    ('Bhiwandi', 'Thane', 19.2967, 73.0631), ('Palghar', 'Palghar', 19.6967, 72.7699),
+    ('Vasai', 'Palghar', 19.4700, 72.8000), ('Dahanu', 'Palghar', 19.9700, 72.7300),
+    ('Alibag', 'Raigad', 18.6414, 72.8722), ('Panvel', 'Raigad', 18.9894, 73.1175),
+    ('Pen', 'Raigad', 18.7400, 73.1000), ('Mahad', 'Raigad', 18.0800, 73.4200),
+    ('Ratnagiri', 'Ratnagiri', 16.9902, 73.3120), ('Chiplun', 'Ratnagiri', 17.5300, 73.5200),
+    ('Dapoli', 'Ratnagiri', 17.7600, 73.1900), ('Kudal', 'Sindhudurg', 16.0104, 73.6837),
+    ('Kankavli', 'Sindhudurg', 16.2700, 73.7100), ('Sawantwadi', 'Sindhudurg', 15.9000, 73.8200),
+    ('Vengurla', 'Sindhudurg', 15.8600, 73.6300),
+    # Western Maharashtra
+    ('Pune', 'Pune', 18.5204, 73.8567), ('Baramati', 'Pune', 18.1515, 74.5815),
+    ('Junnar', 'Pune', 19.2000, 73.8800), ('Narayangaon', 'Pune', 19.1200, 73.9700),
+    ('Manchar', 'Pune', 19.0000, 73.9400), ('Shirur', 'Pune', 18.8300, 74.3700),
+    ('Daund', 'Pune', 18.4600, 74.5800), ('Indapur', 'Pune', 18.1200, 75.0200),
+    ('Satara', 'Satara', 17.6805, 74.0183), ('Karad', 'Satara', 17.2890, 74.1818),
+    ('Phaltan', 'Satara', 17.9900, 74.4300), ('Wai', 'Satara', 17.9500, 73.8900),
+    ('Koregaon', 'Satara', 17.7000, 74.1600), ('Sangli', 'Sangli', 16.8524, 74.5815),
+    ('Miraj', 'Sangli', 16.8300, 74.6400), ('Tasgaon', 'Sangli', 17.0400, 74.6000),
+    ('Islampur', 'Sangli', 17.0500, 74.2700), ('Jath', 'Sangli', 17.0500, 75.2200),
+    ('Kolhapur', 'Kolhapur', 16.7050, 74.2433), ('Ichalkaranji', 'Kolhapur', 16.6900, 74.4600),
+    ('Kagal', 'Kolhapur', 16.5800, 74.3200), ('Gadhinglaj', 'Kolhapur', 16.2200, 74.3500),
+    ('Solapur', 'Solapur', 17.6599, 75.9064), ('Pandharpur', 'Solapur', 17.6800, 75.3300),
+    ('Barshi', 'Solapur', 18.2300, 75.6900), ('Akluj', 'Solapur', 17.8800, 75.0200),
+    ('Mangalwedha', 'Solapur', 17.5200, 75.4700), ('Akkalkot', 'Solapur', 17.5200, 76.2000),
+    # North Maharashtra
+    ('Nashik', 'Nashik', 19.9975, 73.7898), ('Niphad', 'Nashik', 20.0800, 74.1100),
+    ('Lasalgaon', 'Nashik', 20.1500, 74.2300), ('Pimpalgaon Baswant', 'Nashik', 20.1700, 73.9900),
+    ('Malegaon', 'Nashik', 20.5579, 74.5287), ('Sinnar', 'Nashik', 19.8500, 74.0000),
+    ('Yeola', 'Nashik', 20.0400, 74.4900), ('Manmad', 'Nashik', 20.2500, 74.4400),
+    ('Igatpuri', 'Nashik', 19.7000, 73.5600), ('Dindori', 'Nashik', 20.2000, 73.8300),
+    ('Chandwad', 'Nashik', 20.3300, 74.2500), ('Satana', 'Nashik', 20.6000, 74.2000),
+    ('Ahilyanagar', 'Ahilyanagar', 19.0948, 74.7480), ('Sangamner', 'Ahilyanagar', 19.5700, 74.2100),
+    ('Shrirampur', 'Ahilyanagar', 19.6200, 74.6600), ('Kopargaon', 'Ahilyanagar', 19.8800, 74.4800),
+    ('Rahuri', 'Ahilyanagar', 19.3900, 74.6500), ('Rahata', 'Ahilyanagar', 19.7100, 74.4800),
+    ('Shevgaon', 'Ahilyanagar', 19.3500, 75.2200), ('Dhule', 'Dhule', 20.9042, 74.7749),
+    ('Shirpur', 'Dhule', 21.3500, 74.8800), ('Sakri', 'Dhule', 20.9900, 74.3100),
+    ('Nandurbar', 'Nandurbar', 21.3700, 74.2400), ('Shahada', 'Nandurbar', 21.5500, 74.4700),
+    ('Navapur', 'Nandurbar', 21.1700, 73.7800), ('Jalgaon', 'Jalgaon', 21.0077, 75.5626),
+    ('Bhusawal', 'Jalgaon', 21.0400, 75.7900), ('Chopda', 'Jalgaon', 21.2500, 75.3000),
+    ('Raver', 'Jalgaon', 21.2400, 76.0300), ('Amalner', 'Jalgaon', 21.0400, 75.0600),
+    ('Pachora', 'Jalgaon', 20.6600, 75.3500), ('Chalisgaon', 'Jalgaon', 20.4600, 75.0100),
+    # Marathwada
+    ('Chhatrapati Sambhajinagar', 'Chhatrapati Sambhajinagar', 19.8762, 75.3433),
+    ('Vaijapur', 'Chhatrapati Sambhajinagar', 19.9200, 74.7300),
+    ('Paithan', 'Chhatrapati Sambhajinagar', 19.4800, 75.3800),
+    ('Kannad', 'Chhatrapati Sambhajinagar', 20.2600, 75.1400),
+    ('Sillod', 'Chhatrapati Sambhajinagar', 20.3000, 75.6500),
+    ('Gangapur', 'Chhatrapati Sambhajinagar', 19.7000, 75.0100),
+    ('Jalna', 'Jalna', 19.8347, 75.8816), ('Beed', 'Beed', 18.9891, 75.7601),
+    ('Ambajogai', 'Beed', 18.7300, 76.3800), ('Majalgaon', 'Beed', 19.1500, 76.2100),
+    ('Latur', 'Latur', 18.4088, 76.5604), ('Udgir', 'Latur', 18.3900, 77.1200),
+    ('Ausa', 'Latur', 18.2500, 76.5000), ('Nilanga', 'Latur', 18.1200, 76.7500),
+    ('Dharashiv', 'Dharashiv', 18.1860, 76.0419), ('Tuljapur', 'Dharashiv', 18.0100, 76.0700),
+    ('Nanded', 'Nanded', 19.1383, 77.3210), ('Kinwat', 'Nanded', 19.6300, 78.2000),
+    ('Deglur', 'Nanded', 18.5500, 77.5800), ('Mukhed', 'Nanded', 18.7000, 77.3700),
+    ('Parbhani', 'Parbhani', 19.2608, 76.7748), ('Gangakhed', 'Parbhani', 18.9700, 76.7500),
+    ('Sailu', 'Parbhani', 19.4700, 76.4500), ('Hingoli', 'Hingoli', 19.7173, 77.1494),
+    ('Basmat', 'Hingoli', 19.3200, 77.1700),
+    # Vidarbha
+    ('Akola', 'Akola', 20.7002, 77.0082), ('Murtizapur', 'Akola', 20.7300, 77.3700),
+    ('Amravati', 'Amravati', 20.9374, 77.7796), ('Achalpur', 'Amravati', 21.2600, 77.5100),
+    ('Daryapur', 'Amravati', 20.9300, 77.3300), ('Morshi', 'Amravati', 21.3400, 78.0100),
+    ('Warud', 'Amravati', 21.4700, 78.2700), ('Buldhana', 'Buldhana', 20.5293, 76.1842),
+    ('Khamgaon', 'Buldhana', 20.7100, 76.5700), ('Malkapur', 'Buldhana', 20.8800, 76.2000),
+    ('Chikhli', 'Buldhana', 20.3500, 76.2500), ('Mehkar', 'Buldhana', 20.1500, 76.5700),
+    ('Washim', 'Washim', 20.1120, 77.1330), ('Karanja', 'Washim', 20.4800, 77.4800),
+    ('Yavatmal', 'Yavatmal', 20.3899, 78.1307), ('Pusad', 'Yavatmal', 19.9100, 77.5700),
+    ('Wani', 'Yavatmal', 20.0600, 78.9500), ('Darwha', 'Yavatmal', 20.3100, 77.7700),
+    ('Nagpur', 'Nagpur', 21.1458, 79.0882), ('Katol', 'Nagpur', 21.2700, 78.5800),
+    ('Ramtek', 'Nagpur', 21.4000, 79.3300), ('Umred', 'Nagpur', 20.8500, 79.3300),
+    ('Kamptee', 'Nagpur', 21.2200, 79.2000), ('Saoner', 'Nagpur', 21.3800, 78.9200),
+    ('Wardha', 'Wardha', 20.7453, 78.6022), ('Hinganghat', 'Wardha', 20.5500, 78.8400),
+    ('Arvi', 'Wardha', 20.9900, 78.2300), ('Bhandara', 'Bhandara', 21.1669, 79.6500),
+    ('Tumsar', 'Bhandara', 21.3800, 79.7400), ('Gondia', 'Gondia', 21.4624, 80.1920),
+    ('Tirora', 'Gondia', 21.4100, 79.9300), ('Chandrapur', 'Chandrapur', 19.9615, 79.2961),
+    ('Ballarpur', 'Chandrapur', 19.8500, 79.3500), ('Warora', 'Chandrapur', 20.2300, 79.0000),
+    ('Brahmapuri', 'Chandrapur', 20.6100, 79.8600), ('Gadchiroli', 'Gadchiroli', 20.1809, 80.0000),
+    ('Armori', 'Gadchiroli', 20.4700, 79.9800),
+]
+
+# Older and common alternative spellings.
+ALIASES = {
+    'bombay': 'Mumbai', 'poona': 'Pune', 'nasik': 'Nashik', 'ahmednagar': 'Ahilyanagar',
+    'nagar': 'Ahilyanagar', 'aurangabad': 'Chhatrapati Sambhajinagar', 'sambhajinagar': 'Chhatrapati Sambhajinagar',
+    'osmanabad': 'Dharashiv', 'new mumbai': 'Navi Mumbai', 'alibaug': 'Alibag', 'baglan': 'Satana',
+    'sindhudurg': 'Kudal', 'raigad': 'Alibag', 'vasmat': 'Basmat', 'pimpalgaon': 'Pimpalgaon Baswant',
+}
+
+EARTH_RADIUS_KM = 6371.0
+
+# Fixed lat/lon grid used as the listing spatial index. A 0.1 degree cell is
+# about 11 km, so a 50 km search walks five or six rings of cells.
+CELL_DEGREES = 0.1
+_COLS_PER_ROW = int(round(360 / CELL_DEGREES))
+
+_BY_KEY = {}
+for _name, _district, _lat, _lon in PLACES:
+    _BY_KEY[_name.lower()] = (_name, _district, _lat, _lon)
+for _alias, _name in ALIASES.items():
+    _BY_KEY[_alias] = _BY_KEY[_name.lower()]
+
+_CLEAN_RE = re.compile(r"[^a-z ]+")
+_SUFFIX_RE = re.compile(r" (taluka|tal|district|dist|city)$")
+
+
+def _clean(text):
+    return ' '.join(_CLEAN_RE.sub(' ', (text or '').lower()).split())
+
+
+def resolve_location(text):
+    """
+    Matches a free-text location to the gazetteer. Tries each comma-separated
+    part ('Niphad, Nashik' -> Niphad), then a close spelling match.
+    Returns {'name', 'district', 'lat', 'lon'} or None.
+    """
+    parts = [_clean(p) for p in (text or '').split(',')]
+    parts = [p for p in parts if p]
+    for part in parts:
+        place = _BY_KEY.get(part) or _BY_KEY.get(_SUFFIX_RE.sub('', part))
+        if place:
+            break
+    else:
+        place = None
+        for part in parts:
+            close = difflib.get_close_matches(part, _BY_KEY.keys(), n=1, cutoff=0.85)
+            if close:
+                place = _BY_KEY[close[0]]
+                break
+    if not place:
+        return None
+    name, district, lat, lon = place
+    return {'name': name, 'district': district, 'lat': lat, 'lon': lon}
+
+
+def cell_for(lat, lon):
+    """Grid cell id for a coordinate; stored on each listing and indexed."""
+    row = int(math.floor((lat + 90) / CELL_DEGREES))
+    col = int(math.floor((lon + 180) / CELL_DEGREES))
+    return row * _COLS_PER_ROW + col
+
+
+def cell_rings(lat, lon, radius_km):
+    """
+    Yields (cell_ids, min_km) for square rings of grid cells around a point,
+    innermost first, out to radius_km. min_km is a lower bound on the
+    distance from the point to anything in that ring, so a nearest-first
+    search can stop as soon as it has enough closer hits.
+    """
+    row0 = int(math.floor((lat + 90) / CELL_DEGREES))
+    col0 = int(math.floor((lon + 180) / CELL_DEGREES))
+    # Rings are clipped to the search circle's bounding box and end once they span it.
+    lat_span = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lon_span = min(lat_span / math.cos(math.radians(min(abs(lat) + lat_span, 89.9))), 180)
+    row_reach = int(math.ceil(lat_span / CELL_DEGREES))
+    col_reach = int(math.ceil(lon_span / CELL_DEGREES))
+    for k in range(max(row_reach, col_reach) + 1):
+        # A ring-k cell is k - 1 whole cells away along its row or column; columns
+        # narrow poleward, so take their width at the ring's far edge, not the point's.
+        edge_lat = min(abs(lat) + (k + 1) * CELL_DEGREES, 89.9)
+        cell_km = math.radians(CELL_DEGREES) * EARTH_RADIUS_KM * math.cos(math.radians(edge_lat))
+        min_km = max(k - 1, 0) * cell_km
+        if min_km > radius_km:
+            return
+        rows = range(-min(k, row_reach), min(k, row_reach) + 1)
+        edge_cols = {(col0 + dc) % _COLS_PER_ROW for dc in (-k, k)} if k <= col_reach else set()
+        cells = [(row0 + dr, col) for dr in rows for col in edge_cols]
+        if k <= row_reach:
+            cols = range(-min(k - 1, col_reach), min(k - 1, col_reach) + 1)
+            cells += [(row0 + dr, (col0 + dc) % _COLS_PER_ROW) for dr in {-k, k} for dc in cols]
+        yield [row * _COLS_PER_ROW + col for row, col in cells], min_km
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance from one point to arrays of points, in km."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
@@ -0,0 +1,43 @@
+# Production serving for Kisan Mitra: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The app is imported once in the master (preload_app) and workers are forked
+# from it. `kill -HUP <master>` restarts the workers gracefully but keeps the
+# preloaded code; to deploy new code without dropping requests send USR2
+# (start a new master alongside) and then QUIT to the old master.
+
+import multiprocessing
+import os
+
+# Tells the app it shares its database with sibling workers (see config.MULTIPROCESS).
+os.environ.setdefault('KISAN_MULTIPROCESS', '1')
+os.environ.setdefault('KISAN_DEBUG', 'false')
+# Fragment, AI and price caches live here so workers don't each warm their own copy.
+os.environ.setdefault('SHARED_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'shared_cache.sqlite3'))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Threaded workers, so open listing feed (SSE) streams don't each pin a whole process.
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 8))
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then to bound memory growth; jitter keeps them from restarting together.
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    # Connections opened by the master during preload must not be shared by the forked workers.
+    # close=False drops the child's references without closing them, which would disturb the master's copies.
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Stop counting this worker's published metrics in /metrics once it is gone.
+    from app import retire_worker_metrics
+    retire_worker_metrics()
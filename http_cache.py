@@ -0,0 +1,47 @@
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = {'text/html', 'text/css', 'text/plain', 'text/csv', 'application/json', 'application/javascript'}
+# Below this many bytes the encoding overhead outweighs the saving.
+MIN_COMPRESS_BYTES = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def data_etag(*parts):
+    """Validator for a response built from the given data versions and request details."""
+    return hashlib.sha1('\x1f'.join(str(p) for p in parts).encode()).hexdigest()[:20]
+
+
+def preferred_encoding(accept_encoding):
+    """'br' or 'gzip' if the client accepts it (brotli only when the module is installed), else None."""
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    return 'gzip' if accept_encoding['gzip'] else None
+
+
+def compress_response(response, accept_encoding):
+    """
+    Compresses a buffered text response in place for clients that accept it.
+    Streams, files, errors and already-encoded or small bodies pass through.
+    """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = preferred_encoding(accept_encoding)
+    body = response.get_data()
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return response
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
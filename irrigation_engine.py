@@ -0,0 +1,225 @@
+import numpy as np
+
+from yield_model import SOIL_PATTERNS, IRRIGATION_PATTERNS, match_category
+
+LITRES_PER_MM_ACRE = 4046.86
+DEFAULT_LATITUDE = 19.0  # central Maharashtra
+DEFAULT_ELEVATION = 550
+
+# FAO-56 Tables 11, 12 and 22: Kc (initial, mid, end), stage lengths in days
+# (initial, development, mid, late), maximum root depth (m) and the fraction p
+# of available water the crop can use before stress.
+CROP_PARAMS = {
+    'soybean': ((0.4, 1.15, 0.5), (20, 30, 60, 25), 1.0, 0.5),
+    'cotton': ((0.35, 1.175, 0.6), (30, 50, 60, 55), 1.3, 0.65),
+    'moong': ((0.4, 1.05, 0.35), (20, 30, 30, 20), 0.8, 0.45),
+    'urad': ((0.4, 1.05, 0.35), (20, 30, 30, 20), 0.8, 0.45),
+    'tur': ((0.4, 1.15, 0.35), (30, 40, 80, 30), 1.0, 0.5),
+    'gram': ((0.4, 1.0, 0.35), (20, 30, 40, 20), 0.8, 0.5),
+    'wheat': ((0.3, 1.15, 0.25), (15, 25, 50, 30), 1.2, 0.55),
+    'jowar': ((0.3, 1.05, 0.55), (20, 35, 40, 30), 1.2, 0.55),
+    'bajra': ((0.3, 1.0, 0.3), (15, 25, 40, 25), 1.2, 0.55),
+    'maize': ((0.3, 1.2, 0.35), (20, 35, 40, 30), 1.2, 0.55),
+    'rice': ((1.05, 1.2, 0.9), (30, 30, 60, 30), 0.6, 0.2),
+    'groundnut': ((0.4, 1.15, 0.6), (25, 35, 45, 25), 0.7, 0.5),
+    'sugarcane': ((0.4, 1.25, 0.75), (35, 60, 190, 120), 1.5, 0.65),
+    'onion': ((0.7, 1.05, 0.75), (15, 25, 70, 40), 0.45, 0.3),
+    'tomato': ((0.6, 1.15, 0.8), (30, 40, 40, 25), 1.0, 0.4),
+}
+DEFAULT_CROP = ((0.5, 1.1, 0.6), (25, 35, 50, 25), 1.0, 0.5)
+MIN_ROOT_DEPTH = 0.15
+
+# Volumetric water content at field capacity and wilting point (FAO-56 Table 19).
+SOIL_WATER = {
+    'black': (0.42, 0.24), 'clay': (0.36, 0.22), 'alluvial': (0.30, 0.12), 'loamy': (0.29, 0.12),
+    'red': (0.20, 0.09), 'laterite': (0.22, 0.12), 'sandy': (0.12, 0.05),
+}
+DEFAULT_SOIL = 'loamy'
+
+# Share of applied water that reaches the root zone.
+APPLICATION_EFFICIENCY = {'drip': 0.9, 'sprinkler': 0.75, 'canal': 0.6, 'borewell': 0.6, 'rainfed': 0.6}
+# Largest net depth (mm) a method sensibly applies at once; drip waters little and often.
+MAX_APPLICATION_MM = {'drip': 15, 'sprinkler': 40, 'canal': 75, 'borewell': 75, 'rainfed': 75}
+
+# Where in the season each growth stage from the UI sits, as (stage index, fraction through it).
+GROWTH_STAGES = {
+    'seedling': (0, 0.5), 'vegetative': (1, 0.5), 'flowering': (2, 0.0), 'fruiting': (2, 0.5), 'maturity': (3, 0.5),
+}
+
+# Typical daily weather for the conditions offered in the UI.
+WEATHER_PRESETS = {
+    'sunny': {'tmax': 33, 'tmin': 21, 'rh_mean': 55, 'wind': 2.0, 'sunshine_ratio': 0.8, 'rain': 0},
+    'cloudy': {'tmax': 29, 'tmin': 22, 'rh_mean': 75, 'wind': 2.0, 'sunshine_ratio': 0.35, 'rain': 0},
+    'rainy': {'tmax': 27, 'tmin': 22, 'rh_mean': 88, 'wind': 3.0, 'sunshine_ratio': 0.15, 'rain': 15},
+    'hot and dry': {'tmax': 39, 'tmin': 24, 'rh_mean': 30, 'wind': 3.0, 'sunshine_ratio': 0.9, 'rain': 0},
+}
+WEATHER_FIELDS = ('tmax', 'tmin', 'rh_mean', 'wind', 'sunshine_ratio', 'rain')
+
+
+def reference_et0(tmax, tmin, rh_mean, wind, sunshine_ratio, day_of_year, latitude=DEFAULT_LATITUDE,
+                  elevation=DEFAULT_ELEVATION, solar=None):
+    """
+    FAO-56 Penman-Monteith grass reference evapotranspiration (mm/day).
+    All inputs broadcast, so one call covers any (fields x days) grid. Solar
+    radiation (MJ/m2/day) is estimated from the sunshine ratio n/N unless given.
+    """
+    tmax, tmin = np.asarray(tmax, dtype=float), np.asarray(tmin, dtype=float)
+    tmean = (tmax + tmin) / 2
+    pressure = 101.3 * ((293 - 0.0065 * elevation) / 293) ** 5.26
+    gamma = 0.000665 * pressure
+
+    def saturation(t):
+        return 0.6108 * np.exp(17.27 * t / (t + 237.3))
+
+    es = (saturation(tmax) + saturation(tmin)) / 2
+    ea = np.asarray(rh_mean, dtype=float) / 100 * es
+    delta = 4098 * saturation(tmean) / (tmean + 237.3) ** 2
+
+    phi = np.radians(latitude)
+    angle = 2 * np.pi * np.asarray(day_of_year) / 365
+    dr = 1 + 0.033 * np.cos(angle)
+    declination = 0.409 * np.sin(angle - 1.39)
+    omega = np.arccos(np.clip(-np.tan(phi) * np.tan(declination), -1, 1))
+    ra = 24 * 60 / np.pi * 0.0820 * dr * (
+        omega * np.sin(phi) * np.sin(declination) + np.cos(phi) * np.cos(declination) * np.sin(omega))
+    rs = (0.25 + 0.5 * np.asarray(sunshine_ratio, dtype=float)) * ra if solar is None else np.asarray(solar, dtype=float)
+    rso = (0.75 + 2e-5 * elevation) * ra
+    rnl = 4.903e-9 * ((tmax + 273.16) ** 4 + (tmin + 273.16) ** 4) / 2 \
+        * (0.34 - 0.14 * np.sqrt(ea)) * (1.35 * np.minimum(rs / rso, 1.0) - 0.35)
+    rn = 0.77 * rs - rnl
+
+    wind = np.asarray(wind, dtype=float)
+    et0 = (0.408 * delta * rn + gamma * 900 / (tmean + 273) * wind * (es - ea)) / (delta + gamma * (1 + 0.34 * wind))
+    return np.maximum(et0, 0)
+
+
+def crop_coefficients(kc, lengths, days_after_sowing):
+    """FAO-56 Kc curve: flat initial, linear rise, flat mid-season, linear decline. Per-field rows."""
+    kc_ini, kc_mid, kc_end = (kc[:, i, None] for i in range(3))
+    l_ini, l_dev, l_mid, l_late = (lengths[:, i, None] for i in range(4))
+    das = days_after_sowing
+    rising = kc_ini + (das - l_ini) / l_dev * (kc_mid - kc_ini)
+    falling = kc_mid + (das - l_ini - l_dev - l_mid) / l_late * (kc_end - kc_mid)
+    return np.select(
+        [das < l_ini, das < l_ini + l_dev, das < l_ini + l_dev + l_mid, das < l_ini + l_dev + l_mid + l_late],
+        [np.broadcast_to(kc_ini, das.shape), rising, np.broadcast_to(kc_mid, das.shape), falling],
+        default=np.broadcast_to(kc_end, das.shape),
+    )
+
+
+def effective_rain(rain):
+    """Rain reaching the root zone: light showers are lost to the canopy, 80% of the rest counts."""
+    return 0.8 * np.maximum(np.asarray(rain, dtype=float) - 5, 0)
+
+
+def application_efficiency(method):
+    return APPLICATION_EFFICIENCY[match_category(method, IRRIGATION_PATTERNS) or 'rainfed']
+
+
+def field_parameters(crops, soils, methods):
+    """Per-field FAO-56 parameter arrays from crop, soil and irrigation method names."""
+    params = [CROP_PARAMS.get((c or '').strip().lower(), DEFAULT_CROP) for c in crops]
+    water = [SOIL_WATER[match_category(s, SOIL_PATTERNS) or DEFAULT_SOIL] for s in soils]
+    methods = [match_category(m, IRRIGATION_PATTERNS) or 'rainfed' for m in methods]
+    return {
+        'kc': np.array([p[0] for p in params], dtype=float),
+        'lengths': np.array([p[1] for p in params], dtype=float),
+        'root_depth': np.array([p[2] for p in params], dtype=float),
+        'p': np.array([p[3] for p in params], dtype=float),
+        'field_capacity': np.array([fc for fc, _ in water], dtype=float),
+        'available_water': np.array([fc - wp for fc, wp in water], dtype=float),
+        'efficiency': np.array([APPLICATION_EFFICIENCY[m] for m in methods], dtype=float),
+        'max_application': np.array([MAX_APPLICATION_MM[m] for m in methods], dtype=float),
+    }
+
+
+def stage_start_day(lengths, stages):
+    """Days after sowing at which each field's reported growth stage sits."""
+    starts = np.concatenate([np.zeros((len(lengths), 1)), np.cumsum(lengths, axis=1)[:, :-1]], axis=1)
+    result = np.empty(len(lengths))
+    for i, stage in enumerate(stages):
+        index, fraction = GROWTH_STAGES.get((stage or '').strip().lower(), (1, 0.5))
+        result[i] = starts[i, index] + fraction * lengths[i, index]
+    return result
+
+
+def irrigation_schedule(crops, soils, methods, weather, start_day_of_year, days_after_sowing=None,
+                        growth_stages=None, soil_moisture=None, days=30, latitude=DEFAULT_LATITUDE,
+                        elevation=DEFAULT_ELEVATION):
+    """
+    Daily soil water balance (FAO-56 ch. 8) for many fields at once.
+
+    Each field's position in its season comes from `days_after_sowing`, or
+    where that is None, from its reported growth stage. `weather` maps each of
+    WEATHER_FIELDS to a scalar, a (days,) forecast or a (fields x days) grid.
+    Fields start from their measured volumetric `soil_moisture` (m3/m3, NaN
+    when unknown) or else at field capacity, and are refilled whenever root-zone
+    depletion reaches the readily available water, or the most the
+    irrigation method applies at once if that is less. Returns (fields x days)
+    arrays of ET0, ETc and net/gross irrigation in mm.
+    """
+    n = len(crops)
+    fp = field_parameters(crops, soils, methods)
+    start = stage_start_day(fp['lengths'], growth_stages or [None] * n)
+    for i, sown in enumerate(days_after_sowing or []):
+        if sown is not None:
+            start[i] = float(sown)
+    das = start[:, None] + np.arange(days)[None, :]
+    grid = (n, days)
+    w = {k: np.broadcast_to(np.asarray(weather[k], dtype=float), grid) for k in WEATHER_FIELDS}
+
+    day_of_year = (start_day_of_year - 1 + np.arange(days)) % 365 + 1
+    et0 = reference_et0(w['tmax'], w['tmin'], w['rh_mean'], w['wind'], w['sunshine_ratio'],
+                        day_of_year[None, :], latitude, elevation)
+    etc = crop_coefficients(fp['kc'], fp['lengths'], das) * et0
+    rain = effective_rain(w['rain'])
+
+    # Roots grow from MIN_ROOT_DEPTH to full depth by the start of mid-season.
+    growth = np.clip(das / (fp['lengths'][:, :1] + fp['lengths'][:, 1:2]), 0, 1)
+    root_depth = MIN_ROOT_DEPTH + (fp['root_depth'][:, None] - MIN_ROOT_DEPTH) * growth
+    readily_available = 1000 * fp['available_water'][:, None] * root_depth * fp['p'][:, None]
+    trigger = np.minimum(readily_available, fp['max_application'][:, None])
+
+    net = np.zeros(grid)
+    depletion = np.zeros(n)
+    if soil_moisture is not None:
+        measured = 1000 * (fp['field_capacity'] - np.asarray(soil_moisture, dtype=float)) * root_depth[:, 0]
+        depletion = np.nan_to_num(np.maximum(measured, 0))
+    for t in range(days):
+        depletion = np.maximum(depletion + etc[:, t] - rain[:, t], 0)
+        due = depletion >= trigger[:, t]
+        # A large measured deficit is worked off over several events, not one flood.
+        applied = np.minimum(depletion[due], fp['max_application'][due])
+        net[due, t] = applied
+        depletion[due] -= applied
+    return {
+        'et0': et0, 'etc': etc,
+        'net_irrigation': net,
+        'gross_irrigation': net / fp['efficiency'][:, None],
+        'readily_available': readily_available,
+    }
+
+
+def weather_inputs(weather):
+    """Daily weather from a UI preset name, a dict of values, or a list of daily dicts."""
+    if isinstance(weather, list):
+        days = [weather_inputs(day) for day in weather]
+        return {k: np.array([d[k] for d in days], dtype=float) for k in WEATHER_FIELDS}
+    if isinstance(weather, dict):
+        base = WEATHER_PRESETS['sunny']
+        return {k: float(weather.get(k, base[k])) for k in WEATHER_FIELDS}
+    return dict(WEATHER_PRESETS.get((weather or 'sunny').strip().lower(), WEATHER_PRESETS['sunny']))
+
+
+def summarize(gross_mm):
+    """Per-field events, litres per acre per irrigation and average interval from a gross schedule row."""
+    event_days = np.flatnonzero(gross_mm > 0)
+    if not len(event_days):
+        return {'events': [], 'litres_per_acre': 0, 'interval_days': None}
+    interval = float(np.diff(event_days).mean()) if len(event_days) > 1 else None
+    return {
+        'events': [{'day': int(d), 'depth_mm': round(float(gross_mm[d]), 1),
+                    'litres_per_acre': int(gross_mm[d] * LITRES_PER_MM_ACRE)} for d in event_days],
+        'litres_per_acre': int(gross_mm[event_days].mean() * LITRES_PER_MM_ACRE),
+        'interval_days': round(interval, 1) if interval else None,
+    }
@@ -0,0 +1,80 @@
+import json
+import queue
+import threading
+
+
+class Subscription:
+    """One connected client: its filter and a bounded queue of pending events."""
+
+    def __init__(self, crop=None, location=None, max_pending=100, max_price=None):
+        self.crop = (crop or '').strip().lower()
+        self.location = (location or '').strip().lower()
+        self.max_price = max_price
+        self.events = queue.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def matches(self, listing):
+        if self.crop and self.crop not in (listing.get('crop_type') or '').lower():
+            return False
+        if self.location and self.location not in (listing.get('location') or '').lower():
+            return False
+        if self.max_price is not None and (listing.get('expected_price') or 0) > self.max_price:
+            return False
+        return True
+
+
+class ListingFeed:
+    """
+    In-process pub/sub for new and removed Mandi listings.
+
+    Publishing never blocks: a client whose queue is full is marked as
+    overflowed and told to reload once, instead of slowing down the write path.
+    """
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, crop=None, location=None, max_price=None):
+        subscription = Subscription(crop, location, self.max_pending, max_price)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event, listing):
+        """Queues `event` ('created' or 'deleted') for every subscriber whose filter matches."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription.matches(listing):
+                continue
+            try:
+                subscription.events.put_nowait((event, listing))
+            except queue.Full:
+                subscription.overflowed = True
+
+    def stream(self, subscription, heartbeat_seconds=15):
+        """Yields Server-Sent Events for a subscription until the client disconnects."""
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if subscription.overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                try:
+                    event, listing = subscription.events.get(timeout=heartbeat_seconds)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(listing)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,91 @@
+import re
+
+from sqlalchemy import text
+
+# External-content FTS5 index over the produce table. SQLite keeps it in sync
+# through triggers, so the write paths in app.py do not need to know about it.
+FTS_TABLE = 'produce_fts'
+FTS_COLUMNS = ('crop_type', 'location', 'description', 'farmer_name')
+# bm25 column weights, in FTS_COLUMNS order: a crop hit matters most.
+RANK_WEIGHTS = '4.0, 2.0, 1.0, 1.0'
+
+_COLS = ', '.join(FTS_COLUMNS)
+_NEW_COLS = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+_OLD_COLS = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+
+_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_COLS}, content='produce', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS produce_fts_ai AFTER INSERT ON produce BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_COLS}) VALUES (new.id, {_NEW_COLS});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS produce_fts_ad AFTER DELETE ON produce BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLS}) VALUES ('delete', old.id, {_OLD_COLS});
+    END""",
+    # Only edits to indexed columns touch the index; order-book fills update quantity_filled alone.
+    # Dropped first so databases indexed before the column list was added get the narrower trigger.
+    "DROP TRIGGER IF EXISTS produce_fts_au",
+    f"""CREATE TRIGGER produce_fts_au AFTER UPDATE OF {_COLS} ON produce BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLS}) VALUES ('delete', old.id, {_OLD_COLS});
+        INSERT INTO {FTS_TABLE}(rowid, {_COLS}) VALUES (new.id, {_NEW_COLS});
+    END""",
+]
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_supported(engine):
+    return engine.dialect.name == 'sqlite'
+
+
+def ensure_search_index(engine):
+    """Creates the FTS index and its sync triggers, rebuilding it if it was just created."""
+    if not is_supported(engine):
+        return False
+    with engine.begin() as conn:
+        existed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+        ).first() is not None
+        for statement in _SCHEMA:
+            conn.execute(text(statement))
+        if not existed:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    return True
+
+
+def build_match_query(crop=None, location=None, keywords=None):
+    """
+    Turns the search form fields into an FTS5 MATCH expression. Every word is
+    a quoted prefix term, so 'soy nash' finds 'Soybean' listed in 'Nashik'.
+    Returns None when there is nothing to match on.
+    """
+    clauses = []
+    for column, value in (('crop_type', crop), ('location', location), (None, keywords)):
+        terms = _TERM_RE.findall(value or '')
+        if not terms:
+            continue
+        phrase = ' '.join(f'"{t}"*' for t in terms)
+        clauses.append(f'{column} : ({phrase})' if column else f'({phrase})')
+    return ' AND '.join(clauses) or None
+
+
+def search_listing_ids(engine, match, max_price=None, limit=100, window=1000):
+    """
+    Returns produce ids matching `match` within the price cap, best bm25 rank
+    first. Only the `window` newest matches are ranked, which keeps broad
+    queries ('on*' over a million listings) from scoring every hit.
+    """
+    price_filter = " AND p.expected_price <= :max_price" if max_price is not None else ""
+    sql = (
+        f"SELECT id FROM ("
+        f" SELECT p.id AS id, bm25({FTS_TABLE}, {RANK_WEIGHTS}) AS score"
+        f" FROM {FTS_TABLE} JOIN produce AS p ON p.id = {FTS_TABLE}.rowid"
+        f" WHERE {FTS_TABLE} MATCH :match{price_filter}"
+        f" ORDER BY {FTS_TABLE}.rowid DESC LIMIT :window"
+        f") ORDER BY score, id DESC LIMIT :limit"
+    )
+    params = {'match': match, 'max_price': max_price, 'window': window, 'limit': limit}
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text(sql), params)]
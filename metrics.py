@@ -0,0 +1,117 @@
+import bisect
+import threading
+
+# Histogram upper bounds; the +Inf bucket is implied.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Registry:
+    """
+    Counters, gauges and histograms in the Prometheus data model, kept as
+    plain dicts behind one lock so recording a request costs a few dict
+    updates. Metrics are declared once; samples are keyed by a tuple of
+    (label, value) pairs. `snapshot()` gives picklable state that can be
+    merged with other processes' snapshots and rendered as exposition text.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}  # name -> (type, help, buckets)
+        self._values = {}  # (name, labels) -> float, or per-bucket counts + [sum] for histograms
+
+    def counter(self, name, help):
+        self._meta[name] = ('counter', help, None)
+
+    def gauge(self, name, help):
+        self._meta[name] = ('gauge', help, None)
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ('histogram', help, tuple(buckets))
+
+    def inc(self, name, amount=1, labels=()):
+        with self._lock:
+            self._inc(name, amount, labels)
+
+    def set(self, name, value, labels=()):
+        with self._lock:
+            self._values[(name, labels)] = value
+
+    def observe(self, name, value, labels=()):
+        with self._lock:
+            self._observe(name, value, labels)
+
+    def record(self, increments=(), observations=()):
+        """Applies several (name, value, labels) increments and observations under one lock acquisition."""
+        with self._lock:
+            for name, amount, labels in increments:
+                self._inc(name, amount, labels)
+            for name, value, labels in observations:
+                self._observe(name, value, labels)
+
+    def _inc(self, name, amount, labels):
+        key = (name, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def _observe(self, name, value, labels):
+        key, buckets = (name, labels), self._meta[name][2]
+        counts = self._values.get(key)
+        if counts is None:
+            counts = self._values[key] = [0] * (len(buckets) + 2)
+        counts[bisect.bisect_left(buckets, value)] += 1
+        counts[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            values = {key: list(v) if isinstance(v, list) else v for key, v in self._values.items()}
+        return {'meta': dict(self._meta), 'values': values}
+
+
+def merge(snapshots):
+    """Sums snapshots from several processes; gauges add up too (in-flight requests across workers)."""
+    merged = {'meta': {}, 'values': {}}
+    for snap in snapshots:
+        merged['meta'].update(snap['meta'])
+        for key, value in snap['values'].items():
+            current = merged['values'].get(key)
+            if current is None:
+                merged['values'][key] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                merged['values'][key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged['values'][key] = current + value
+    return merged
+
+
+def _labels(pairs, extra=()):
+    pairs = tuple(pairs) + tuple(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render(snapshot):
+    """Prometheus text exposition format for a snapshot."""
+    by_name = {}
+    for (name, labels), value in snapshot['values'].items():
+        by_name.setdefault(name, []).append((labels, value))
+    lines = []
+    for name in sorted(by_name):
+        kind, help, buckets = snapshot['meta'][name]
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+            if kind != 'histogram':
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), value):
+                cumulative += count
+                le = bound if bound == '+Inf' else f"{bound:g}"
+                lines.append(f"{name}_bucket{_labels(labels, (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {value[-1]:g}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,141 @@
+import heapq
+import itertools
+import threading
+
+BUY = 'buy'
+SELL = 'sell'
+# Quantities are float quintals; anything smaller than this left after fills is rounding noise, not stock.
+QUANTITY_EPSILON = 1e-6
+
+
+class Order:
+    __slots__ = ('side', 'order_id', 'price', 'remaining', 'seq')
+
+    def __init__(self, side, order_id, price, quantity, seq):
+        self.side = side
+        self.order_id = order_id
+        self.price = price
+        self.remaining = quantity
+        self.seq = seq
+
+
+class OrderBook:
+    """
+    Limit order book for one crop at one mandi location.
+
+    Bids and asks sit in heaps keyed on (price, arrival) so the best order is
+    always at the top; cancelled or filled orders are dropped lazily when
+    they surface. Trades execute at the resting order's price.
+    """
+
+    def __init__(self):
+        self._bids = []  # (-price, seq, order_id)
+        self._asks = []  # (price, seq, order_id)
+        self._orders = {BUY: {}, SELL: {}}
+        self._levels = {BUY: {}, SELL: {}}  # price -> resting quantity
+
+    def __len__(self):
+        return len(self._orders[BUY]) + len(self._orders[SELL])
+
+    def _best(self, side):
+        heap = self._bids if side == BUY else self._asks
+        live = self._orders[side]
+        while heap:
+            order = live.get(heap[0][2])
+            if order is not None and order.seq == heap[0][1]:
+                return order
+            heapq.heappop(heap)
+        return None
+
+    def _adjust_level(self, side, price, delta):
+        levels = self._levels[side]
+        total = levels.get(price, 0) + delta
+        if total > QUANTITY_EPSILON:
+            levels[price] = total
+        else:
+            levels.pop(price, None)
+
+    def _rest(self, order):
+        self._orders[order.side][order.order_id] = order
+        self._adjust_level(order.side, order.price, order.remaining)
+        if order.side == BUY:
+            heapq.heappush(self._bids, (-order.price, order.seq, order.order_id))
+        else:
+            heapq.heappush(self._asks, (order.price, order.seq, order.order_id))
+
+    def submit(self, order):
+        """Matches an incoming order against the opposite side, rests any remainder, returns fills."""
+        opposite = SELL if order.side == BUY else BUY
+        fills = []
+        while order.remaining > QUANTITY_EPSILON:
+            best = self._best(opposite)
+            if best is None:
+                break
+            if (order.side == BUY and best.price > order.price) or (order.side == SELL and best.price < order.price):
+                break
+            quantity = min(order.remaining, best.remaining)
+            order.remaining -= quantity
+            best.remaining -= quantity
+            self._adjust_level(opposite, best.price, -quantity)
+            buy, sell = (order, best) if order.side == BUY else (best, order)
+            fills.append({'buy_id': buy.order_id, 'sell_id': sell.order_id, 'quantity': quantity, 'price': best.price})
+            if best.remaining <= QUANTITY_EPSILON:
+                del self._orders[opposite][best.order_id]
+        if order.remaining > QUANTITY_EPSILON:
+            self._rest(order)
+        return fills
+
+    def cancel(self, side, order_id):
+        order = self._orders[side].pop(order_id, None)
+        if order is None:
+            return False
+        self._adjust_level(side, order.price, -order.remaining)
+        return True
+
+    def depth(self, levels=5):
+        """Aggregated (price, quantity) levels for each side, best first."""
+        bids = heapq.nlargest(levels, self._levels[BUY].items())
+        asks = heapq.nsmallest(levels, self._levels[SELL].items())
+        return {
+            'bids': [{'price': p, 'quantity': q} for p, q in bids],
+            'asks': [{'price': p, 'quantity': q} for p, q in asks],
+        }
+
+
+class MatchingEngine:
+    """Routes orders to one OrderBook per (crop, location) and keeps global arrival order."""
+
+    def __init__(self):
+        self._books = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(crop, location):
+        return ((crop or '').strip().lower(), (location or '').strip().lower())
+
+    def book(self, crop, location):
+        key = self._key(crop, location)
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = OrderBook()
+        return book
+
+    def submit(self, side, order_id, crop, location, price, quantity):
+        with self._lock:
+            order = Order(side, order_id, price, quantity, next(self._seq))
+            return self.book(crop, location).submit(order)
+
+    def cancel(self, side, order_id, crop, location):
+        with self._lock:
+            book = self._books.get(self._key(crop, location))
+            return book is not None and book.cancel(side, order_id)
+
+    def depth(self, crop, location, levels=5):
+        with self._lock:
+            book = self._books.get(self._key(crop, location))
+            return book.depth(levels) if book else {'bids': [], 'asks': []}
+
+    def resting_orders(self):
+        with self._lock:
+            return sum(len(book) for book in self._books.values())
@@ -0,0 +1,157 @@
+import threading
+import time
+
+import numpy as np
+
+HORIZON_DAYS = 30
+HISTORY_DAYS = 2 * 365 + HORIZON_DAYS
+SEASON_DAYS = 365
+MIN_OBSERVATIONS = 30
+
+# Holt linear smoothing settings tried for every series: (alpha, beta, damping).
+HOLT_PARAMS = ((0.5, 0.1, 0.9), (0.2, 0.05, 0.95))
+
+
+def forward_fill(matrix):
+    """Fills NaN gaps (market holidays, missing reports) with the last quote, then backfills the start."""
+    n_series, n_days = matrix.shape
+    valid = ~np.isnan(matrix)
+    idx = np.where(valid, np.arange(n_days), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = matrix[np.arange(n_series)[:, None], idx]
+    first = valid.argmax(axis=1)
+    lead = np.arange(n_days)[None, :] < first[:, None]
+    return np.where(lead, matrix[np.arange(n_series), first][:, None], filled)
+
+
+def naive(history, horizon):
+    return np.repeat(history[:, -1:], horizon, axis=1)
+
+
+def seasonal_naive(history, horizon, season=SEASON_DAYS):
+    """Same days last season; series shorter than a season fall back to naive."""
+    if history.shape[1] < season:
+        return naive(history, horizon)
+    start = history.shape[1] - season
+    window = history[:, start:start + horizon]
+    if window.shape[1] < horizon:
+        window = np.concatenate([window, naive(window, horizon - window.shape[1])], axis=1)
+    return window
+
+
+def moving_average_trend(history, horizon, window=30):
+    """Mean of the last `window` days plus the least-squares slope over the last 2*window."""
+    span = min(2 * window, history.shape[1])
+    recent = history[:, -span:]
+    x = np.arange(span) - (span - 1) / 2
+    slope = (recent * x).sum(axis=1) / (x ** 2).sum() if span > 1 else np.zeros(len(history))
+    level = history[:, -window:].mean(axis=1)
+    steps = (window - 1) / 2 + np.arange(1, horizon + 1)
+    return level[:, None] + slope[:, None] * steps[None, :]
+
+
+def holt(history, horizon, alpha, beta, phi):
+    """Damped Holt linear exponential smoothing, stepping through time for all series at once."""
+    level = history[:, 0].copy()
+    trend = np.zeros(len(history))
+    for t in range(1, history.shape[1]):
+        previous = level
+        level = alpha * history[:, t] + (1 - alpha) * (level + phi * trend)
+        trend = beta * (level - previous) + (1 - beta) * phi * trend
+    damping = np.cumsum(phi ** np.arange(1, horizon + 1))
+    return level[:, None] + trend[:, None] * damping[None, :]
+
+
+def _models():
+    models = [('naive', naive), ('seasonal_naive', seasonal_naive), ('moving_average_trend', moving_average_trend)]
+    for alpha, beta, phi in HOLT_PARAMS:
+        models.append((f'holt_{alpha}_{beta}', lambda h, n, a=alpha, b=beta, p=phi: holt(h, n, a, b, p)))
+    return models
+
+
+def fit_forecasts(matrix, horizon=HORIZON_DAYS):
+    """
+    Picks the best model per series by its error over the last `horizon`
+    observed days, then refits on the full history.
+
+    `matrix` is (series x days) with NaN for days without a quote. Returns
+    (forecast matrix, chosen model names, backtest MAE per series).
+    """
+    observed = ~np.isnan(matrix)
+    filled = forward_fill(matrix)
+    train, actual, mask = filled[:, :-horizon], filled[:, -horizon:], observed[:, -horizon:]
+    counts = np.maximum(mask.sum(axis=1), 1)
+
+    models = _models()
+    errors = np.empty((len(models), len(matrix)))
+    for i, (_, model) in enumerate(models):
+        errors[i] = (np.abs(model(train, horizon) - actual) * mask).sum(axis=1) / counts
+    # Too little history to judge a model: stay with the last price.
+    errors[1:, observed.sum(axis=1) < MIN_OBSERVATIONS] = np.inf
+    best = errors.argmin(axis=0)
+
+    forecasts = np.empty((len(matrix), horizon))
+    for i, (_, model) in enumerate(models):
+        chosen = best == i
+        if chosen.any():
+            forecasts[chosen] = model(filled[chosen], horizon)
+    names = np.array([name for name, _ in models])[best]
+    return forecasts, names, errors[best, np.arange(len(matrix))]
+
+
+class PriceForecaster:
+    """
+    Caches batch forecasts for every commodity-market series until the price
+    store changes. With a shared `cache` (get/set), one worker process fits
+    each store version and the others reuse its forecasts.
+    """
+
+    def __init__(self, store_factory, horizon=HORIZON_DAYS, cache=None):
+        self._store_factory = store_factory
+        self.horizon = horizon
+        self._cache = cache
+        self._version = None
+        self._by_market = {}
+        self._lock = threading.Lock()
+
+    def _refit(self, store, version):
+        started = time.monotonic()
+        keys, matrix = store.series_matrix(HISTORY_DAYS)
+        # A series whose last quote predates the window has nothing to forecast from.
+        quoted = ~np.isnan(matrix).all(axis=1)
+        keys, matrix = [key for key, ok in zip(keys, quoted) if ok], matrix[quoted]
+        by_market = {}
+        if len(keys):
+            forecasts, models, errors = fit_forecasts(matrix, self.horizon)
+            current = forward_fill(matrix)[:, -1]
+            for (commodity, market), now, path, model, mae in zip(keys, current, forecasts, models, errors):
+                by_market.setdefault(market.lower(), {})[commodity.lower()] = {
+                    'current': round(float(now)), 'forecast': [round(float(p)) for p in path],
+                    'change_pct': round(float((path[-1] - now) / now * 100), 1) if now else 0.0,
+                    'model': str(model), 'backtest_mae': round(float(mae), 1) if np.isfinite(mae) else None,
+                }
+        self._by_market, self._version = by_market, version
+        print(f"📈 Refit price forecasts for {len(keys)} series in {time.monotonic() - started:.2f}s")
+
+    def market_forecasts(self, market):
+        """{commodity: forecast summary} for one market, refitting first if new prices arrived."""
+        store = self._store_factory()
+        version = store.data_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    key = f"forecasts:{self.horizon}:{version}"
+                    shared = self._cache.get(key) if self._cache else None
+                    if shared is not None:
+                        self._by_market, self._version = shared, version
+                    else:
+                        try:
+                            self._refit(store, version)
+                        except Exception as e:
+                            # Recorded as fitted anyway, so bad data costs one failed refit, not one per request.
+                            print(f"❌ Price forecast refit failed: {e}")
+                            self._by_market, self._version = {}, version
+                        else:
+                            if self._cache:
+                                self._cache.set(key, self._by_market)
+        return self._by_market.get((market or '').lower(), {})
@@ -0,0 +1,269 @@
+import csv
+import glob
+import re
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import text
+
+# Daily APMC prices, one row per (commodity, market, day). The primary key is
+# the clustering order in a WITHOUT ROWID table, so every commodity's series
+# is stored contiguously and range scans are a single index walk. Days are
+# yyyymmdd integers and prices whole rupees per quintal to keep rows small.
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS mandi_price (
+        commodity TEXT NOT NULL COLLATE NOCASE,
+        market TEXT NOT NULL COLLATE NOCASE,
+        day INTEGER NOT NULL,
+        min_price INTEGER,
+        max_price INTEGER,
+        modal_price INTEGER,
+        PRIMARY KEY (commodity, market, day)
+    ){without_rowid}""",
+    # Latest quote per series, maintained on ingest so "current prices" never scans history.
+    """CREATE TABLE IF NOT EXISTS mandi_price_latest (
+        commodity TEXT NOT NULL COLLATE NOCASE,
+        market TEXT NOT NULL COLLATE NOCASE,
+        day INTEGER NOT NULL,
+        min_price INTEGER,
+        max_price INTEGER,
+        modal_price INTEGER,
+        PRIMARY KEY (market, commodity)
+    ){without_rowid}""",
+    # Bumped after every ingest so caches derived from prices know when to rebuild.
+    """CREATE TABLE IF NOT EXISTS mandi_price_meta (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )""",
+]
+
+_INSERT = (
+    "INSERT OR REPLACE INTO mandi_price (commodity, market, day, min_price, max_price, modal_price) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_UPSERT_LATEST = (
+    "INSERT INTO mandi_price_latest (commodity, market, day, min_price, max_price, modal_price) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (market, commodity) DO UPDATE SET day = excluded.day, min_price = excluded.min_price, "
+    "max_price = excluded.max_price, modal_price = excluded.modal_price WHERE excluded.day >= mandi_price_latest.day"
+)
+
+# Header spellings seen in Agmarknet / data.gov.in exports, after normalization.
+_HEADER_ALIASES = {
+    'commodity': ('commodity', 'commodity_name'),
+    'market': ('market', 'market_name', 'apmc', 'mandi'),
+    'day': ('arrival_date', 'price_date', 'reported_date', 'date'),
+    'min_price': ('min_price', 'minimum_price', 'min_price_rs_quintal'),
+    'max_price': ('max_price', 'maximum_price', 'max_price_rs_quintal'),
+    'modal_price': ('modal_price', 'modal_price_rs_quintal'),
+}
+_DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d-%b-%Y', '%d %b %Y')
+
+
+def _normalize_header(name):
+    name = name.replace('_x0020_', ' ').strip().lower()
+    return re.sub(r'[^a-z0-9]+', '_', name).strip('_')
+
+
+def _column_positions(header):
+    normalized = [_normalize_header(h) for h in header]
+    positions = {}
+    for field, aliases in _HEADER_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                positions[field] = normalized.index(alias)
+                break
+        else:
+            raise ValueError(f"CSV is missing a '{field}' column (header: {header})")
+    return positions
+
+
+def _parse_day(value, cache):
+    day = cache.get(value)
+    if day is None:
+        for fmt in _DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value.strip(), fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Unrecognised date: {value!r}")
+        day = cache[value] = parsed.year * 10000 + parsed.month * 100 + parsed.day
+    return day
+
+
+def _price(value):
+    value = value.strip()
+    return int(round(float(value))) if value and value.upper() not in ('NA', 'NR', '-') else None
+
+
+def to_day(value):
+    """date or 'YYYY-MM-DD' -> yyyymmdd integer used in storage."""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d').date()
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def from_day(day):
+    return date(day // 10000, day // 100 % 100, day % 100)
+
+
+class PriceHistoryStore:
+    """Historical mandi price store on the app's SQL database."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def ensure_schema(self):
+        without_rowid = ' WITHOUT ROWID' if self.engine.dialect.name == 'sqlite' else ''
+        with self.engine.begin() as conn:
+            for statement in _SCHEMA:
+                conn.execute(text(statement.format(without_rowid=without_rowid)))
+
+    def ingest_csv(self, paths, chunk_rows=200_000):
+        """
+        Bulk-loads APMC daily price CSVs (file paths or glob patterns).
+        Rows are inserted in large sorted batches inside one transaction per
+        file; re-importing a day overwrites it. Returns rows loaded.
+        """
+        self.ensure_schema()
+        files = sorted({f for p in paths for f in (glob.glob(p) or [p])})
+        total, started = 0, time.monotonic()
+        raw = self.engine.raw_connection()
+        restore = []
+        try:
+            cursor = raw.cursor()
+            if self.engine.dialect.name == 'sqlite':
+                for pragma, value in (('synchronous', 'OFF'), ('cache_size', '-200000')):
+                    restore.append((pragma, cursor.execute(f"PRAGMA {pragma}").fetchone()[0]))
+                    cursor.execute(f"PRAGMA {pragma} = {value}")
+            for path in files:
+                loaded = self._ingest_file(cursor, path, chunk_rows)
+                cursor.execute(
+                    "INSERT INTO mandi_price_meta (name, value) VALUES ('version', 1) "
+                    "ON CONFLICT (name) DO UPDATE SET value = value + 1"
+                )
+                raw.commit()
+                total += loaded
+                print(f"📥 Loaded {loaded:,} price rows from {path}")
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            # The connection goes back to the pool; later app writes must not inherit the bulk-load settings.
+            for pragma, value in restore:
+                raw.cursor().execute(f"PRAGMA {pragma} = {value}")
+            raw.close()
+        print(f"✅ Ingested {total:,} rows from {len(files)} files in {time.monotonic() - started:.1f}s")
+        return total
+
+    def _ingest_file(self, cursor, path, chunk_rows):
+        day_cache, loaded, batch = {}, 0, []
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if not header:
+                return 0
+            pos = _column_positions(header)
+            c, m, d = pos['commodity'], pos['market'], pos['day']
+            lo, hi, mo = pos['min_price'], pos['max_price'], pos['modal_price']
+            for row in reader:
+                if not row:
+                    continue
+                batch.append((row[c].strip(), row[m].strip(), _parse_day(row[d], day_cache),
+                              _price(row[lo]), _price(row[hi]), _price(row[mo])))
+                if len(batch) >= chunk_rows:
+                    loaded += self._write_batch(cursor, batch)
+                    batch = []
+        if batch:
+            loaded += self._write_batch(cursor, batch)
+        return loaded
+
+    @staticmethod
+    def _write_batch(cursor, batch):
+        # Inserting in key order keeps B-tree page splits local.
+        batch.sort(key=lambda r: (r[0].lower(), r[1].lower(), r[2]))
+        cursor.executemany(_INSERT, batch)
+        latest = {}
+        for row in batch:
+            key = (row[0].lower(), row[1].lower())
+            if key not in latest or row[2] >= latest[key][2]:
+                latest[key] = row
+        cursor.executemany(_UPSERT_LATEST, latest.values())
+        return len(batch)
+
+    def data_version(self):
+        """Changes whenever prices are ingested; 0 for an empty store."""
+        with self.engine.connect() as conn:
+            row = conn.execute(text("SELECT value FROM mandi_price_meta WHERE name = 'version'")).first()
+        return row[0] if row else 0
+
+    def series_matrix(self, days):
+        """
+        Modal prices of every series over the `days` days up to the newest
+        quote, as (keys, matrix): keys is a list of (commodity, market) and
+        matrix is (series x days) float64 with NaN where no quote exists.
+        """
+        with self.engine.connect() as conn:
+            newest = conn.execute(text("SELECT max(day) FROM mandi_price_latest")).scalar()
+            if newest is None:
+                return [], np.empty((0, days))
+            end = from_day(newest)
+            keys = [tuple(r) for r in conn.execute(text(
+                "SELECT commodity, market FROM mandi_price_latest ORDER BY market, commodity"
+            ))]
+            # One primary-key range seek per series instead of a scan over all history.
+            # Fetched on the DBAPI cursor: building millions of Row objects costs more than the query.
+            cursor = conn.connection.cursor()
+            cursor.execute(
+                "WITH series AS (SELECT commodity, market, ROW_NUMBER() OVER (ORDER BY market, commodity) - 1 AS idx "
+                "FROM mandi_price_latest) "
+                "SELECT s.idx, p.day, p.modal_price FROM series AS s JOIN mandi_price AS p "
+                "ON p.commodity = s.commodity AND p.market = s.market AND p.day >= ? "
+                "WHERE p.modal_price IS NOT NULL",
+                (to_day(end - timedelta(days=days - 1)),)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        matrix = np.full((len(keys), days), np.nan)
+        if rows:
+            series_idx, day_values, prices = np.array(rows, dtype=np.int64).T
+            months = (day_values // 10000 - 1970) * 12 + (day_values // 100 % 100 - 1)
+            ordinals = months.astype('datetime64[M]').astype('datetime64[D]') + (day_values % 100 - 1)
+            day_idx = (ordinals - np.datetime64(end)).astype(np.int64) + days - 1
+            matrix[series_idx, day_idx] = prices
+        return keys, matrix
+
+    def latest(self, commodity, market):
+        """Most recent quote for one series, or None."""
+        with self.engine.connect() as conn:
+            row = conn.execute(text(
+                "SELECT day, min_price, max_price, modal_price FROM mandi_price_latest "
+                "WHERE market = :market AND commodity = :commodity"
+            ), {'market': market, 'commodity': commodity}).first()
+        if row is None:
+            return None
+        return {'date': from_day(row.day).isoformat(), 'min_price': row.min_price,
+                'max_price': row.max_price, 'modal_price': row.modal_price}
+
+    def price_range(self, commodity, market, start, end):
+        """Daily quotes for one series between two dates (inclusive), oldest first."""
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT day, min_price, max_price, modal_price FROM mandi_price "
+                "WHERE commodity = :commodity AND market = :market AND day BETWEEN :start AND :end ORDER BY day"
+            ), {'commodity': commodity, 'market': market, 'start': to_day(start), 'end': to_day(end)}).all()
+        return [{'date': from_day(r.day).isoformat(), 'min_price': r.min_price,
+                 'max_price': r.max_price, 'modal_price': r.modal_price} for r in rows]
+
+    def latest_tables(self):
+        """{market: {commodity: modal_price}} from the latest quotes, keyed in lower case."""
+        tables = {}
+        with self.engine.connect() as conn:
+            for market, commodity, modal in conn.execute(text(
+                "SELECT market, commodity, modal_price FROM mandi_price_latest WHERE modal_price IS NOT NULL"
+            )):
+                tables.setdefault(market.lower(), {})[commodity.lower()] = modal
+        return tables
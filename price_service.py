@@ -0,0 +1,82 @@
+import hashlib
+import json
+import threading
+import time
+
+
+class MarketPriceService:
+    """
+    In-process cache of per-location mandi price tables.
+
+    `loader` returns {location_key: {crop: price}}; it is called once up front
+    and again only after `refresh_seconds` have passed, so page views and the
+    JSON API answer lookups from memory. The optional `insights(location)`
+    callable returns extra summary fields such as forecasts. With a shared
+    `cache`, worker processes reuse the tables loaded by whichever loaded first.
+    """
+
+    CACHE_KEY = 'price-tables'
+
+    def __init__(self, loader, refresh_seconds=300, insights=None, cache=None):
+        self._loader = loader
+        self._insights = insights
+        self._cache = cache
+        self.refresh_seconds = refresh_seconds
+        self._tables = {}
+        self._version = ''
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._loaded_at is not None and now - self._loaded_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if self._loaded_at is not None and now - self._loaded_at < self.refresh_seconds:
+                return
+            try:
+                tables = self._cache.get(self.CACHE_KEY) if self._cache else None
+                if tables is None:
+                    tables = self._loader()
+                    if self._cache:
+                        self._cache.set(self.CACHE_KEY, tables, self.refresh_seconds)
+                self._tables = {key.lower(): dict(prices) for key, prices in tables.items()}
+                self._version = hashlib.sha1(json.dumps(self._tables, sort_keys=True).encode()).hexdigest()[:12]
+                print(f"📊 Loaded market prices for {len(self._tables)} locations")
+            except Exception as e:
+                # Keep serving the last good tables rather than failing the page.
+                print(f"❌ Error loading market prices: {e}")
+            self._loaded_at = now
+
+    def invalidate(self):
+        """Forces the next lookup to reload the price tables."""
+        if self._cache:
+            self._cache.delete(self.CACHE_KEY)
+        self._loaded_at = None
+
+    def version(self):
+        """Fingerprint of the loaded tables; the same in every process serving the same prices."""
+        self._ensure_fresh()
+        return self._version
+
+    def get_prices(self, location):
+        self._ensure_fresh()
+        return self._tables.get((location or '').lower(), {})
+
+    def locations(self):
+        self._ensure_fresh()
+        return sorted(self._tables)
+
+    def market_summary(self, location):
+        """Returns the payload served by /api/market-prices and the market page."""
+        summary = {
+            'location': location, 'current_prices': self.get_prices(location),
+            'market_trend': 'Prices are stable', 'price_forecast': 'Expected 5-10% increase',
+            'demand_analysis': 'High demand for pulses', 'ai_used': False
+        }
+        if self._insights:
+            try:
+                summary.update(self._insights(location))
+            except Exception as e:
+                print(f"❌ Error computing market insights: {e}")
+        return summary
@@ -0,0 +1,37 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the single-process dev server runs there, so the thread lock suffices
+    fcntl = None
+
+
+class ProcessLock:
+    """
+    Reentrant lock held across threads and worker processes, using flock on
+    a lock file. The file handle is opened per process, so a lock inherited
+    through fork is never shared by parent and child.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+        self._pid = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth == 1 and fcntl is not None:
+            if self._pid != os.getpid():
+                self._handle, self._pid = open(self.path, 'a'), os.getpid()
+            fcntl.flock(self._handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0 and fcntl is not None:
+            fcntl.flock(self._handle, fcntl.LOCK_UN)
+        self._thread_lock.release()
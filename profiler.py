@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class StackSampler:
+    """
+    Statistical profiler for one thread: a background thread reads the
+    target's Python stack every `interval` seconds (sys._current_frames) and
+    counts each distinct stack. The target thread runs unmodified, so the
+    cost is the sampling thread's work, not instrumentation of every call.
+    Results are in the folded format flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, thread_id, interval=0.005, max_samples=20000):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_samples = max_samples
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval) and self.samples < self.max_samples:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            # A sample taken while stop() runs shows the profiler, not the request.
+            if stack and not self._stop.is_set():
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+
+def folded(stacks):
+    """Collapsed-stack text: one `frame;frame;frame count` line per stack."""
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def hottest(stacks, limit=10):
+    """[(frame, samples)] for the frames most often on top of the stack (self time)."""
+    leaves = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(';', 1)[-1]] += count
+    return leaves.most_common(limit)
@@ -0,0 +1,297 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from irrigation_engine import LITRES_PER_MM_ACRE, application_efficiency
+from yield_model import CROPS, IRRIGATION_PATTERNS, match_category
+
+FALLOW = 'fallow'
+# Sugarcane holds a field for 12-18 months, so it is not a season-by-season choice.
+CANDIDATES = [FALLOW] + [c for c in CROPS if c != 'sugarcane']
+
+# Cultivation cost (Rs/acre), seasonal crop water use (mm) and labour (person-days/acre).
+CROP_INPUTS = {
+    'soybean': (14000, 450, 20), 'cotton': (25000, 700, 45), 'moong': (9000, 300, 15), 'urad': (9000, 300, 15),
+    'tur': (12000, 500, 20), 'gram': (11000, 350, 15), 'wheat': (16000, 450, 18), 'jowar': (10000, 400, 15),
+    'bajra': (8000, 350, 12), 'maize': (16000, 500, 20), 'rice': (22000, 1100, 40), 'groundnut': (18000, 500, 30),
+    'onion': (45000, 450, 80), 'tomato': (60000, 550, 100),
+}
+# Farm-gate price (Rs/quintal) used when neither the market feed nor the MSP table has the crop.
+REFERENCE_PRICES = {
+    'soybean': 4600, 'cotton': 7100, 'moong': 8600, 'urad': 7400, 'tur': 7500, 'gram': 5600, 'wheat': 2400,
+    'jowar': 3400, 'bajra': 2600, 'maize': 2200, 'rice': 2300, 'groundnut': 6800, 'onion': 1600, 'tomato': 1200,
+}
+# Rain that reaches the root zone over a season (mm), central Maharashtra.
+SEASON_RAIN = {'kharif': 550, 'rabi': 40, 'zaid': 10}
+# Rain-fed fields cannot take crops needing more irrigation than this (mm).
+RAINFED_MAX_IRRIGATION = 50
+
+FAMILIES = {
+    'legume': {'soybean', 'moong', 'urad', 'tur', 'gram', 'groundnut'},
+    'cereal': {'wheat', 'jowar', 'bajra', 'maize', 'rice'},
+    'fibre': {'cotton'},
+    'vegetable': {'onion', 'tomato'},
+}
+ROTATION_EFFECTS = {
+    'same_crop': 0.85, 'same_family': 0.93, 'cereal_after_legume': 1.1, 'after_fallow': 1.05,
+}
+RESOURCES = ('water_m3', 'budget', 'labor_days')
+WORKING_DAYS_PER_SEASON = 100
+
+
+def _family(crop):
+    return next((name for name, members in FAMILIES.items() if crop in members), None)
+
+
+def rotation_factors(crops=CANDIDATES):
+    """(previous x next) yield multipliers for growing one crop after another."""
+    n = len(crops)
+    factors = np.ones((n, n))
+    for i, prev in enumerate(crops):
+        for j, nxt in enumerate(crops):
+            if nxt == FALLOW:
+                continue
+            if prev == FALLOW:
+                factors[i, j] = ROTATION_EFFECTS['after_fallow']
+            elif prev == nxt:
+                factors[i, j] = ROTATION_EFFECTS['same_crop']
+            elif _family(prev) == 'legume' and _family(nxt) == 'cereal':
+                factors[i, j] = ROTATION_EFFECTS['cereal_after_legume']
+            elif _family(prev) == _family(nxt):
+                factors[i, j] = ROTATION_EFFECTS['same_family']
+    return factors
+
+
+def upcoming_seasons(today, count):
+    """The next `count` seasons after the current one, as (season, year it starts)."""
+    month, year = today.month, today.year
+    current = 'kharif' if 6 <= month <= 10 else 'zaid' if month in (4, 5) else 'rabi'
+    order = ['kharif', 'rabi', 'zaid']
+    i = order.index(current)
+    start_year = year - 1 if current == 'rabi' and month <= 3 else year
+    seasons = []
+    for _ in range(count):
+        i += 1
+        if i == len(order):
+            i = 0
+        start_year += 1 if order[i] == 'zaid' else 0
+        seasons.append((order[i], start_year))
+    return seasons
+
+
+def _solve_dp(values, initial):
+    """
+    Best crop sequence per field. `values` is (fields x seasons x prev x next)
+    and `initial` each field's previous crop index. Returns (fields x seasons).
+    """
+    n_fields, n_seasons, n_crops, _ = values.shape
+    rows = np.arange(n_fields)
+    future = np.zeros((n_fields, n_crops))
+    best_next = np.empty((n_seasons, n_fields, n_crops), dtype=np.intp)
+    for s in range(n_seasons - 1, -1, -1):
+        total = values[:, s] + future[:, None, :]
+        best_next[s] = total.argmax(axis=2)
+        future = np.take_along_axis(total, best_next[s][:, :, None], axis=2)[:, :, 0]
+    plan = np.empty((n_fields, n_seasons), dtype=np.intp)
+    prev = np.asarray(initial)
+    for s in range(n_seasons):
+        prev = plan[:, s] = best_next[s][rows, prev]
+    return plan
+
+
+class RotationPlanner:
+    """
+    Multi-season rotation plan for a whole farm.
+
+    Each field's crop sequence is a dynamic program over seasons with the
+    previous crop as state (rotation effects change yields). Water, budget
+    and labour limits per season couple the fields; they are priced in by
+    Lagrange multipliers updated by subgradient steps, and any remaining
+    overshoot is removed greedily by fallowing the least valuable plantings,
+    after which spare capacity is refilled with the best-paying crops.
+    Plans are cached by a fingerprint of their inputs.
+    """
+
+    def __init__(self, yield_model, iterations=300, cache_size=32):
+        self.yield_model = yield_model
+        self.iterations = iterations
+        self.factors = rotation_factors()
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(*inputs):
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def plan(self, fields, seasons, prices, limits=None):
+        """
+        `fields` are dicts with id, name, area, soil_type, irrigation_type and
+        previous_crop; `seasons` is [(season, year)]; `prices` {crop: Rs/quintal};
+        `limits` {resource: per-season cap} for RESOURCES (None = unlimited).
+        """
+        limits = limits or {}
+        key = self.fingerprint(fields, seasons, prices, limits)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return dict(self._cache[key], cached=True)
+        result = self._solve(fields, seasons, prices, limits)
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return dict(result, cached=False)
+
+    def _field_economics(self, fields, seasons, prices):
+        """Per-field, per-season, per-crop revenue (at rotation factor 1) and resource use, area-scaled."""
+        n_f, n_s, n_c = len(fields), len(seasons), len(CANDIDATES)
+        area = np.array([float(f['area'] or 0) for f in fields])
+        grid = [(f, s, c) for f in fields for s, _ in seasons for c in CANDIDATES]
+        predicted = self.yield_model.predict(
+            [c for _, _, c in grid], np.ones(len(grid)),
+            [f.get('soil_type') for f, _, _ in grid], [f.get('irrigation_type') for f, _, _ in grid],
+            [s for _, s, _ in grid])['per_acre'].reshape(n_f, n_s, n_c)
+        price = np.array([0.0] + [float(prices.get(c) or 0) for c in CANDIDATES[1:]])
+        inputs = np.array([(0, 0, 0)] + [CROP_INPUTS[c] for c in CANDIDATES[1:]], dtype=float)
+
+        rain = np.array([SEASON_RAIN[s] for s, _ in seasons], dtype=float)
+        efficiency = np.array([application_efficiency(f.get('irrigation_type')) for f in fields])
+        irrigation_mm = np.maximum(inputs[None, None, :, 1] - rain[None, :, None], 0) / efficiency[:, None, None]
+        rainfed = np.array([match_category(f.get('irrigation_type'), IRRIGATION_PATTERNS) in (None, 'rainfed')
+                            for f in fields])
+        allowed = ~(rainfed[:, None, None] & (irrigation_mm > RAINFED_MAX_IRRIGATION))
+        allowed[:, :, 0] = True
+
+        revenue = predicted * price[None, None, :] * area[:, None, None]
+        usage = np.stack([
+            irrigation_mm * ~rainfed[:, None, None] * LITRES_PER_MM_ACRE / 1000 * area[:, None, None],
+            np.broadcast_to(inputs[None, None, :, 0] * area[:, None, None], (n_f, n_s, n_c)),
+            np.broadcast_to(inputs[None, None, :, 2] * area[:, None, None], (n_f, n_s, n_c)),
+        ], axis=-1)
+        usage[:, :, 0] = 0
+        return revenue, usage, allowed
+
+    def _solve(self, fields, seasons, prices, limits):
+        started = time.monotonic()
+        n_s = len(seasons)
+        index = {c: i for i, c in enumerate(CANDIDATES)}
+        initial = np.array([index.get((f.get('previous_crop') or '').strip().lower(), 0) for f in fields], dtype=np.intp)
+        revenue, usage, allowed = self._field_economics(fields, seasons, prices)
+        cost = usage[..., 1]
+
+        # margin[f, s, prev, next] with the rotation effect on revenue; disallowed crops never chosen.
+        margin = revenue[:, :, None, :] * self.factors[None, None, :, :] - cost[:, :, None, :]
+        margin = np.where(allowed[:, :, None, :], margin, -np.inf)
+
+        caps = np.full((n_s, len(RESOURCES)), np.inf)
+        for r, name in enumerate(RESOURCES):
+            if limits.get(name) is not None:
+                caps[:, r] = np.broadcast_to(np.asarray(limits[name], dtype=float), n_s)
+        constrained = np.isfinite(caps)
+
+        def evaluate(plan):
+            chosen = np.take_along_axis(usage, plan[:, :, None, None], axis=2)[:, :, 0]
+            prev = np.concatenate([initial[:, None], plan[:, :-1]], axis=1)
+            value = margin[np.arange(len(fields))[:, None], np.arange(n_s)[None, :], prev, plan]
+            return value, chosen.sum(axis=0)
+
+        lam = np.zeros((n_s, len(RESOURCES)))
+        plan = _solve_dp(margin, initial)
+        value, totals = evaluate(plan)
+        best, best_value = None, -np.inf
+        # Scale steps by what a unit of each resource earns in the unconstrained plan.
+        worth = np.where(totals > 0, max(value.sum(), 1.0) / np.maximum(totals, 1e-9), 0)
+        iterations = 0
+        if constrained.any() and not (totals <= caps + 1e-6).all():
+            for k in range(self.iterations):
+                iterations = k + 1
+                feasible = (totals <= caps + 1e-6).all()
+                if feasible and value.sum() > best_value:
+                    best, best_value = plan, value.sum()
+                excess = np.where(constrained, (totals - caps) / np.where(constrained, caps, 1), 0)
+                lam = np.maximum(lam + worth * np.clip(excess, -1, 1) * 0.5 / np.sqrt(k + 1), 0)
+                penalty = np.einsum('fscr,sr->fsc', usage, lam)
+                plan = _solve_dp(margin - penalty[:, :, None, :], initial)
+                value, totals = evaluate(plan)
+                if k % 10 == 9:
+                    # Near-feasible relaxed plans often repair into the best feasible one.
+                    repaired = self._fill(self._repair(plan, margin, usage, caps, evaluate),
+                                          margin, usage, caps, initial, evaluate)
+                    repaired_value, _ = evaluate(repaired)
+                    if repaired_value.sum() > best_value:
+                        best, best_value = repaired, repaired_value.sum()
+        if best is None or ((totals <= caps + 1e-6).all() and value.sum() > best_value):
+            best = plan
+        best = self._repair(best, margin, usage, caps, evaluate)
+        if constrained.any():
+            best = self._fill(best, margin, usage, caps, initial, evaluate)
+        value, totals = evaluate(best)
+
+        return {
+            'plan': best, 'margin': value, 'usage': np.take_along_axis(usage, best[:, :, None, None], axis=2)[:, :, 0],
+            'totals': totals, 'caps': caps, 'objective': float(value.sum()),
+            'feasible': bool((totals <= caps + 1e-6).all()), 'iterations': iterations,
+            'solve_seconds': round(time.monotonic() - started, 3),
+        }
+
+    @staticmethod
+    def _repair(plan, margin, usage, caps, evaluate):
+        """Fallows the plantings with the least margin per unit of overused resource until limits hold."""
+        plan = plan.copy()
+        rows = np.arange(len(plan))
+        value, totals = evaluate(plan)
+        for s in range(plan.shape[1]):
+            while True:
+                over = totals[s] - caps[s]
+                r = int(over.argmax())
+                if over[r] <= 1e-6:
+                    break
+                freed = usage[rows, s, plan[:, s], r]
+                # Losing this planting also changes the rotation effect on the next season's crop.
+                lost = value[:, s].copy()
+                if s + 1 < plan.shape[1]:
+                    lost += value[:, s + 1] - margin[rows, s + 1, 0, plan[:, s + 1]]
+                candidates = np.flatnonzero((plan[:, s] != 0) & (freed > 0))
+                if not len(candidates):
+                    break
+                order = candidates[np.argsort(lost[candidates] / freed[candidates])]
+                needed = np.searchsorted(np.cumsum(freed[order]), over[r] - 1e-6) + 1
+                plan[order[:needed], s] = 0
+                value, totals = evaluate(plan)
+        return plan
+
+    @staticmethod
+    def _fill(plan, margin, usage, caps, initial, evaluate):
+        """Plants fallow slots with the crops adding the most margin per share of spare capacity."""
+        plan = plan.copy()
+        n_s = plan.shape[1]
+        share = np.where(np.isfinite(caps) & (caps > 0), caps, np.inf)
+        value, totals = evaluate(plan)
+        for s in range(n_s):
+            while True:
+                fallow = np.flatnonzero(plan[:, s] == 0)
+                if not len(fallow):
+                    break
+                prev = initial[fallow] if s == 0 else plan[fallow, s - 1]
+                gain = margin[fallow, s, prev, :] - value[fallow, s][:, None]
+                if s + 1 < n_s:
+                    # Planting here also changes the rotation effect on next season's crop.
+                    gain = gain + margin[fallow, s + 1, :, plan[fallow, s + 1]] - value[fallow, s + 1][:, None]
+                use = usage[fallow, s]
+                fits = (use <= caps[s] - totals[s] + 1e-6).all(axis=2) & np.isfinite(gain) & (gain > 0)
+                if not fits.any():
+                    break
+                score = np.where(fits, gain / ((use / share[s]).sum(axis=2) + 1e-9), -np.inf)
+                crop = score.argmax(axis=1)
+                order = np.argsort(-score[np.arange(len(fallow)), crop])
+                order = order[np.isfinite(score[order, crop[order]])]
+                within = (np.cumsum(use[order, crop[order]], axis=0) <= caps[s] - totals[s] + 1e-6).all(axis=1)
+                take = order[:max(int(np.argmin(within)) if not within.all() else len(within), 1)]
+                plan[fallow[take], s] = crop[take]
+                value, totals = evaluate(plan)
+        return plan
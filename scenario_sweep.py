@@ -0,0 +1,71 @@
+import numpy as np
+
+DEFAULT_COST_PER_ACRE = 15000
+DEFAULT_PRICE = 5000
+MAX_SCENARIOS = 2_000_000
+MAX_SURFACE_CELLS = 10_000  # Largest sweep whose full profit grid may be asked for (include_surface)
+MAX_STEPS = 1000
+AXES = ('crop', 'land_area', 'price', 'yield_per_acre', 'cost_per_acre')
+
+
+def parse_range(spec, name):
+    """
+    A sweep axis from a request: a number, a list of numbers, or
+    {"min", "max", "steps"} for evenly spaced values.
+    """
+    if isinstance(spec, dict):
+        try:
+            low, high, steps = float(spec['min']), float(spec['max']), int(spec.get('steps', 10))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{name} range needs numeric min, max and steps")
+        if not 1 <= steps <= MAX_STEPS or high < low:
+            raise ValueError(f"{name} range needs min <= max and 1-{MAX_STEPS} steps")
+        return np.linspace(low, high, steps)
+    values = spec if isinstance(spec, (list, tuple)) else [spec]
+    try:
+        values = np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, a list of numbers or a min/max/steps range")
+    if values.ndim != 1 or not 1 <= len(values) <= MAX_STEPS or not np.isfinite(values).all():
+        raise ValueError(f"{name} must have 1-{MAX_STEPS} finite values")
+    return values
+
+
+def sweep(crops, areas, prices, yields, costs, top_k=10):
+    """
+    Profit for every crop x area x price x yield x cost combination.
+
+    `prices` and `yields` are (crops x n) so each crop can carry its own values
+    (e.g. its current mandi price) or share one range. Returns the profit
+    grid, the break-even price for each yield/cost and the break-even yield
+    for each price/cost per crop, and the top_k most profitable scenarios.
+    """
+    areas, costs = np.asarray(areas, dtype=float), np.asarray(costs, dtype=float)
+    prices, yields = np.asarray(prices, dtype=float), np.asarray(yields, dtype=float)
+    # Profit per acre first (crop x price x yield x cost), then scale by area.
+    margin = prices[:, :, None, None] * yields[:, None, :, None] - costs[None, None, None, :]
+    profit = areas[None, :, None, None, None] * margin[:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        break_even_price = costs[None, None, :] / yields[:, :, None]
+        break_even_yield = costs[None, None, :] / prices[:, :, None]
+
+    flat = profit.ravel()
+    k = max(0, min(top_k, flat.size))
+    best = np.argpartition(flat, flat.size - k)[-k:] if k else np.array([], dtype=int)
+    best = best[np.argsort(flat[best])[::-1]]
+    c, a, p, y, q = np.unravel_index(best, profit.shape)
+    top = [{
+        'crop': crops[ci], 'land_area': float(areas[ai]), 'price': float(prices[ci, pi]),
+        'yield_per_acre': float(yields[ci, yi]), 'cost_per_acre': float(costs[qi]),
+        'revenue': float(areas[ai] * prices[ci, pi] * yields[ci, yi]), 'total_cost': float(areas[ai] * costs[qi]),
+        'net_profit': float(flat[i]),
+    } for i, ci, ai, pi, yi, qi in zip(best, c, a, p, y, q)]
+
+    return {
+        'profit': profit,
+        'break_even_price': break_even_price,
+        'break_even_yield': break_even_yield,
+        'profitable_share': (margin > 0).mean(axis=(1, 2, 3)),
+        'top': top,
+    }
@@ -0,0 +1,204 @@
+"""
+Synthetic farm and mandi data at benchmark scale.
+
+Rows are generated with numpy from one seed, so the same arguments always
+produce the same database, and inserted through SQLAlchemy Core in large
+executemany batches. Distributions follow what the app sees in practice:
+log-normal field sizes and amounts and farm sizes, a few crops and mandis
+dominating, seasonal peaks in spending and listings. Every farm-management
+row belongs to one of the generated farms; tasks only pair a field with a
+worker of the same farm.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import gazetteer
+from rotation_planner import REFERENCE_PRICES
+
+DEFAULT_SCALE = {
+    'farm': 1_000, 'land': 10_000, 'worker': 2_000, 'task': 50_000, 'inventory_item': 2_000,
+    'transaction': 1_000_000, 'produce': 500_000,
+}
+BATCH_ROWS = 20_000
+HISTORY_DAYS = 3 * 365
+
+SOILS = (('Black Cotton Soil', .45), ('Red Soil', .2), ('Loamy', .15), ('Alluvial', .12), ('Laterite', .08))
+IRRIGATION = (('Rain-fed', .4), ('Drip', .2), ('Canal', .15), ('Sprinkler', .15), ('Flood', .1))
+FIELD_STATUS = (('Growing', .4), ('Planted', .2), ('Fallow', .25), ('Harvested', .15))
+# Most commonly grown first; every crop has a reference price.
+CROPS = ('soybean', 'cotton', 'onion', 'wheat', 'tur', 'gram', 'jowar', 'maize', 'bajra', 'groundnut', 'rice',
+         'tomato', 'moong', 'urad')
+LISTING_NOTES = (None, None, 'Grade A, cleaned and sorted', 'FAQ quality, bagged', 'Organic, certified',
+                 'Moisture below 12%', 'Ready for pickup at farm gate', 'Can deliver to mandi')
+SKILLS = ('Ploughing', 'Sowing', 'Spraying', 'Harvesting', 'Tractor driving', 'Irrigation', 'Pruning', 'Weeding')
+TASKS = ('Weeding', 'Spraying', 'Irrigation', 'Fertilizer application', 'Harvesting', 'Sowing', 'Ploughing', 'Pruning')
+PRIORITY = (('Medium', .5), ('High', .3), ('Low', .2))
+TASK_STATUS = (('Completed', .6), ('Pending', .25), ('In Progress', .15))
+INVENTORY = (('Seed', 'kg'), ('Fertilizer', 'kg'), ('Pesticide', 'liters'), ('Tool', 'units'), ('Fuel', 'liters'))
+EXPENSES = (('Labour', .3), ('Fertilizer', .2), ('Seeds', .15), ('Pesticide', .1), ('Fuel', .1),
+            ('Equipment', .08), ('Electricity', .07))
+INCOME = (('Crop sale', .8), ('Subsidy', .1), ('Equipment rental', .1))
+FIRST_NAMES = ('Ramesh', 'Suresh', 'Ganesh', 'Sunita', 'Anita', 'Vijay', 'Sanjay', 'Kavita', 'Mahesh', 'Rekha',
+               'Prakash', 'Lata', 'Dnyaneshwar', 'Savita', 'Balasaheb', 'Manisha', 'Santosh', 'Asha', 'Dattatray', 'Meena')
+SURNAMES = ('Patil', 'Pawar', 'Jadhav', 'Shinde', 'Deshmukh', 'Kale', 'More', 'Gaikwad', 'Chavan', 'Bhosale',
+            'Kulkarni', 'Salunkhe', 'Thorat', 'Kadam', 'Mane')
+
+
+def _pick(rng, weighted, n):
+    names, weights = zip(*weighted)
+    return np.array(names, dtype=object)[rng.choice(len(names), size=n, p=np.array(weights) / sum(weights))]
+
+
+def _zipf_pick(rng, values, n, a=1.1):
+    """Draws from `values` with the first few far more common, like crops and mandis."""
+    weights = 1.0 / np.arange(1, len(values) + 1) ** a
+    return rng.choice(len(values), size=n, p=weights / weights.sum())
+
+
+def _names(rng, n):
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(len(FIRST_NAMES), size=n)]
+    last = np.array(SURNAMES, dtype=object)[rng.integers(len(SURNAMES), size=n)]
+    return first + ' ' + last
+
+
+def _seasonal_days(rng, n, today):
+    """Days in the last HISTORY_DAYS, denser around the kharif and rabi harvests (Oct-Nov, Mar-Apr)."""
+    offsets = rng.integers(HISTORY_DAYS, size=n * 2)
+    months = np.array([(today - timedelta(days=int(d))).month for d in range(HISTORY_DAYS)])[offsets]
+    keep = rng.random(n * 2) < np.where(np.isin(months, (3, 4, 10, 11)), 1.0, 0.45)
+    offsets = offsets[keep][:n]
+    return np.concatenate([offsets, rng.integers(HISTORY_DAYS, size=n - len(offsets))])
+
+
+def _insert(conn, table, rows):
+    for start in range(0, len(rows), BATCH_ROWS):
+        conn.execute(table.insert(), rows[start:start + BATCH_ROWS])
+
+
+def _start_id(conn, table):
+    return (conn.execute(table.select().with_only_columns(table.c.id).order_by(table.c.id.desc()).limit(1)).scalar() or 0) + 1
+
+
+def generate(conn, tables, scale=None, seed=42, today=None, progress=print):
+    """
+    Appends synthetic rows to `tables` ({name: Table}, keyed as in
+    DEFAULT_SCALE) over an open connection; `scale` overrides row counts.
+    Returns {table: rows inserted}.
+    """
+    counts = dict(DEFAULT_SCALE, **(scale or {}))
+    rng = np.random.default_rng(seed)
+    today = today or date.today()
+    land, worker, task = tables['land'], tables['worker'], tables['task']
+
+    first_farm = _start_id(conn, tables['farm'])
+    _insert(conn, tables['farm'], [{'name': f"Farm {first_farm + i}", 'created_at': datetime.combine(today, datetime.min.time())}
+                                   for i in range(counts['farm'])])
+    share = rng.lognormal(0, 1, counts['farm'])
+    share /= share.sum()
+
+    def farms_for(n):
+        return first_farm + rng.choice(counts['farm'], size=n, p=share)
+
+    progress(f"📊 Seeded {counts['farm']} farms")
+
+    n = counts['land']
+    land_farms = farms_for(n)
+    first_land = _start_id(conn, land)
+    areas = np.round(np.clip(rng.lognormal(0.7, 0.8, n), 0.2, 60), 2)
+    field_crops = np.array(CROPS, dtype=object)[_zipf_pick(rng, CROPS, n)]
+    statuses = _pick(rng, FIELD_STATUS, n)
+    _insert(conn, land, [
+        {'farm_id': int(land_farms[i]), 'name': f"Field {first_land + i}", 'area': float(areas[i]), 'soil_type': s, 'irrigation_type': irr,
+         'crop': None if status == 'Fallow' else crop.capitalize(), 'status': status}
+        for i, (s, irr, crop, status) in enumerate(zip(_pick(rng, SOILS, n), _pick(rng, IRRIGATION, n), field_crops, statuses))
+    ])
+    progress(f"📊 Seeded {n} fields")
+
+    n = counts['worker']
+    first_worker = _start_id(conn, worker)
+    worker_farms = farms_for(n)
+    wages = np.round(np.clip(rng.normal(420, 90, n), 250, 900) / 10) * 10
+    _insert(conn, worker, [
+        {'farm_id': int(worker_farms[i]), 'full_name': name, 'phone': f"9{first_worker + i:09d}", 'daily_wage': int(wage),
+         'skills': ', '.join(rng.choice(SKILLS, size=int(rng.integers(1, 4)), replace=False))}
+        for i, (name, wage) in enumerate(zip(_names(rng, n), wages))
+    ])
+    progress(f"📊 Seeded {n} workers")
+
+    n = counts['task']
+    picked = rng.integers(counts['land'], size=n)
+    fields, task_farms = first_land + picked, land_farms[picked]
+    # A worker drawn from the task's own farm: workers sorted by farm, then a random offset into the farm's run.
+    by_farm = np.argsort(worker_farms, kind='stable')
+    starts = np.searchsorted(worker_farms[by_farm], task_farms, 'left')
+    staff = np.searchsorted(worker_farms[by_farm], task_farms, 'right') - starts
+    offsets = np.minimum(starts + (rng.random(n) * staff).astype(int), max(len(by_farm) - 1, 0))
+    workers = first_worker + (by_farm[offsets] if len(by_farm) else offsets)
+    unassigned = (rng.random(n) < 0.15) | (staff == 0)
+    task_status = _pick(rng, TASK_STATUS, n)
+    done_days = _seasonal_days(rng, n, today)
+    _insert(conn, task, [
+        {'farm_id': int(task_farms[i]), 'name': f"{name} - Field {field}", 'description': None, 'priority': priority, 'status': status,
+         'field_id': int(field), 'worker_id': None if unassigned[i] else int(workers[i]),
+         'completed_date': today - timedelta(days=int(done_days[i])) if status == 'Completed' else None}
+        for i, (name, priority, status, field) in enumerate(zip(
+            np.array(TASKS, dtype=object)[rng.integers(len(TASKS), size=n)], _pick(rng, PRIORITY, n), task_status, fields))
+    ])
+    progress(f"📊 Seeded {n} tasks")
+
+    n = counts['inventory_item']
+    kinds = rng.integers(len(INVENTORY), size=n)
+    item_farms = farms_for(n)
+    stock = np.round(rng.lognormal(3.5, 1.2, n), 1)
+    _insert(conn, tables['inventory_item'], [
+        {'farm_id': int(item_farms[i]), 'name': f"{INVENTORY[k][0]} lot {i + 1}", 'category': INVENTORY[k][0], 'stock': float(stock[i]),
+         'unit': INVENTORY[k][1], 'alert_threshold': float(round(stock[i] * rng.uniform(0.1, 0.6), 1))}
+        for i, k in enumerate(kinds)
+    ])
+    progress(f"📊 Seeded {n} inventory items")
+
+    n = counts['transaction']
+    income = rng.random(n) < 0.3
+    categories = np.where(income, _pick(rng, INCOME, n), _pick(rng, EXPENSES, n))
+    amounts = np.round(np.where(income, rng.lognormal(10.3, 0.9, n), rng.lognormal(8.2, 1.0, n)), 2)
+    days = _seasonal_days(rng, n, today)
+    transaction_farms = farms_for(n)
+    table = tables['transaction']
+    for start in range(0, n, BATCH_ROWS):
+        stop = min(n, start + BATCH_ROWS)
+        conn.execute(table.insert(), [
+            {'farm_id': int(transaction_farms[i]), 'description': f"{categories[i]} #{i + 1}", 'category': categories[i],
+             'amount': float(amounts[i]), 'type': 'Income' if income[i] else 'Expense',
+             'date': today - timedelta(days=int(days[i]))}
+            for i in range(start, stop)
+        ])
+    progress(f"📊 Seeded {n} transactions")
+
+    n = counts['produce']
+    places = gazetteer.PLACES
+    place_idx = _zipf_pick(rng, places, n, a=0.9)
+    crop_idx = _zipf_pick(rng, CROPS, n)
+    prices = np.array([REFERENCE_PRICES[c] for c in CROPS])[crop_idx] * rng.normal(1.0, 0.12, n)
+    quantities = np.round(np.clip(rng.lognormal(2.3, 0.9, n), 0.5, 500), 1)
+    listed = _seasonal_days(rng, n, today)
+    names = _names(rng, n)
+    notes = np.array(LISTING_NOTES, dtype=object)[rng.integers(len(LISTING_NOTES), size=n)]
+    now = datetime.combine(today, datetime.min.time())
+    table = tables['produce']
+    for start in range(0, n, BATCH_ROWS):
+        stop = min(n, start + BATCH_ROWS)
+        rows = []
+        for i in range(start, stop):
+            name, _, lat, lon = places[place_idx[i]]
+            when = now - timedelta(days=int(listed[i]), seconds=int(rng.integers(86400)))
+            rows.append({
+                'farmer_name': names[i], 'location': name, 'crop_type': CROPS[crop_idx[i]].capitalize(),
+                'quantity': float(quantities[i]), 'expected_price': int(round(prices[i], -1)),
+                'harvest_date': (when - timedelta(days=int(rng.integers(1, 20)))).date(), 'description': notes[i],
+                'date_listed': when, 'latitude': lat, 'longitude': lon, 'geo_cell': gazetteer.cell_for(lat, lon),
+                'quantity_filled': 0,
+            })
+        conn.execute(table.insert(), rows)
+    progress(f"📊 Seeded {n} listings")
+    return counts
@@ -0,0 +1,205 @@
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+BUCKETS = {'minute': MINUTE, 'hour': HOUR, 'day': DAY}
+
+# Raw readings, one narrow row per (field, metric, sensor, second). The
+# primary key is the clustering order of a WITHOUT ROWID table, so one
+# series' readings are contiguous and every range read is a single seek.
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS sensor_reading (
+        field_id INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        sensor TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        value REAL NOT NULL,
+        PRIMARY KEY (field_id, metric, sensor, ts)
+    ){without_rowid}""",
+    # Minute, hour and day aggregates. Buckets come before sensor so a field's
+    # metric over a time range is one contiguous scan across its sensors.
+    """CREATE TABLE IF NOT EXISTS sensor_rollup (
+        field_id INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        bucket_seconds INTEGER NOT NULL,
+        bucket_start INTEGER NOT NULL,
+        sensor TEXT NOT NULL,
+        n INTEGER NOT NULL,
+        total REAL NOT NULL,
+        min_value REAL NOT NULL,
+        max_value REAL NOT NULL,
+        PRIMARY KEY (field_id, metric, bucket_seconds, bucket_start, sensor)
+    ){without_rowid}""",
+    """CREATE TABLE IF NOT EXISTS sensor_series (
+        field_id INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        sensor TEXT NOT NULL,
+        first_ts INTEGER NOT NULL,
+        last_ts INTEGER NOT NULL,
+        last_value REAL NOT NULL,
+        PRIMARY KEY (field_id, metric, sensor)
+    )""",
+]
+
+_TOUCHED = """CREATE TEMP TABLE IF NOT EXISTS sensor_touched (
+    field_id INTEGER, metric TEXT, sensor TEXT, bucket_seconds INTEGER, bucket_start INTEGER,
+    PRIMARY KEY (field_id, metric, sensor, bucket_seconds, bucket_start)
+)"""
+
+_INSERT = "INSERT OR REPLACE INTO sensor_reading (field_id, metric, sensor, ts, value) VALUES (?, ?, ?, ?, ?)"
+_UPSERT_SERIES = (
+    "INSERT INTO sensor_series (field_id, metric, sensor, first_ts, last_ts, last_value) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (field_id, metric, sensor) DO UPDATE SET first_ts = min(first_ts, excluded.first_ts), "
+    "last_value = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_value ELSE last_value END, "
+    "last_ts = max(last_ts, excluded.last_ts)"
+)
+# Rollups are recomputed from the level below for the buckets a batch touched,
+# so re-sent or late readings never double count.
+_ROLLUP_FROM_RAW = (
+    "INSERT OR REPLACE INTO sensor_rollup (field_id, metric, bucket_seconds, bucket_start, sensor, n, total, min_value, max_value) "
+    "SELECT t.field_id, t.metric, t.bucket_seconds, t.bucket_start, t.sensor, count(*), sum(r.value), min(r.value), max(r.value) "
+    "FROM sensor_touched AS t JOIN sensor_reading AS r ON r.field_id = t.field_id AND r.metric = t.metric "
+    "AND r.sensor = t.sensor AND r.ts >= t.bucket_start AND r.ts < t.bucket_start + t.bucket_seconds "
+    "WHERE t.bucket_seconds = 60 GROUP BY t.field_id, t.metric, t.sensor, t.bucket_start"
+)
+_ROLLUP_FROM_BELOW = (
+    "INSERT OR REPLACE INTO sensor_rollup (field_id, metric, bucket_seconds, bucket_start, sensor, n, total, min_value, max_value) "
+    "SELECT t.field_id, t.metric, t.bucket_seconds, t.bucket_start, t.sensor, sum(r.n), sum(r.total), min(r.min_value), max(r.max_value) "
+    "FROM sensor_touched AS t JOIN sensor_rollup AS r ON r.field_id = t.field_id AND r.metric = t.metric "
+    "AND r.bucket_seconds = ? AND r.bucket_start >= t.bucket_start AND r.bucket_start < t.bucket_start + t.bucket_seconds "
+    "AND r.sensor = t.sensor WHERE t.bucket_seconds = ? GROUP BY t.field_id, t.metric, t.sensor, t.bucket_start"
+)
+
+
+class SensorStore:
+    """Field sensor time series on the app's SQL database, with minute/hour/day rollups."""
+
+    def __init__(self, engine, raw_retention_days=30, minute_retention_days=180, tz_offset=0):
+        self.engine = engine
+        self.raw_retention = raw_retention_days * DAY
+        self.minute_retention = minute_retention_days * DAY
+        self.tz_offset = tz_offset
+
+    def ensure_schema(self):
+        without_rowid = ' WITHOUT ROWID' if self.engine.dialect.name == 'sqlite' else ''
+        with self.engine.begin() as conn:
+            for statement in _SCHEMA:
+                conn.execute(text(statement.format(without_rowid=without_rowid)))
+
+    def bucket_start(self, ts, seconds):
+        """Start of the bucket holding `ts`; hours and days follow the local clock."""
+        return (ts + self.tz_offset) // seconds * seconds - self.tz_offset
+
+    def ingest(self, field_ids, metrics, sensors, timestamps, values, now=None):
+        """
+        Stores a batch of readings given as parallel sequences (epoch seconds)
+        and refreshes the rollups it touches, all in one transaction. Readings
+        older than the raw retention window are dropped. Returns rows stored.
+        """
+        now = time.time() if now is None else now
+        ts = np.asarray(timestamps, dtype=np.int64)
+        vals = np.asarray(values, dtype=float)
+        keep = (ts >= now - self.raw_retention) & np.isfinite(vals)
+        if not keep.any():
+            return 0
+        idx = np.flatnonzero(keep)
+        rows = [(int(field_ids[i]), metrics[i], sensors[i], int(ts[i]), float(vals[i])) for i in idx]
+        rows.sort(key=lambda r: r[:4])
+
+        series, touched = {}, set()
+        for field_id, metric, sensor, t, value in rows:
+            key = (field_id, metric, sensor)
+            first, last, last_value = series.get(key, (t, t, value))
+            series[key] = (min(first, t), t if t >= last else last, value if t >= last else last_value)
+            for seconds in (MINUTE, HOUR, DAY):
+                touched.add((field_id, metric, sensor, seconds, self.bucket_start(t, seconds)))
+
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.executemany(_INSERT, rows)
+            cursor.executemany(_UPSERT_SERIES, [k + v for k, v in series.items()])
+            cursor.execute(_TOUCHED)
+            cursor.execute("DELETE FROM sensor_touched")
+            cursor.executemany("INSERT INTO sensor_touched VALUES (?, ?, ?, ?, ?)", sorted(touched))
+            cursor.execute(_ROLLUP_FROM_RAW)
+            cursor.execute(_ROLLUP_FROM_BELOW, (MINUTE, HOUR))
+            cursor.execute(_ROLLUP_FROM_BELOW, (HOUR, DAY))
+            cursor.execute("DELETE FROM sensor_touched")
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+        return len(rows)
+
+    def prune(self, now=None):
+        """Drops raw readings and minute rollups past retention, one primary-key range per series."""
+        now = time.time() if now is None else now
+        raw_cutoff, minute_cutoff = int(now - self.raw_retention), int(now - self.minute_retention)
+        with self.engine.begin() as conn:
+            series = conn.execute(text("SELECT field_id, metric, sensor FROM sensor_series")).all()
+            params = [{'field_id': f, 'metric': m, 'sensor': s, 'cutoff': raw_cutoff} for f, m, s in series]
+            if params:
+                conn.execute(text(
+                    "DELETE FROM sensor_reading WHERE field_id = :field_id AND metric = :metric "
+                    "AND sensor = :sensor AND ts < :cutoff"
+                ), params)
+            metrics = {(f, m) for f, m, _ in series}
+            if metrics:
+                conn.execute(text(
+                    "DELETE FROM sensor_rollup WHERE field_id = :field_id AND metric = :metric "
+                    "AND bucket_seconds = 60 AND bucket_start < :cutoff"
+                ), [{'field_id': f, 'metric': m, 'cutoff': minute_cutoff} for f, m in metrics])
+
+    def series(self, field_id=None):
+        """Known sensors with their first/last reading, optionally for one field."""
+        query = "SELECT field_id, metric, sensor, first_ts, last_ts, last_value FROM sensor_series"
+        with self.engine.connect() as conn:
+            if field_id is None:
+                rows = conn.execute(text(query + " ORDER BY field_id, metric, sensor")).all()
+            else:
+                rows = conn.execute(text(query + " WHERE field_id = :f ORDER BY metric, sensor"), {'f': field_id}).all()
+        return [dict(r._mapping) for r in rows]
+
+    def rollups(self, field_id, metric, start, end, bucket='hour'):
+        """
+        Aggregates for one field's metric over [start, end) in epoch seconds,
+        merged across its sensors: a list of dicts with bucket_start, count,
+        mean, min and max, oldest first.
+        """
+        seconds = BUCKETS[bucket]
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT bucket_start, sum(n), sum(total), min(min_value), max(max_value) FROM sensor_rollup "
+                "WHERE field_id = :f AND metric = :m AND bucket_seconds = :b AND bucket_start >= :start AND bucket_start < :end "
+                "GROUP BY bucket_start ORDER BY bucket_start"
+            ), {'f': field_id, 'm': metric, 'b': seconds, 'start': self.bucket_start(int(start), seconds), 'end': int(end)}).all()
+        return [{'bucket_start': b, 'count': n, 'mean': total / n, 'min': lo, 'max': hi} for b, n, total, lo, hi in rows]
+
+    def summary(self, field_ids, metric, start, end, bucket='day'):
+        """
+        Rollups for many fields at once as (fields x buckets) arrays of mean,
+        min and max over [start, end), NaN where there is no data.
+        """
+        seconds = BUCKETS[bucket]
+        first = self.bucket_start(int(start), seconds)
+        buckets = max(int((end - first + seconds - 1) // seconds), 0)
+        shape = (len(field_ids), buckets)
+        mean, low, high = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        if not field_ids or not buckets:
+            return {'mean': mean, 'min': low, 'max': high}
+        position = {f: i for i, f in enumerate(field_ids)}
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT field_id, bucket_start, sum(n), sum(total), min(min_value), max(max_value) FROM sensor_rollup "
+                "WHERE field_id IN ({}) AND metric = :m AND bucket_seconds = :b AND bucket_start >= :start "
+                "AND bucket_start < :end GROUP BY field_id, bucket_start".format(','.join(str(int(f)) for f in field_ids))
+            ), {'m': metric, 'b': seconds, 'start': first, 'end': int(end)}).all()
+        for field_id, bucket_start, n, total, lo, hi in rows:
+            i, j = position[field_id], (bucket_start - first) // seconds
+            mean[i, j], low[i, j], high[i, j] = total / n, lo, hi
+        return {'mean': mean, 'min': low, 'max': high}
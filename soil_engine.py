@@ -0,0 +1,170 @@
+import numpy as np
+
+from yield_model import SOIL_FACTORS, SOIL_OVERRIDES, SOIL_PATTERNS, match_category
+
+HECTARES_PER_ACRE = 0.4047
+
+# Recommended dose per hectare as N, P2O5, K2O (kg/ha), Maharashtra general recommendations.
+CROP_NPK = {
+    'cotton': (120, 60, 60), 'soybean': (30, 60, 30), 'wheat': (120, 60, 40), 'sugarcane': (250, 115, 115),
+    'rice': (100, 50, 50), 'maize': (120, 60, 40), 'jowar': (80, 40, 40), 'bajra': (60, 30, 30),
+    'moong': (20, 40, 0), 'urad': (20, 40, 0), 'tur': (25, 50, 0), 'gram': (25, 50, 0),
+    'groundnut': (25, 50, 0), 'onion': (100, 50, 50), 'tomato': (150, 75, 75),
+}
+DEFAULT_NPK = (60, 40, 30)
+
+# Share of the season's N, P2O5, K2O applied at each growth stage.
+STAGE_SPLITS = {
+    'seedling': (0.5, 1.0, 0.5), 'vegetative': (0.25, 0.0, 0.0), 'flowering': (0.25, 0.0, 0.5),
+    'fruiting': (0.0, 0.0, 0.0), 'maturity': (0.0, 0.0, 0.0),
+}
+STAGE_GUIDANCE = {
+    'seedling': ("Apply as a basal dose during sowing.", "Drill or mix with the top 5-10 cm of soil beside the seed row."),
+    'vegetative': ("Top-dress nitrogen 25-30 days after sowing.", "Band along the rows and irrigate lightly after applying."),
+    'flowering': ("Apply the last split at flower initiation.", "Side-dress near the root zone when the soil is moist."),
+    'fruiting': ("No soil dose needed now; correct deficiencies with foliar sprays.", "Spray 1-2% water-soluble NPK (19:19:19) if leaves yellow."),
+    'maturity': ("No fertilizer needed at maturity.", "Plan the next crop's basal dose from a fresh soil test."),
+}
+ORGANIC_ALTERNATIVES = {
+    'pulse': "Rhizobium and PSB seed treatment with 2 tons/acre of well-decomposed FYM.",
+    'default': "Well-decomposed farmyard manure (FYM) at 4-5 tons/acre or vermicompost at 1-2 tons/acre.",
+}
+PULSES = {'soybean', 'moong', 'urad', 'tur', 'gram', 'groundnut'}
+
+# Soil test rating bands (kg/ha): low below the first edge, high at or above the second.
+NUTRIENT_BANDS = {'nitrogen': (280, 560), 'phosphorus': (10, 25), 'potassium': (108, 280), 'organic_matter': (0.86, 1.29)}
+RATINGS = ('Low', 'Medium', 'High')
+NUTRIENT_STATUS = ('Deficient', 'Adequate', 'High')
+RATING_SCORE = np.array([0.3, 0.7, 1.0])
+# Dose multiplier for a Low / Medium / High soil test.
+RATING_DOSE = np.array([1.25, 1.0, 0.75])
+
+# pH classes: upper edges, labels, score and advice.
+PH_EDGES = (4.5, 5.5, 6.0, 6.5, 7.5, 8.0, 8.5)
+PH_CLASSES = (
+    ('Extremely Acidic', 0.1, "Apply agricultural lime at 1-1.5 tons/acre and retest before the next season."),
+    ('Strongly Acidic', 0.3, "Apply agricultural lime at 0.5-1 ton/acre; avoid ammonium-based fertilizers."),
+    ('Moderately Acidic', 0.6, "Apply lime at 200-400 kg/acre and add organic matter."),
+    ('Slightly Acidic', 0.9, "Suitable for most crops; maintain with organic manures."),
+    ('Near Neutral', 1.0, "Maintain current pH. No immediate action required."),
+    ('Slightly Alkaline', 0.8, "Suitable for most crops; prefer acid-forming fertilizers such as ammonium sulphate."),
+    ('Moderately Alkaline', 0.5, "Add organic matter and use gypsum if drainage is poor."),
+    ('Strongly Alkaline', 0.2, "Apply gypsum at 1-2 tons/acre with good drainage and leaching irrigation."),
+)
+PH_SCORES = np.array([c[1] for c in PH_CLASSES])
+
+SCORE_WEIGHTS = {'ph': 0.25, 'organic_matter': 0.25, 'nitrogen': 0.2, 'phosphorus': 0.15, 'potassium': 0.15}
+HEALTH_STATUS = ((8.5, 'Excellent'), (7.0, 'Good'), (5.0, 'Fair'), (0, 'Poor'))
+
+# Comfortable pH range per crop, used to shortlist suitable crops.
+CROP_PH = {
+    'cotton': (5.8, 8.0), 'sugarcane': (6.0, 8.0), 'soybean': (6.0, 7.5), 'wheat': (6.0, 7.5), 'rice': (5.0, 7.5),
+    'maize': (5.5, 7.5), 'jowar': (5.5, 8.5), 'bajra': (6.0, 8.5), 'groundnut': (6.0, 7.5), 'gram': (6.0, 8.0),
+    'tur': (6.0, 7.5), 'moong': (6.2, 7.2), 'onion': (6.0, 7.5), 'tomato': (5.5, 7.5),
+}
+
+AMENDMENTS = {
+    'nitrogen': "Grow a green manure crop (sunhemp or dhaincha) or add FYM to build nitrogen.",
+    'phosphorus': "Add vermicompost and single super phosphate to improve phosphorus levels.",
+    'potassium': "Apply muriate of potash and return crop residues to the field.",
+    'organic_matter': "Incorporate 4-5 tons/acre of compost or FYM to raise organic matter.",
+}
+
+
+def _rating(values, name):
+    low, high = NUTRIENT_BANDS[name]
+    return np.digitize(values, (low, high))
+
+
+def _crops_by_soil():
+    """Crops ordered by how well they do on each soil, best first (from the yield model's soil factors)."""
+    ranks = {}
+    for soil, general in SOIL_FACTORS.items():
+        factor = {crop: SOIL_OVERRIDES.get((crop, soil), general) for crop in CROP_PH}
+        ranks[soil] = sorted(CROP_PH, key=lambda crop: -factor[crop])
+    return ranks
+
+
+CROPS_BY_SOIL = _crops_by_soil()
+
+
+def score_samples(ph, organic_matter, nitrogen, phosphorus, potassium):
+    """
+    Rates many soil samples at once. Inputs are equal-length sequences;
+    returns arrays of pH class index, nutrient rating index (0 Low, 1 Medium,
+    2 High) per parameter and the 0-10 health score.
+    """
+    ph = np.asarray(ph, dtype=float)
+    ratings = {
+        'organic_matter': _rating(np.asarray(organic_matter, dtype=float), 'organic_matter'),
+        'nitrogen': _rating(np.asarray(nitrogen, dtype=float), 'nitrogen'),
+        'phosphorus': _rating(np.asarray(phosphorus, dtype=float), 'phosphorus'),
+        'potassium': _rating(np.asarray(potassium, dtype=float), 'potassium'),
+    }
+    ph_class = np.digitize(ph, PH_EDGES)
+    score = SCORE_WEIGHTS['ph'] * PH_SCORES[ph_class]
+    for name, rating in ratings.items():
+        score = score + SCORE_WEIGHTS[name] * RATING_SCORE[rating]
+    return {'ph_class': ph_class, 'ratings': ratings, 'score': np.round(score * 10, 1)}
+
+
+def soil_health_reports(samples):
+    """Soil health analyses in the get_soil_health_analysis JSON shape for a list of sample dicts."""
+    def column(key):
+        return [float(s[key]) for s in samples]
+
+    scored = score_samples(column('ph_level'), column('organic_matter'), column('nitrogen'),
+                           column('phosphorus'), column('potassium'))
+    reports = []
+    for i, sample in enumerate(samples):
+        score, ph = float(scored['score'][i]), float(sample['ph_level'])
+        label, _, advice = PH_CLASSES[scored['ph_class'][i]]
+        ratings = {name: int(r[i]) for name, r in scored['ratings'].items()}
+        low = [name for name, r in ratings.items() if r == 0]
+        soil = match_category(sample.get('soil_type'), SOIL_PATTERNS) or 'loamy'
+        suitable = [c for c in CROPS_BY_SOIL[soil] if CROP_PH[c][0] <= ph <= CROP_PH[c][1]][:3]
+        reports.append({
+            'soil_health_score': f"{score}/10",
+            'health_status': next(status for threshold, status in HEALTH_STATUS if score >= threshold),
+            'ph_analysis': {'current_status': label, 'recommendation': advice},
+            'nutrient_analysis': {f"{name}_status": NUTRIENT_STATUS[ratings[name]]
+                                  for name in ('nitrogen', 'phosphorus', 'potassium')},
+            'suitable_crops': [c.capitalize() for c in suitable],
+            'soil_amendments': [AMENDMENTS[name] for name in low] or ["Continue crop rotation and organic manuring."],
+            'long_term_plan': ("Rotate with leguminous crops and add organic matter every season to rebuild fertility."
+                               if low else "Keep rotating with leguminous crops and retest the soil every 2-3 years."),
+            'ai_used': False,
+        })
+    return reports
+
+
+def fertilizer_plan(crop, growth_stage=None, nitrogen=None, phosphorus=None, potassium=None):
+    """
+    Stage dose per acre in the get_fertilizer_advice JSON shape. Soil test
+    values (kg/ha), when given, scale each nutrient up or down by its rating.
+    """
+    crop = (crop or '').strip().lower()
+    stage = (growth_stage or 'seedling').strip().lower()
+    stage = stage if stage in STAGE_SPLITS else 'seedling'
+    season = np.array(CROP_NPK.get(crop, DEFAULT_NPK), dtype=float) * HECTARES_PER_ACRE
+    for i, (name, value) in enumerate((('nitrogen', nitrogen), ('phosphorus', phosphorus), ('potassium', potassium))):
+        if value not in (None, ''):
+            season[i] *= RATING_DOSE[_rating(float(value), name)]
+    dose = season * np.array(STAGE_SPLITS[stage])
+    n, p, k = (round(float(v), 1) for v in dose)
+
+    # Products: DAP covers P2O5 (and some N), urea the remaining N, MOP the K2O.
+    dap = p / 0.46
+    urea = max(n - dap * 0.18, 0) / 0.46
+    mop = k / 0.60
+    timing, method = STAGE_GUIDANCE[stage]
+    return {
+        'quantity_per_acre': {'nitrogen': f"{n:g} kg", 'phosphorus': f"{p:g} kg", 'potassium': f"{k:g} kg"},
+        'fertilizer_products_per_acre': {'urea': f"{urea:.1f} kg", 'dap': f"{dap:.1f} kg", 'mop': f"{mop:.1f} kg"},
+        'season_total_per_acre': {'nitrogen': f"{season[0]:.1f} kg", 'phosphorus': f"{season[1]:.1f} kg",
+                                  'potassium': f"{season[2]:.1f} kg"},
+        'application_timing': timing,
+        'application_method': method,
+        'organic_alternatives': ORGANIC_ALTERNATIVES['pulse' if crop in PULSES else 'default'],
+        'ai_used': False,
+    }
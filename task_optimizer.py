@@ -0,0 +1,156 @@
+import re
+
+import numpy as np
+
+# Cost weights. Lower cost is better; priority is a bonus so that, when there
+# are more tasks than worker slots, the solver leaves the low-priority ones out.
+PRIORITY_WEIGHTS = {'High': 3.0, 'Medium': 2.0, 'Low': 1.0}
+SKILL_MISMATCH_PENALTY = 4.0
+NO_SKILLS_PENALTY = 2.0
+WAGE_WEIGHT = 1.0
+LOAD_PENALTY = 0.25
+# Each slot is a column of the assignment matrix; 1,000 tasks x 200 workers x 5 slots solves in about a second.
+MAX_TASKS_PER_WORKER = 5
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def _tokens(text):
+    return set(_TOKEN_RE.findall((text or '').lower()))
+
+
+def _skill_fit(tasks, workers):
+    """Builds a (tasks x workers) boolean matrix: does any worker skill appear in the task text."""
+    worker_skills = [_tokens(w.skills) for w in workers]
+    vocab = {tok: i for i, tok in enumerate(sorted(set().union(*worker_skills)))}
+    task_matrix = np.zeros((len(tasks), max(len(vocab), 1)), dtype=np.float32)
+    worker_matrix = np.zeros((len(workers), max(len(vocab), 1)), dtype=np.float32)
+    for row, task in enumerate(tasks):
+        cols = [vocab[t] for t in _tokens(f"{task.name} {task.description or ''}") if t in vocab]
+        task_matrix[row, cols] = 1.0
+    for row, skills in enumerate(worker_skills):
+        worker_matrix[row, [vocab[t] for t in skills]] = 1.0
+    has_skills = np.array([bool(s) for s in worker_skills])
+    return (task_matrix @ worker_matrix.T) > 0, has_skills
+
+
+def build_cost_matrix(tasks, workers):
+    """Returns the (tasks x workers) assignment cost combining skill fit, wage and priority."""
+    fit, has_skills = _skill_fit(tasks, workers)
+    wages = np.array([w.daily_wage or 0 for w in workers], dtype=np.float64)
+    wage_cost = WAGE_WEIGHT * wages / max(wages.max(initial=0), 1)
+    priority = np.array([PRIORITY_WEIGHTS.get(t.priority, 1.0) for t in tasks])
+
+    skill_cost = np.where(fit, 0.0, SKILL_MISMATCH_PENALTY)
+    skill_cost[:, ~has_skills] = NO_SKILLS_PENALTY
+    return skill_cost + wage_cost[None, :] - priority[:, None]
+
+
+def solve_assignment(cost):
+    """
+    Solves the rectangular linear assignment problem (minimum total cost)
+    with a shortest-augmenting-path (Jonker-Volgenant) solver in NumPy.
+    Always augments along the smaller side. Returns (row_indices, col_indices).
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n_rows, n_cols = cost.shape
+
+    u = np.zeros(n_rows)
+    v = np.zeros(n_cols)
+    path = np.full(n_cols, -1, dtype=int)
+    col4row = np.full(n_rows, -1, dtype=int)
+    row4col = np.full(n_cols, -1, dtype=int)
+
+    for cur_row in range(n_rows):
+        shortest = np.full(n_cols, np.inf)
+        remaining = np.ones(n_cols, dtype=bool)
+        seen_rows = np.zeros(n_rows, dtype=bool)
+        min_val = 0.0
+        scan = np.array([cur_row])
+        seen_rows[cur_row] = True
+        sink = -1
+        while sink == -1:
+            # Relax every row reached at the current distance in one step.
+            reduced = (min_val + cost[scan] - u[scan, None] - v[None, :])
+            best_row = reduced.argmin(axis=0)
+            reduced = reduced[best_row, np.arange(n_cols)]
+            better = remaining & (reduced < shortest)
+            path[better] = scan[best_row[better]]
+            shortest[better] = reduced[better]
+
+            candidates = np.where(remaining, shortest, np.inf)
+            min_val = candidates.min()
+            if not np.isfinite(min_val):
+                raise ValueError("Cost matrix is infeasible.")
+            tied = np.flatnonzero(candidates == min_val)
+            free = tied[row4col[tied] == -1]
+            if free.size:
+                sink = free[0]
+                remaining[sink] = False
+            else:
+                # All tied columns are settled together; their rows are scanned next.
+                remaining[tied] = False
+                scan = row4col[tied]
+                seen_rows[scan] = True
+
+        u[cur_row] += min_val
+        others = seen_rows.copy()
+        others[cur_row] = False
+        u[others] += min_val - shortest[col4row[others]]
+        visited = ~remaining
+        v[visited] -= min_val - shortest[visited]
+
+        j = sink
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == cur_row:
+                break
+
+    rows = np.arange(n_rows)
+    if transposed:
+        order = np.argsort(col4row)
+        return col4row[order], rows[order]
+    return rows, col4row
+
+
+def optimize_assignments(tasks, workers, max_tasks_per_worker=1, current_load=None):
+    """
+    Matches tasks to workers on skill fit, priority and wage.
+
+    `tasks` and `workers` are Task / Worker rows (or anything with the same
+    attributes). Each worker gets up to `max_tasks_per_worker` tasks, reduced
+    by `current_load` (a {worker_id: count} dict of tasks they already hold).
+    Returns a list of {'task_id', 'worker_id', 'cost'} dicts.
+    """
+    if not tasks or not workers:
+        return []
+    current_load = current_load or {}
+    base_cost = build_cost_matrix(tasks, workers)
+
+    # Expand each worker into one column per free slot; later slots cost a
+    # little more so work is spread instead of piled on the cheapest worker.
+    slot_worker, slot_rank = [], []
+    for col, worker in enumerate(workers):
+        load = current_load.get(worker.id, 0)
+        # No worker can take more than every task, so further slots would only widen the matrix.
+        for rank in range(load, min(max_tasks_per_worker, load + len(tasks))):
+            slot_worker.append(col)
+            slot_rank.append(rank)
+    if not slot_worker:
+        return []
+    slot_worker = np.array(slot_worker)
+    cost = base_cost[:, slot_worker] + LOAD_PENALTY * np.array(slot_rank)[None, :]
+
+    rows, cols = solve_assignment(cost)
+    return [
+        {'task_id': tasks[r].id, 'worker_id': workers[slot_worker[c]].id, 'cost': round(float(cost[r, c]), 3)}
+        for r, c in zip(rows, cols)
+    ]
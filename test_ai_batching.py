@@ -0,0 +1,51 @@
+import json
+
+from ai_integration import KisanMitraAI
+
+ADVICE = {'best_time': 'Early morning', 'method_feedback': 'Drip suits cotton.', 'optimization_tips': 'Mulch rows.'}
+
+
+def _ai(answer):
+    """A KisanMitraAI whose model answers each prompt with answer(prompt, field ids)."""
+    ai = KisanMitraAI.__new__(KisanMitraAI)
+    ai.model, ai.prompts = object(), []
+
+    def respond(prompt, generation_config):
+        ai.prompts.append(prompt)
+        fields = json.loads(prompt.split('Fields:')[1])
+        return answer(prompt, [f['id'] for f in fields])
+
+    ai._get_ai_response = respond
+    return ai
+
+
+def test_irrigation_batch_asks_only_for_advice_text():
+    ai = _ai(lambda prompt, ids: [dict(ADVICE, id=i) for i in reversed(ids)])
+    results = ai.get_irrigation_advice_batch([{'crop': 'Cotton'}, {'crop': 'Onion'}], generation_config={})
+    assert results == [dict(ADVICE, ai_used=True)] * 2
+    assert len(ai.prompts) == 1
+    assert 'liters' not in ai.prompts[0] and 'frequency' not in ai.prompts[0]
+
+
+def test_invalid_answers_are_asked_again_alone():
+    def answer(prompt, ids):
+        if len(ids) > 1:
+            return [dict(ADVICE, id=ids[0]), {'id': ids[1], 'best_time': ''}]
+        return [dict(ADVICE, id=ids[0])]
+
+    ai = _ai(answer)
+    results = ai.get_irrigation_advice_batch([{'crop': 'Cotton'}, {'crop': 'Onion'}], generation_config={})
+    assert all(results) and len(ai.prompts) == 2
+
+
+def test_fields_without_a_valid_answer_are_none():
+    ai = _ai(lambda prompt, ids: {'answers': []})
+    assert ai.get_fertilizer_advice_batch([{'crop': 'Wheat'}], generation_config={}) == [None]
+
+
+def test_fertilizer_batch_asks_only_for_guidance_text():
+    guidance = {'application_timing': 'At sowing.', 'application_method': 'Band placement.',
+                'organic_alternatives': 'Vermicompost.'}
+    ai = _ai(lambda prompt, ids: [dict(guidance, id=i) for i in ids])
+    assert ai.get_fertilizer_advice_batch([{'crop': 'Wheat'}], generation_config={}) == [dict(guidance, ai_used=True)]
+    assert len(ai.prompts) == 1 and 'quantity_per_acre' not in ai.prompts[0]
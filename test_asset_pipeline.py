@@ -0,0 +1,40 @@
+import gzip
+import json
+
+import app as kisan
+import asset_pipeline
+
+
+def test_css_keeps_strings_and_drops_comments():
+    css = '/* header */\nh1 ,  h2 {\n  color: red ;\n  content: "a  /* b */  c";\n}\n'
+    assert asset_pipeline.minify_css(css) == 'h1,h2{color:red;content:"a  /* b */  c"}'
+
+
+def test_js_keeps_literals_and_statement_breaks():
+    js = ("// setup\nconst re = /\\/\\*[a-z]+/g;  // comment\n"
+          "let s = 'x  // y' + `a ${b}  c`;\nlet n = a / b / c\nreturn\nvalue\n")
+    assert asset_pipeline.minify_js(js) == ("const re=/\\/\\*[a-z]+/g;let s='x  // y' + `a ${b}  c`;"
+                                             "let n=a / b / c\nreturn\nvalue")
+
+
+def test_build_fingerprints_and_gzips(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'site.css').write_text('body {  margin: 0 ; }')
+    manifest = asset_pipeline.build(str(tmp_path), ['css/site.css', 'js/missing.js'])
+    built = manifest['css/site.css']
+    assert list(manifest) == ['css/site.css'] and built.startswith('dist/css/site.') and built.endswith('.css')
+    assert (tmp_path / built).read_text() == 'body{margin:0}'
+    assert gzip.decompress((tmp_path / (built + '.gz')).read_bytes()) == b'body{margin:0}'
+    assert json.loads((tmp_path / 'dist' / 'manifest.json').read_text()) == manifest
+    (tmp_path / 'css' / 'site.css').write_text('body { margin: 1px }')
+    assert asset_pipeline.build(str(tmp_path), ['css/site.css'])['css/site.css'] != built
+
+
+def test_fingerprinted_assets_are_cached_for_good(client):
+    with kisan.app.test_request_context():
+        url = kisan.url_for('static', filename='css/style.css')
+    assert '/static/dist/css/style.' in url
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'immutable' not in client.get('/static/css/style.css').headers.get('Cache-Control', '')
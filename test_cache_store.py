@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+import cache_store
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        return cache_store.MemoryCache(max_entries=2)
+    return cache_store.open_cache(str(tmp_path / 'cache.db'))
+
+
+def test_values_round_trip_and_expire(cache):
+    cache.set('a', {'rows': [1, 2]})
+    cache.set('b', 'soon', ttl=0.05)
+    assert cache.get('a') == {'rows': [1, 2]} and cache.get('b') == 'soon'
+    time.sleep(0.06)
+    assert cache.get('b') is None
+    cache.clear()
+    assert cache.get('a') is None
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = cache_store.MemoryCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache_store.SQLiteCache(path).set('fragment:x', '<p>hi</p>')
+    assert cache_store.SQLiteCache(path).get('fragment:x') == '<p>hi</p>'
+
+
+def test_unusable_path_falls_back_to_memory(tmp_path):
+    assert isinstance(cache_store.open_cache(str(tmp_path / 'missing' / 'cache.db')), cache_store.MemoryCache)
+    assert isinstance(cache_store.open_cache(None), cache_store.MemoryCache)
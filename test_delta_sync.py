@@ -0,0 +1,111 @@
+from datetime import date
+
+
+def _add_farm(client):
+    client.post('/farm/land/add', data={'name': 'North', 'area': '2.5', 'soil_type': 'Loamy',
+                                        'irrigation_type': 'Drip', 'crop': 'Wheat', 'status': 'Growing'})
+    client.post('/farm/workers/add', data={'full_name': 'Ramesh Patil', 'phone': '9000000001', 'daily_wage': '400',
+                                           'skills': 'Spraying'})
+    client.post('/farm/tasks/add', data={'name': 'Spraying', 'priority': 'High', 'status': 'Pending', 'field_id': '1'})
+    client.post('/farm/tasks/add', data={'name': 'Weeding', 'priority': 'Low', 'status': 'Pending', 'field_id': '1'})
+
+
+def _pull(client, since=0, **params):
+    response = client.get('/api/sync/changes', query_string=dict(params, since=since))
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _rows(batch, table):
+    """{id: {column: value}} for a table of a pulled batch."""
+    packed = batch['tables'].get(table, {'columns': [], 'rows': []})
+    return {row[1]: dict(zip(packed['columns'], row)) for row in packed['rows']}
+
+
+def test_first_pull_downloads_every_row(client):
+    _add_farm(client)
+    batch = _pull(client)
+    assert set(_rows(batch, 'task')) == {1, 2}
+    assert _rows(batch, 'land')[1]['name'] == 'North'
+    assert not batch['more']
+    assert _pull(client, batch['version'])['tables'] == {}
+
+
+def test_pull_pages_by_limit(client):
+    _add_farm(client)
+    first = _pull(client, limit=2)
+    assert first['more']
+    rest = _pull(client, first['version'], limit=10)
+    pulled = sum(len(t['rows']) for batch in (first, rest) for t in batch['tables'].values())
+    assert pulled == 4 and not rest['more']
+
+
+def test_bulk_task_assignment_is_pulled(client):
+    _add_farm(client)
+    version = _pull(client)['version']
+    client.post('/api/task-optimization', json={'apply': True})
+    tasks = _rows(_pull(client, version), 'task')
+    assert [t['worker_id'] for t in tasks.values()] == [1]
+
+
+def test_posted_payroll_is_pulled(client):
+    _add_farm(client)
+    client.post('/farm/tasks/1/edit', data={'name': 'Spraying', 'priority': 'High', 'status': 'Completed',
+                                            'field_id': '1', 'worker_id': '1'})
+    version = _pull(client)['version']
+    today = date.today().isoformat()
+    client.post('/api/payroll', json={'start_date': today, 'end_date': today, 'post_expenses': True})
+    expenses = _rows(_pull(client, version), 'transaction')
+    assert [(e['category'], e['amount']) for e in expenses.values()] == [('Labor', 400.0)]
+
+
+def test_deletes_are_pulled_as_tombstones(client):
+    _add_farm(client)
+    version = _pull(client)['version']
+    client.post('/farm/tasks/2/delete')
+    task = _pull(client, version)['tables']['task']
+    assert task['rows'] == [] and [row_id for _, row_id in task['deleted']] == [2]
+
+
+def test_other_farms_see_nothing(client):
+    _add_farm(client)
+    key = client.post('/farms', json={'name': 'Second'}).get_json()['access_key']
+    assert _pull(client)['tables']
+    other = client.get('/api/sync/changes?since=0', headers={'X-Farm-Id': '2', 'X-Farm-Key': key}).get_json()
+    assert other['tables'] == {}
+
+
+def test_push_applies_edits_and_reports_conflicts(client):
+    _add_farm(client)
+    land_version = _rows(_pull(client), 'land')[1]['version']
+    edit = {'table': 'land', 'op': 'upsert', 'id': 1, 'base_version': land_version}
+    results = client.post('/api/sync/push', json={'changes': [
+        dict(edit, fields={'status': 'Harvested'}),
+        dict(edit, fields={'crop': 'Onion'}),  # made offline against the same, now stale, version
+        {'table': 'produce', 'op': 'upsert', 'fields': {}},
+        {'table': 'land', 'op': 'upsert', 'id': 1, 'base_version': 10 ** 6, 'fields': {'area': 'large'}},
+    ]}).get_json()['results']
+    assert [r['status'] for r in results] == ['applied', 'conflict', 'rejected', 'rejected']
+    assert results[1]['row']['status'] == 'Harvested' and results[1]['version'] == results[0]['version']
+    assert _rows(_pull(client), 'land')[1]['crop'] == 'Wheat'
+
+
+def test_retried_insert_is_applied_once(client):
+    _add_farm(client)
+    change = {'table': 'task', 'op': 'upsert', 'client_id': 'phone-7',
+              'fields': {'name': 'Harvesting', 'priority': 'High', 'field_id': 1}}
+    first = client.post('/api/sync/push', json={'changes': [change]}).get_json()['results'][0]
+    retry = client.post('/api/sync/push', json={'changes': [change]}).get_json()['results'][0]
+    assert first['status'] == retry['status'] == 'applied'
+    assert first['id'] == retry['id'] == 3
+    assert len(_rows(_pull(client), 'task')) == 3
+
+
+def test_compaction_keeps_pulls_identical(client):
+    _add_farm(client)
+    client.post('/farm/land/1/edit', data={'name': 'North', 'area': '3', 'soil_type': 'Loamy',
+                                           'irrigation_type': 'Drip', 'crop': 'Wheat', 'status': 'Harvested'})
+    before = _pull(client)
+    result = client.application.test_cli_runner().invoke(args=['compact-sync-log'])
+    assert 'Removed 1 ' in result.output
+    assert _pull(client) == before
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import scenario_sweep
+
+INPUTS = {'crop': 'onion', 'land_area': 4, 'price': 2000, 'cost_per_acre': 30000, 'yield_per_acre': 25}
+
+
+def _rupees(text):
+    return float(text.replace('₹', '').replace(',', ''))
+
+
+def test_sweep_profit_and_break_even():
+    result = scenario_sweep.sweep(['wheat'], [2], [[2000, 3000]], [[10]], [15000])
+    assert result['profit'][0, 0, :, 0, 0].tolist() == [10000, 30000]
+    assert result['break_even_price'][0, 0, 0] == 1500
+    assert result['top'][0]['price'] == 3000
+
+
+def test_parse_range_rejects_bad_ranges():
+    assert np.allclose(scenario_sweep.parse_range({'min': 1, 'max': 2, 'steps': 3}, 'x'), [1, 1.5, 2])
+    with pytest.raises(ValueError):
+        scenario_sweep.parse_range({'min': 2, 'max': 1}, 'x')
+
+
+def test_single_and_sweep_modes_agree(client):
+    single = client.post('/api/farming-calculator', json=INPUTS).get_json()
+    swept = client.post('/api/farming-calculator', json=dict(INPUTS, sweep={'crops': ['onion']})).get_json()['top_scenarios'][0]
+    assert _rupees(single['net_profit']) == swept['net_profit'] == 4 * (2000 * 25 - 30000)
+    assert _rupees(single['expected_revenue']) == swept['revenue']
+
+
+def test_expected_yield_is_for_the_whole_area(client):
+    legacy = dict(INPUTS, expected_yield=100)
+    del legacy['yield_per_acre']
+    single = client.post('/api/farming-calculator', json=legacy).get_json()
+    swept = client.post('/api/farming-calculator', json=dict(legacy, sweep={'crops': ['onion']})).get_json()['top_scenarios'][0]
+    assert single['yield_per_acre'] == swept['yield_per_acre'] == 25
+    assert _rupees(single['net_profit']) == swept['net_profit']
+
+
+def test_profit_surface_is_opt_in_and_bounded(client):
+    sweep = dict(INPUTS, sweep={'crops': ['onion'], 'price': {'min': 1000, 'max': 3000, 'steps': 5}})
+    assert 'profit_surface' not in client.post('/api/farming-calculator', json=sweep).get_json()
+    surface = client.post('/api/farming-calculator', json=dict(sweep, include_surface=True)).get_json()['profit_surface']
+    assert len(surface[0][0]) == 5
+    sweep['sweep']['yield_per_acre'] = {'min': 5, 'max': 30, 'steps': 1000}
+    sweep['sweep']['cost_per_acre'] = {'min': 10000, 'max': 40000, 'steps': 3}
+    assert client.post('/api/farming-calculator', json=sweep).status_code == 200
+    assert client.post('/api/farming-calculator', json=dict(sweep, include_surface=True)).status_code == 400
@@ -0,0 +1,54 @@
+from jinja2 import Environment
+
+import app as kisan
+
+from cache_store import MemoryCache
+from fragment_cache import FragmentCacheExtension
+
+TEMPLATE = "{% cache 'stats', version %}{{ rows | length }} rows{% endcache %}"
+
+
+def _env(backend):
+    env = Environment(extensions=[FragmentCacheExtension])
+    env.fragment_cache, env.fragment_cache_prefix = backend, 'r1'
+    return env
+
+
+def test_body_is_reused_until_a_key_changes():
+    template = _env(MemoryCache()).from_string(TEMPLATE)
+    assert template.render(version=1, rows=[1, 2]) == '2 rows'
+    assert template.render(version=1, rows=[1, 2, 3]) == '2 rows'
+    assert template.render(version=2, rows=[1, 2, 3]) == '3 rows'
+
+
+def test_ttl_is_passed_to_the_backend():
+    class Recorder(dict):
+        def set(self, key, value, ttl=None):
+            self[key] = (value, ttl)
+
+    backend = Recorder()
+    _env(backend).from_string("{% cache 'news', 'today', ttl=60 %}hi{% endcache %}").render()
+    [(key, (html, ttl))] = backend.items()
+    assert key.startswith('fragment:r1:news:') and (html, ttl) == ('hi', 60)
+
+
+def test_without_a_backend_the_body_always_renders():
+    template = _env(None).from_string(TEMPLATE)
+    assert template.render(version=1, rows=[1]) == '1 rows'
+    assert template.render(version=1, rows=[1, 2]) == '2 rows'
+
+
+def test_dashboard_stats_follow_data_versions(client):
+    assert b'id="totalLand">0 Acres' in client.get('/farm-management').data
+    client.post('/farm/land/add', data={'name': 'North', 'area': '2', 'soil_type': 'Loamy',
+                                        'irrigation_type': 'Drip', 'crop': 'Wheat', 'status': 'Growing'})
+    client.get('/farm-management')  # consumes the flash message
+    assert b'id="totalLand">2.0 Acres' in client.get('/farm-management').data
+
+
+def test_a_failed_news_fetch_is_not_cached(client, monkeypatch):
+    assert b'Could not fetch latest news' in client.get('/gyan-kendra').data
+    article = {'headline': 'Onion prices firm up', 'summary': '', 'source': 'APMC', 'category': 'Market', 'date': 'Today'}
+    monkeypatch.setattr(kisan, '_get_news_data', lambda: {'articles': [article]})
+    page = client.get('/gyan-kendra').data
+    assert b'Onion prices firm up' in page and b'Could not fetch latest news' not in page
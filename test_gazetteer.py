@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import app as kisan
+import gazetteer
+
+
+@pytest.mark.parametrize('text, name', [
+    ('Poona', 'Pune'), ('Niphad, Nashik', 'Niphad'), ('Nashik District', 'Nashik'), ('nasik!', 'Nashik'),
+    ('Nashk', 'Nashik'), ('Atlantis', None), ('', None),
+])
+def test_resolve_location(text, name):
+    place = gazetteer.resolve_location(text)
+    assert (place['name'] if place else None) == name
+
+
+def test_haversine_pune_to_mumbai():
+    assert gazetteer.haversine_km(18.5204, 73.8567, [19.076], [72.8777])[0] == pytest.approx(120, abs=1)
+
+
+def test_rings_never_overstate_the_distance():
+    rng = np.random.default_rng(5)
+    lat, lon = 19.9975, 73.7898
+    lats, lons = lat + rng.uniform(-0.6, 0.6, 500), lon + rng.uniform(-0.6, 0.6, 500)
+    distances = gazetteer.haversine_km(lat, lon, lats, lons)
+    ring_of = {}
+    for cells, min_km in gazetteer.cell_rings(lat, lon, 60):
+        ring_of.update((cell, min_km) for cell in cells)
+    for km, cell in zip(distances, (gazetteer.cell_for(a, b) for a, b in zip(lats, lons))):
+        if km <= 60:
+            assert ring_of[cell] <= km
+
+
+@pytest.mark.parametrize('lat, lon', [(19.9975, 73.7898), (89.5, 10.0), (0.0, 179.95)])
+def test_rings_visit_each_cell_in_range_once_and_end(lat, lon):
+    rings = list(gazetteer.cell_rings(lat, lon, 300))
+    cells = [cell for ring, _ in rings for cell in ring]
+    assert len(cells) == len(set(cells))
+    south, east = gazetteer.cell_for(lat - 2.6, lon), gazetteer.cell_for(lat, (lon + 2.6 + 180) % 360 - 180)
+    assert south in cells and east in cells
+
+
+def _list(client, location, crop='Onion', price='1500'):
+    client.post('/mandi/sell', data={'farmer_name': 'Sunita Pawar', 'location': location, 'cropType': crop,
+                                     'quantity': '10', 'price': price, 'harvestDate': '2026-03-01'})
+
+
+def test_nearby_search_is_nearest_first_within_the_radius(client):
+    for location in ('Lasalgaon', 'nasik', 'Pune', 'Niphad'):
+        _list(client, location)
+    body = client.post('/mandi/search', json={'near': 'Nashik', 'radius_km': 50}).get_json()
+    listings = body['listings']
+    assert [l['location'] for l in listings] == ['Nashik', 'Niphad', 'Lasalgaon']
+    assert listings[0]['distance_km'] == 0 and listings[1]['distance_km'] < listings[2]['distance_km'] < 50
+    assert client.post('/mandi/search', json={'near': 'Atlantis'}).get_json()['success'] is False
+
+
+@pytest.mark.parametrize('radius', [0, -5, 8000, 'far', None])
+def test_nearby_search_rejects_bad_radii(client, radius):
+    response = client.post('/mandi/search', json={'near': 'Nashik', 'radius_km': radius})
+    assert response.status_code == 400 and response.get_json()['success'] is False
+
+
+def test_old_listings_are_geocoded_by_location(client):
+    with kisan.app.app_context():
+        kisan.db.session.add(kisan.Produce(farmer_name='Vijay Kale', location='poona', crop_type='Wheat', quantity=5,
+                                           expected_price=2400, harvest_date=kisan.date(2026, 3, 1)))
+        kisan.db.session.commit()
+        kisan._backfill_listing_locations()
+        listing = kisan.db.session.get(kisan.Produce, 1)
+        assert (listing.location, listing.geo_cell) == ('Pune', gazetteer.cell_for(18.5204, 73.8567))
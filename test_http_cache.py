@@ -0,0 +1,47 @@
+from datetime import date
+
+
+def _etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def _add_farm(client):
+    client.post('/farm/land/add', data={'name': 'North', 'area': '2.5', 'soil_type': 'Loamy',
+                                        'irrigation_type': 'Drip', 'crop': 'Wheat', 'status': 'Growing'})
+    client.post('/farm/workers/add', data={'full_name': 'Ramesh Patil', 'phone': '9000000001', 'daily_wage': '400',
+                                           'skills': 'Spraying'})
+    client.post('/farm/tasks/add', data={'name': 'Spraying', 'priority': 'High', 'status': 'Pending', 'field_id': '1'})
+    client.get('/farm-management')  # shows the pending flash messages, which would skip validators
+
+
+def test_unchanged_page_revalidates(client):
+    etag = _etag(client, '/farm/land')
+    assert client.get('/farm/land', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_form_write_changes_etag(client):
+    etag = _etag(client, '/farm/land')
+    _add_farm(client)
+    assert client.get('/farm/land', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_applied_task_optimization_changes_etag(client):
+    _add_farm(client)
+    etag = _etag(client, '/farm/tasks')
+    response = client.post('/api/task-optimization', json={'apply': True})
+    assert response.get_json()['optimized_schedule']
+    assert client.get('/farm/tasks', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_posted_payroll_changes_etag(client):
+    _add_farm(client)
+    client.post('/farm/tasks/1/edit', data={'name': 'Spraying', 'priority': 'High', 'status': 'Completed',
+                                            'field_id': '1', 'worker_id': '1'})
+    client.get('/farm-management')
+    etag = _etag(client, '/farm/finance')
+    today = date.today().isoformat()
+    response = client.post('/api/payroll', json={'start_date': today, 'end_date': today, 'post_expenses': True})
+    assert response.status_code == 200
+    assert client.get('/farm/finance', headers={'If-None-Match': etag}).status_code == 200
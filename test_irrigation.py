@@ -0,0 +1,23 @@
+import pytest
+
+import irrigation_engine
+
+
+def test_reference_et0_matches_fao56_example_18():
+    # Brussels, 6 July: FAO-56 Example 18 gives 3.9 mm/day.
+    et0 = irrigation_engine.reference_et0(21.5, 12.3, 1.409 / 1.997 * 100, 2.078, 9.25 / 16.1, 187,
+                                          latitude=50.8, elevation=100)
+    assert et0 == pytest.approx(3.9, abs=0.05)
+
+
+def test_drip_needs_less_water_than_flood():
+    assert irrigation_engine.application_efficiency('Drip') > irrigation_engine.application_efficiency('Flood')
+
+
+@pytest.mark.parametrize('days, planned', [(10 ** 9, 366), (-5, 1), (14, 14)])
+def test_schedule_horizon_is_clamped(client, days, planned):
+    client.post('/farm/land/add', data={'name': 'North', 'area': '2', 'soil_type': 'Loamy',
+                                        'irrigation_type': 'Drip', 'crop': 'Wheat', 'status': 'Growing'})
+    response = client.post('/api/irrigation-schedule', json={'days': days})
+    assert response.status_code == 200
+    assert response.get_json()['days'] == planned
@@ -0,0 +1,23 @@
+from listing_feed import ListingFeed
+
+ONION = {'id': 1, 'crop_type': 'Onion', 'location': 'Lasalgaon', 'expected_price': 1500}
+
+
+def test_subscribers_only_get_matching_listings():
+    feed = ListingFeed()
+    cheap, dear = feed.subscribe('onion', max_price=1200), feed.subscribe('onion', max_price=1500)
+    other_crop, everything = feed.subscribe('wheat'), feed.subscribe()
+    feed.publish('created', ONION)
+    assert [s.events.qsize() for s in (cheap, dear, other_crop, everything)] == [0, 1, 0, 1]
+
+
+def test_a_full_queue_asks_the_client_to_resync():
+    feed = ListingFeed(max_pending=1)
+    subscription = feed.subscribe(location='lasal')
+    feed.publish('created', ONION)
+    feed.publish('deleted', ONION)
+    stream = feed.stream(subscription)
+    assert next(stream).startswith('retry:') and next(stream).startswith('event: resync')
+    assert feed.subscriber_count() == 1
+    stream.close()
+    assert feed.subscriber_count() == 0
@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, insert, update
+
+import app as kisan
+import mandi_search
+from app import Produce
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Produce.__table__.create(engine)
+    if not mandi_search.ensure_search_index(engine):
+        pytest.skip("SQLite without FTS5")
+    with engine.begin() as conn:
+        conn.execute(insert(Produce.__table__), [
+            {'farmer_name': 'Sunita Pawar', 'location': 'Nashik', 'crop_type': 'Onion', 'quantity': 20,
+             'expected_price': 1500, 'harvest_date': date(2026, 3, 1), 'description': 'Red onion, bagged'},
+            {'farmer_name': 'Vijay Kale', 'location': 'Latur', 'crop_type': 'Soybean', 'quantity': 40,
+             'expected_price': 4600, 'harvest_date': date(2026, 10, 1), 'description': 'Moisture below 12%'},
+        ])
+    return engine
+
+
+def _search(engine, **fields):
+    return mandi_search.search_listing_ids(engine, mandi_search.build_match_query(**fields))
+
+
+def test_prefix_terms_match_per_column(engine):
+    assert _search(engine, crop='soy') == [2]
+    assert _search(engine, crop='onion', location='nash') == [1]
+    assert _search(engine, crop='onion', location='latur') == []
+
+
+def test_match_query_quotes_user_terms():
+    assert mandi_search.build_match_query(crop='soy"bean OR') == 'crop_type : ("soy"* "bean"* "OR"*)'
+    assert mandi_search.build_match_query() is None
+
+
+def test_text_edits_reindex(engine):
+    with engine.begin() as conn:
+        conn.execute(update(Produce.__table__).where(Produce.__table__.c.id == 1).values(description='Organic'))
+    assert _search(engine, keywords='organic') == [1]
+    assert _search(engine, keywords='bagged') == []
+
+
+def test_fills_do_not_touch_the_index(engine):
+    raw = engine.raw_connection()
+    try:
+        before = raw.driver_connection.total_changes  # counts rows written by triggers too
+        raw.cursor().execute("UPDATE produce SET quantity_filled = quantity_filled + 5 WHERE id = 2")
+        raw.commit()
+        assert raw.driver_connection.total_changes - before == 1
+    finally:
+        raw.close()
+    assert _search(engine, crop='soybean') == [2]
+
+
+@pytest.mark.parametrize('near', [None, 'Nashik'])
+def test_route_clamps_the_result_limit(client, monkeypatch, near):
+    monkeypatch.setattr(kisan, 'SEARCH_MAX_RESULTS', 2)
+    for _ in range(3):
+        client.post('/mandi/sell', data={'farmer_name': 'Sunita Pawar', 'location': 'Nashik', 'cropType': 'Onion',
+                                         'quantity': '10', 'price': '1500', 'harvestDate': '2026-03-01'})
+    for limit, found in ((10 ** 9, 2), (0, 1), (-5, 1)):
+        body = client.post('/mandi/search', json={'crop': 'onion', 'near': near, 'limit': limit}).get_json()
+        assert len(body['listings']) == found
@@ -0,0 +1,56 @@
+import metrics
+
+
+def _registry():
+    registry = metrics.Registry()
+    registry.counter('requests_total', 'Requests.')
+    registry.gauge('in_flight', 'Requests in progress.')
+    registry.histogram('duration_seconds', 'Latency.', buckets=(0.1, 1.0))
+    return registry
+
+
+def test_render_uses_cumulative_buckets():
+    registry = _registry()
+    registry.record([('requests_total', 1, (('route', '/a'),))],
+                    [('duration_seconds', 0.05, ()), ('duration_seconds', 0.5, ()), ('duration_seconds', 3, ())])
+    text = metrics.render(registry.snapshot())
+    assert 'requests_total{route="/a"} 1\n' in text
+    assert 'duration_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'duration_seconds_bucket{le="1"} 2\n' in text
+    assert 'duration_seconds_bucket{le="+Inf"} 3\n' in text
+    assert 'duration_seconds_sum 3.55\n' in text and 'duration_seconds_count 3\n' in text
+    assert '# TYPE duration_seconds histogram\n' in text
+
+
+def test_label_values_are_escaped():
+    registry = _registry()
+    registry.inc('requests_total', labels=(('route', 'a"b\\c\nd'),))
+    assert 'requests_total{route="a\\"b\\\\c\\nd"} 1' in metrics.render(registry.snapshot())
+
+
+def test_merge_sums_processes():
+    first, second = _registry(), _registry()
+    for registry, n in ((first, 2), (second, 3)):
+        registry.inc('requests_total', n)
+        registry.set('in_flight', 1)
+        registry.observe('duration_seconds', 0.5)
+    merged = metrics.merge([first.snapshot(), second.snapshot()])
+    assert merged['values'][('requests_total', ())] == 5
+    assert merged['values'][('in_flight', ())] == 2
+    assert merged['values'][('duration_seconds', ())] == [0, 2, 0, 1.0]
+    assert first.snapshot()['values'][('duration_seconds', ())] == [0, 1, 0, 0.5]
+
+
+def _sample(text, prefix):
+    line = next((line for line in text.splitlines() if line.startswith(prefix)), None)
+    return float(line.rsplit(' ', 1)[1]) if line else 0
+
+
+def test_endpoint_counts_requests_by_route(client):
+    series = 'kisan_http_requests_total{route="/farm/land/<int:id>/edit",method="GET",status="404"}'
+    before = _sample(client.get('/metrics').get_data(as_text=True), series)
+    client.get('/farm/land/1/edit')
+    client.get('/farm/land/2/edit')
+    response = client.get('/metrics')
+    assert response.content_type == metrics.CONTENT_TYPE
+    assert _sample(response.get_data(as_text=True), series) - before == 2
@@ -0,0 +1,57 @@
+import pytest
+
+import app as kisan
+from order_book import BUY, SELL, MatchingEngine
+
+
+def test_buy_sweeps_asks_best_price_first_at_resting_prices():
+    engine = MatchingEngine()
+    engine.submit(SELL, 1, 'Onion', 'Nashik', 1500, 10)
+    engine.submit(SELL, 2, 'Onion', 'Nashik', 1400, 5)
+    fills = engine.submit(BUY, 3, 'onion', ' NASHIK ', 1500, 12)
+    assert fills == [{'buy_id': 3, 'sell_id': 2, 'quantity': 5, 'price': 1400},
+                     {'buy_id': 3, 'sell_id': 1, 'quantity': 7, 'price': 1500}]
+    assert engine.depth('Onion', 'Nashik') == {'bids': [], 'asks': [{'price': 1500, 'quantity': 3}]}
+
+
+def test_equal_prices_fill_in_arrival_order():
+    engine = MatchingEngine()
+    engine.submit(BUY, 1, 'Wheat', 'Latur', 2400, 5)
+    engine.submit(BUY, 2, 'Wheat', 'Latur', 2400, 5)
+    assert [f['buy_id'] for f in engine.submit(SELL, 3, 'Wheat', 'Latur', 2300, 7)] == [1, 2]
+
+
+def test_unmatched_orders_rest_and_can_be_cancelled():
+    engine = MatchingEngine()
+    assert engine.submit(BUY, 1, 'Wheat', 'Latur', 2300, 5) == []
+    assert engine.submit(SELL, 2, 'Wheat', 'Latur', 2400, 5) == []
+    assert engine.submit(SELL, 3, 'Wheat', 'Pune', 2200, 5) == []  # other mandi, other book
+    assert engine.resting_orders() == 3
+    assert engine.cancel(BUY, 1, 'Wheat', 'Latur') and not engine.cancel(BUY, 1, 'Wheat', 'Latur')
+    assert engine.submit(SELL, 4, 'Wheat', 'Latur', 2300, 5) == []
+    assert engine.depth('Wheat', 'Latur')['bids'] == []
+
+
+def test_float_residue_does_not_leave_a_level_behind():
+    engine = MatchingEngine()
+    engine.submit(SELL, 1, 'Onion', 'Nashik', 1500, 0.3)
+    assert len(engine.submit(BUY, 2, 'Onion', 'Nashik', 1500, 0.1)) == 1
+    assert len(engine.submit(BUY, 3, 'Onion', 'Nashik', 1500, 0.2)) == 1
+    assert engine.depth('Onion', 'Nashik') == {'bids': [], 'asks': []} and engine.resting_orders() == 0
+
+
+@pytest.mark.parametrize('quantity, price', [(0, 1500), (-2, 1500), (4, 0), (4, -10), ('lots', 1500), (None, 1500)])
+def test_bids_need_a_positive_quantity_and_price(client, quantity, price):
+    response = client.post('/mandi/bids', json={'location': 'Nashik', 'crop': 'Onion', 'quantity': quantity, 'price': price})
+    assert response.status_code == 400 and response.get_json()['success'] is False
+
+
+def test_bids_fill_listings_and_books_reload_from_the_database(client, monkeypatch):
+    client.post('/mandi/sell', data={'farmer_name': 'Sunita Pawar', 'location': 'Nashik', 'cropType': 'Onion',
+                                     'quantity': '10', 'price': '1500', 'harvestDate': '2026-03-01'})
+    body = client.post('/mandi/bids', json={'location': 'Nashik', 'crop': 'Onion', 'quantity': 4, 'price': 1600}).get_json()
+    assert (body['status'], body['filled'], body['trades']) == ('Filled', 4, [{'listing_id': 1, 'quantity': 4, 'price': 1500}])
+    monkeypatch.setattr(kisan, '_matching_engine', None)
+    monkeypatch.setattr(kisan, '_matching_version', None)
+    book = client.get('/mandi/book', query_string={'crop': 'Onion', 'location': 'Nashik'}).get_json()
+    assert book['asks'] == [{'price': 1500, 'quantity': 6}]
@@ -0,0 +1,72 @@
+from datetime import date
+
+import app as kisan
+
+PERIOD = {'start_date': '2026-03-01', 'end_date': '2026-03-31'}
+
+
+def _seed(client):
+    """Two workers; Ramesh finishes three tasks over two days in March, Sunita one in February."""
+    with kisan.app.app_context():
+        kisan.db.session.add(kisan.Land(name='North', area=2))
+        kisan.db.session.add_all([kisan.Worker(full_name='Ramesh Patil', daily_wage=400),
+                                  kisan.Worker(full_name='Sunita Pawar', daily_wage=500)])
+        kisan.db.session.flush()
+        done = [(1, date(2026, 3, 2)), (1, date(2026, 3, 2)), (1, date(2026, 3, 5)), (2, date(2026, 2, 27))]
+        kisan.db.session.add_all([kisan.Task(name='Weeding', priority='Medium', status='Completed', field_id=1,
+                                             worker_id=worker, completed_date=day) for worker, day in done])
+        kisan.db.session.add(kisan.Task(name='Spraying', priority='High', status='Pending', field_id=1, worker_id=2))
+        kisan.db.session.commit()
+
+
+def test_one_wage_per_distinct_day_worked(client):
+    _seed(client)
+    body = client.post('/api/payroll', json=PERIOD).get_json()
+    assert [(e['worker'], e['days_worked'], e['amount']) for e in body['payroll']] == [('Ramesh Patil', 2, 800)]
+    assert body['total'] == 800 and body['posted'] is False
+
+
+def test_posting_adds_labor_expenses(client):
+    _seed(client)
+    client.post('/api/payroll', json=dict(PERIOD, post_expenses=True))
+    with kisan.app.app_context():
+        [expense] = kisan.Transaction.query.all()
+    assert (expense.category, expense.type, expense.amount, expense.date) == ('Labor', 'Expense', 800, date(2026, 3, 31))
+
+
+def test_missing_dates_are_400(client):
+    assert client.post('/api/payroll', json={'start_date': '2026-03-01'}).status_code == 400
+
+
+def test_a_period_is_posted_once(client):
+    _seed(client)
+    assert client.post('/api/payroll', json=dict(PERIOD, post_expenses=True)).get_json()['posted'] is True
+    again = client.post('/api/payroll', json={'start_date': '2026-03-05', 'end_date': '2026-04-15',
+                                              'post_expenses': True})
+    assert again.status_code == 409
+    assert again.get_json()['already_posted'] == [{'worker_id': 1, 'worker': 'Ramesh Patil',
+                                                   'start_date': '2026-03-01', 'end_date': '2026-03-31'}]
+    with kisan.app.app_context():
+        assert kisan.Transaction.query.count() == 1
+
+
+def test_deleting_the_expense_frees_the_period(client):
+    _seed(client)
+    client.post('/api/payroll', json=dict(PERIOD, post_expenses=True))
+    client.post('/farm/finance/1/delete')
+    assert client.post('/api/payroll', json=dict(PERIOD, post_expenses=True)).status_code == 200
+    with kisan.app.app_context():
+        assert kisan.PayrollPosting.query.count() == kisan.Transaction.query.count() == 1
+
+
+def test_undated_completed_tasks_are_reported(client):
+    _seed(client)
+    with kisan.app.app_context():
+        kisan.db.session.add(kisan.Task(name='Pruning', priority='Low', status='Completed', field_id=1, worker_id=2))
+        kisan.db.session.commit()
+    body = client.post('/api/payroll', json=PERIOD).get_json()
+    assert body['undated_tasks'] == [{'task_id': 6, 'task': 'Pruning', 'worker_id': 2, 'worker': 'Sunita Pawar'}]
+    client.post('/farm/tasks/6/edit', data={'name': 'Pruning', 'priority': 'Low', 'status': 'Completed',
+                                            'field_id': '1', 'worker_id': '2', 'completed_date': '2026-03-10'})
+    body = client.post('/api/payroll', json=PERIOD).get_json()
+    assert body['undated_tasks'] == [] and body['total'] == 800 + 500
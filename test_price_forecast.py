@@ -0,0 +1,64 @@
+import csv
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+from price_forecast import PriceForecaster, fit_forecasts, forward_fill
+from price_history import PriceHistoryStore
+
+HEADER = ['commodity', 'market', 'arrival_date', 'min_price', 'max_price', 'modal_price']
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceHistoryStore(create_engine(f"sqlite:///{tmp_path / 'prices.db'}"))
+
+
+def _ingest(store, tmp_path, rows):
+    path = tmp_path / 'prices.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    store.ingest_csv([str(path)])
+
+
+def _daily(commodity, market, start, days, price):
+    return [[commodity, market, (start + timedelta(days=i)).isoformat(), price - 100, price + 100, price + i]
+            for i in range(days)]
+
+
+def test_forward_fill_carries_last_quote_and_backfills_start():
+    matrix = np.array([[np.nan, 10, np.nan, 12, np.nan]])
+    assert forward_fill(matrix).tolist() == [[10, 10, 10, 12, 12]]
+
+
+def test_steady_trend_is_extrapolated():
+    matrix = np.arange(200, dtype=float)[None, :] + 1000
+    forecasts, _, errors = fit_forecasts(matrix, horizon=10)
+    assert forecasts[0, -1] == pytest.approx(1209, abs=3)
+    assert errors[0] < 5
+
+
+def test_series_quoted_before_the_window_is_skipped(store, tmp_path):
+    _ingest(store, tmp_path, [['Onion', 'Nashik', '2021-01-05', 1000, 1400, 1200]]
+            + _daily('Tomato', 'Nashik', date(2026, 1, 1), 100, 1000))
+    forecasts = PriceForecaster(lambda: store).market_forecasts('Nashik')
+    assert set(forecasts) == {'tomato'}
+    assert forecasts['tomato']['current'] == 1099
+
+
+def test_failed_refit_is_not_retried_per_request(store, tmp_path, monkeypatch):
+    _ingest(store, tmp_path, _daily('Tomato', 'Nashik', date(2026, 1, 1), 100, 1000))
+    forecaster, calls = PriceForecaster(lambda: store), []
+
+    def broken(matrix, horizon):
+        calls.append(horizon)
+        raise ValueError("bad series")
+
+    monkeypatch.setattr('price_forecast.fit_forecasts', broken)
+    assert forecaster.market_forecasts('Nashik') == {}
+    assert forecaster.market_forecasts('Nashik') == {}
+    assert len(calls) == 1
@@ -0,0 +1,38 @@
+import csv
+
+import pytest
+from sqlalchemy import create_engine
+
+from price_history import PriceHistoryStore
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # One pooled connection, so the ingest and the checks after it share it.
+    return create_engine(f"sqlite:///{tmp_path / 'prices.db'}", pool_size=1, max_overflow=0)
+
+
+def _csv(tmp_path, name, rows):
+    path = tmp_path / name
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Commodity', 'Market', 'Arrival_Date', 'Min_Price', 'Max_Price', 'Modal_Price'])
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_ingest_keeps_latest_quote_and_overwrites_days(engine, tmp_path):
+    store = PriceHistoryStore(engine)
+    store.ingest_csv([_csv(tmp_path, 'a.csv', [['Onion', 'Nashik', '2026-03-01', 1000, 1400, 1200],
+                                                ['Onion', 'Nashik', '2026-03-02', 1100, 1500, 1300]])])
+    store.ingest_csv([_csv(tmp_path, 'b.csv', [['Onion', 'Nashik', '2026-03-02', 1100, 1500, 1350]])])
+    assert store.latest('onion', 'NASHIK')['modal_price'] == 1350
+    assert store.data_version() == 2
+
+
+def test_ingest_restores_pooled_connection_settings(engine, tmp_path):
+    with engine.connect() as conn:
+        defaults = [conn.exec_driver_sql(f"PRAGMA {p}").scalar() for p in ('synchronous', 'cache_size')]
+    PriceHistoryStore(engine).ingest_csv([_csv(tmp_path, 'a.csv', [['Onion', 'Nashik', '2026-03-01', 1000, 1400, 1200]])])
+    with engine.connect() as conn:
+        assert [conn.exec_driver_sql(f"PRAGMA {p}").scalar() for p in ('synchronous', 'cache_size')] == defaults
@@ -0,0 +1,43 @@
+from price_service import MarketPriceService
+
+
+def _service(tables, **kwargs):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return tables
+
+    return MarketPriceService(loader, **kwargs), calls
+
+
+def test_lookups_are_served_from_memory_until_invalidated():
+    service, calls = _service({'Nashik': {'Onion': 1500}})
+    assert service.get_prices('NASHIK') == {'Onion': 1500}
+    assert service.get_prices('Pune') == {} and service.locations() == ['nashik']
+    assert len(calls) == 1
+    service.invalidate()
+    service.get_prices('nashik')
+    assert len(calls) == 2
+
+
+def test_version_follows_the_tables():
+    first, _ = _service({'Nashik': {'Onion': 1500}})
+    same, _ = _service({'nashik': {'Onion': 1500}})
+    moved, _ = _service({'Nashik': {'Onion': 1600}})
+    assert first.version() == same.version() != moved.version()
+
+
+def test_failed_reload_keeps_the_last_tables():
+    tables = {'Nashik': {'Onion': 1500}}
+    service, _ = _service(tables, refresh_seconds=0)
+    service.get_prices('nashik')
+    service._loader = lambda: 1 / 0
+    assert service.get_prices('nashik') == {'Onion': 1500}
+
+
+def test_summary_merges_insights_and_survives_their_errors():
+    service, _ = _service({'Nashik': {'Onion': 1500}}, insights=lambda location: {'market_trend': 'Rising'})
+    assert service.market_summary('Nashik')['market_trend'] == 'Rising'
+    service._insights = lambda location: 1 / 0
+    assert service.market_summary('Nashik')['current_prices'] == {'Onion': 1500}
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+import app as kisan
+import profiler
+
+TOKEN = 's3cret-token'
+
+
+def _busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_records_the_target_threads_stack():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy, args=(stop,))
+    worker.start()
+    try:
+        sampler = profiler.StackSampler(worker.ident, interval=0.001).start()
+        time.sleep(0.1)
+        stacks = sampler.stop()
+    finally:
+        stop.set()
+        worker.join()
+    assert sampler.samples == sum(stacks.values()) > 0
+    assert all('_busy (test_profiler.py' in stack for stack in stacks)
+
+
+def test_folded_and_hottest():
+    stacks = {'main;handler;query': 3, 'main;handler;render': 1, 'main;query': 2}
+    assert profiler.folded(stacks).splitlines()[0] == 'main;handler;query 3'
+    assert profiler.hottest(stacks, 1) == [('query', 5)]
+
+
+def test_admin_is_hidden_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(kisan, 'PROFILE_TOKEN', None)
+    assert client.get('/admin/profiles', headers={'X-Profile-Token': TOKEN}).status_code == 404
+
+
+@pytest.mark.parametrize('headers, status', [
+    ({}, 403), ({'X-Profile-Token': 'guess'}, 403), ({'Authorization': f'Bearer {TOKEN}x'}, 403),
+    ({'X-Profile-Token': TOKEN}, 200), ({'Authorization': f'Bearer {TOKEN}'}, 200),
+])
+def test_admin_needs_the_token(client, monkeypatch, headers, status):
+    monkeypatch.setattr(kisan, 'PROFILE_TOKEN', TOKEN)
+    assert client.get('/admin/profiles', headers=headers).status_code == status
+    assert client.get('/admin/profiles/missing', headers=headers).status_code == (404 if status == 200 else status)
+
+
+def test_token_in_the_query_string_does_not_open_the_admin(client, monkeypatch):
+    monkeypatch.setattr(kisan, 'PROFILE_TOKEN', TOKEN)
+    assert client.get('/admin/profiles', query_string={'profile': TOKEN}).status_code == 403
+
+
+def test_token_holder_requests_are_profiled(client, monkeypatch):
+    monkeypatch.setattr(kisan, 'PROFILE_TOKEN', TOKEN)
+    with kisan.app.test_request_context('/farm/land', headers={'X-Profile-Token': TOKEN}):
+        kisan._start_profile()
+        assert isinstance(kisan.g.profile, profiler.StackSampler)
+        kisan.g.pop('profile').stop()
+    with kisan.app.test_request_context('/farm/land', headers={'X-Profile-Token': 'guess'}):
+        kisan._start_profile()
+        assert 'profile' not in kisan.g
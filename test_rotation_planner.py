@@ -0,0 +1,54 @@
+import itertools
+from datetime import date
+
+import numpy as np
+import pytest
+
+import rotation_planner
+from yield_model import YieldModel
+
+FIELDS = [
+    {'id': i, 'name': f'Field {i}', 'area': area, 'soil_type': 'Black Cotton Soil', 'irrigation_type': 'Drip',
+     'previous_crop': crop}
+    for i, (area, crop) in enumerate([(2, 'soybean'), (3, 'wheat'), (1.5, None)], start=1)
+]
+SEASONS = [('rabi', 2026), ('zaid', 2027), ('kharif', 2027)]
+
+
+def test_dp_matches_brute_force():
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=(4, 3, 5, 5))
+    initial = rng.integers(0, 5, size=4)
+    plan = rotation_planner._solve_dp(values, initial)
+    for f in range(4):
+        def total(seq):
+            prev = [initial[f], *seq[:-1]]
+            return sum(values[f, s, prev[s], seq[s]] for s in range(3))
+        best = max(itertools.product(range(5), repeat=3), key=total)
+        assert total(plan[f]) == pytest.approx(total(best))
+
+
+@pytest.mark.parametrize('today, first', [
+    (date(2026, 7, 1), ('rabi', 2026)), (date(2026, 11, 1), ('zaid', 2027)),
+    (date(2027, 2, 1), ('zaid', 2027)), (date(2027, 4, 15), ('kharif', 2027)),
+])
+def test_upcoming_seasons_start_after_the_current_one(today, first):
+    seasons = rotation_planner.upcoming_seasons(today, 4)
+    assert seasons[0] == first and len(seasons) == 4
+
+
+def test_limits_hold_and_cost_margin():
+    planner = rotation_planner.RotationPlanner(YieldModel())
+    prices = rotation_planner.REFERENCE_PRICES
+    free = planner.plan(FIELDS, SEASONS, prices)
+    limited = planner.plan(FIELDS, SEASONS, prices, {'budget': 60000, 'labor_days': 120})
+    assert limited['feasible'] and (limited['totals'][:, 1:] <= [60000, 120]).all()
+    assert limited['objective'] <= free['objective']
+    assert planner.plan(FIELDS, SEASONS, prices, {'budget': 60000, 'labor_days': 120})['cached']
+
+
+def test_route_clamps_seasons(client):
+    client.post('/farm/land/add', data={'name': 'North', 'area': '2', 'soil_type': 'Loamy',
+                                        'irrigation_type': 'Drip', 'crop': 'Wheat', 'status': 'Growing'})
+    body = client.post('/api/rotation-plan', json={'seasons': 50}).get_json()
+    assert len(body['plan'][0]['seasons']) == len(body['season_totals']) == 9
@@ -0,0 +1,52 @@
+from datetime import date
+
+from sqlalchemy import create_engine, func, select
+
+import app as kisan
+import seed_data
+
+SMALL = {'farm': 3, 'land': 20, 'worker': 6, 'task': 50, 'inventory_item': 5, 'transaction': 100, 'produce': 40}
+
+
+def _generate(tmp_path, name, seed):
+    engine = create_engine(f"sqlite:///{tmp_path / name}")
+    kisan.db.metadata.create_all(engine)
+    tables = {table: kisan.db.metadata.tables[table] for table in seed_data.DEFAULT_SCALE}
+    with engine.begin() as conn:
+        counts = seed_data.generate(conn, tables, SMALL, seed=seed, today=date(2026, 10, 1), progress=lambda _: None)
+    return engine, counts
+
+
+def _rows(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(kisan.db.metadata.tables[table].select().order_by('id')).all()
+
+
+def test_same_seed_same_rows(tmp_path):
+    first, counts = _generate(tmp_path, 'a.db', 7)
+    again, _ = _generate(tmp_path, 'b.db', 7)
+    other, _ = _generate(tmp_path, 'c.db', 8)
+    assert counts == SMALL
+    for table in ('task', 'produce'):
+        assert len(_rows(first, table)) == SMALL[table]
+        assert _rows(first, table) == _rows(again, table) != _rows(other, table)
+
+
+def test_rows_stay_within_their_farm(tmp_path):
+    engine, _ = _generate(tmp_path, 'a.db', 7)
+    task, land, worker = (kisan.db.metadata.tables[t] for t in ('task', 'land', 'worker'))
+    with engine.connect() as conn:
+        mismatched = conn.execute(
+            select(func.count()).select_from(task.join(land, land.c.id == task.c.field_id)
+                                             .join(worker, worker.c.id == task.c.worker_id))
+            .where((task.c.farm_id != land.c.farm_id) | (task.c.farm_id != worker.c.farm_id))
+        ).scalar()
+        completed_without_date = conn.execute(
+            select(func.count()).where(task.c.status == 'Completed', task.c.completed_date.is_(None))).scalar()
+    assert mismatched == completed_without_date == 0
+
+
+def test_seeding_the_app_invalidates_cached_pages(client):
+    etag = client.get('/farm/land').headers['ETag']
+    kisan.seed_demo_data(dict(SMALL, transaction=10, produce=5))
+    assert client.get('/farm/land', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+from sensor_store import DAY, HOUR, SensorStore
+
+NOW = 1_780_000_000 // DAY * DAY + 12 * HOUR  # midday, UTC
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SensorStore(create_engine(f"sqlite:///{tmp_path / 'sensors.db'}"))
+    store.ensure_schema()
+    return store
+
+
+def _ingest(store, readings):
+    """readings: (field_id, sensor, ts, value) for soil_moisture."""
+    f, s, t, v = zip(*readings)
+    return store.ingest(f, ['soil_moisture'] * len(f), s, t, v, now=NOW)
+
+
+def test_rollups_merge_sensors_per_bucket(store):
+    _ingest(store, [(1, 'a', NOW, 20), (1, 'b', NOW + 30, 30), (1, 'a', NOW + HOUR, 40)])
+    hours = store.rollups(1, 'soil_moisture', NOW, NOW + 2 * HOUR, 'hour')
+    assert [(r['count'], r['mean'], r['min'], r['max']) for r in hours] == [(2, 25, 20, 30), (1, 40, 40, 40)]
+    [day] = store.rollups(1, 'soil_moisture', NOW, NOW + DAY, 'day')
+    assert (day['count'], day['mean']) == (3, 30)
+
+
+def test_resent_readings_do_not_double_count(store):
+    _ingest(store, [(1, 'a', NOW, 20)])
+    _ingest(store, [(1, 'a', NOW, 24), (1, 'a', NOW + 60, 30)])
+    [hour] = store.rollups(1, 'soil_moisture', NOW, NOW + HOUR, 'hour')
+    assert (hour['count'], hour['mean']) == (2, 27)
+    [series] = store.series(1)
+    assert (series['first_ts'], series['last_ts'], series['last_value']) == (NOW, NOW + 60, 30)
+
+
+def test_stale_and_non_finite_readings_are_dropped(store):
+    assert _ingest(store, [(1, 'a', NOW - 31 * DAY, 20), (1, 'a', NOW, float('nan'))]) == 0
+
+
+def test_summary_is_fields_by_buckets(store):
+    _ingest(store, [(1, 'a', NOW, 20), (2, 'a', NOW - DAY, 10)])
+    summary = store.summary([1, 2, 3], 'soil_moisture', NOW - DAY, NOW + 1, 'day')
+    assert np.array_equal(summary['mean'], [[np.nan, 20], [10, np.nan], [np.nan, np.nan]], equal_nan=True)
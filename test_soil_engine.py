@@ -0,0 +1,43 @@
+import pytest
+
+import soil_engine
+
+SAMPLE = {'ph_level': 7.0, 'organic_matter': 1.4, 'nitrogen': 600, 'phosphorus': 30, 'potassium': 300,
+          'soil_type': 'Black Cotton Soil'}
+
+
+def test_scores_rate_each_parameter_in_bands():
+    scored = soil_engine.score_samples([7.0, 4.0], [1.4, 0.5], [600, 100], [30, 5], [300, 50])
+    assert scored['score'].tolist() == [10.0, 2.5]
+    assert scored['ratings']['nitrogen'].tolist() == [2, 0]
+    assert soil_engine.PH_CLASSES[scored['ph_class'][1]][0] == 'Extremely Acidic'
+
+
+def test_report_lists_amendments_for_low_nutrients():
+    [good, poor] = soil_engine.soil_health_reports([SAMPLE, dict(SAMPLE, nitrogen=100, organic_matter=0.5)])
+    assert (good['soil_health_score'], good['health_status']) == ('10.0/10', 'Excellent')
+    assert good['suitable_crops'][0] == 'Cotton'
+    assert poor['nutrient_analysis']['nitrogen_status'] == 'Deficient'
+    assert poor['soil_amendments'] == [soil_engine.AMENDMENTS['organic_matter'], soil_engine.AMENDMENTS['nitrogen']]
+
+
+def test_fertilizer_dose_is_the_stage_split_per_acre():
+    plan = soil_engine.fertilizer_plan('Wheat', 'Seedling')
+    n, p, k = (float(plan['quantity_per_acre'][x].split()[0]) for x in ('nitrogen', 'phosphorus', 'potassium'))
+    assert (n, p, k) == pytest.approx((round(120 * 0.4047 * 0.5, 1), round(60 * 0.4047, 1), round(40 * 0.4047 * 0.5, 1)))
+    assert soil_engine.fertilizer_plan('wheat', 'maturity')['quantity_per_acre']['nitrogen'] == '0 kg'
+
+
+def test_soil_test_scales_the_dose():
+    low = soil_engine.fertilizer_plan('wheat', nitrogen=100)['season_total_per_acre']['nitrogen']
+    high = soil_engine.fertilizer_plan('wheat', nitrogen=600)['season_total_per_acre']['nitrogen']
+    assert float(low.split()[0]) == pytest.approx(120 * 0.4047 * 1.25, abs=0.05)
+    assert float(high.split()[0]) == pytest.approx(120 * 0.4047 * 0.75, abs=0.05)
+
+
+def test_routes_reject_non_numeric_samples(client):
+    assert client.post('/api/soil-health-analysis', json=SAMPLE).get_json()['health_status'] == 'Excellent'
+    assert client.post('/api/soil-health-analysis', json=dict(SAMPLE, ph_level='acidic')).status_code == 400
+    assert client.post('/api/fertilizer-recommendation', json={'crop_type': 'Wheat', 'nitrogen': 'lots'}).status_code == 400
+    body = client.post('/api/soil-health-analysis/batch', json={'samples': [dict(SAMPLE, sample_id='A1')]}).get_json()
+    assert body['results'][0]['sample_id'] == 'A1' and body['summary'] == {'Excellent': 1}
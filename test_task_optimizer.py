@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from task_optimizer import MAX_TASKS_PER_WORKER, optimize_assignments, solve_assignment
+
+
+def _task(id, name, priority='Medium'):
+    return SimpleNamespace(id=id, name=name, description=None, priority=priority)
+
+
+def _worker(id, skills, wage=400):
+    return SimpleNamespace(id=id, skills=skills, daily_wage=wage)
+
+
+@pytest.mark.parametrize('shape', [(6, 6), (4, 9), (9, 4), (1, 5)])
+def test_solver_matches_scipy_optimum(shape):
+    linear_sum_assignment = pytest.importorskip('scipy.optimize').linear_sum_assignment
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        cost = rng.integers(0, 50, size=shape).astype(float)
+        rows, cols = solve_assignment(cost)
+        assert len(set(rows)) == len(set(cols)) == min(shape)
+        expected_rows, expected_cols = linear_sum_assignment(cost)
+        assert cost[rows, cols].sum() == cost[expected_rows, expected_cols].sum()
+
+
+def test_tasks_go_to_skilled_workers():
+    tasks = [_task(1, 'Spraying east block'), _task(2, 'Tractor ploughing')]
+    workers = [_worker(10, 'Tractor driving, Ploughing'), _worker(11, 'Spraying')]
+    assigned = {a['task_id']: a['worker_id'] for a in optimize_assignments(tasks, workers)}
+    assert assigned == {1: 11, 2: 10}
+
+
+def test_worker_capacity_counts_current_load():
+    tasks = [_task(i, 'Weeding') for i in range(1, 4)]
+    workers = [_worker(10, 'Weeding')]
+    assert len(optimize_assignments(tasks, workers, max_tasks_per_worker=2)) == 2
+    assert len(optimize_assignments(tasks, workers, max_tasks_per_worker=2, current_load={10: 1})) == 1
+    assert optimize_assignments(tasks, workers, max_tasks_per_worker=2, current_load={10: 2}) == []
+
+
+def test_high_priority_wins_a_scarce_worker():
+    tasks = [_task(1, 'Weeding', 'Low'), _task(2, 'Weeding', 'High')]
+    assert [a['task_id'] for a in optimize_assignments(tasks, [_worker(10, 'Weeding')])] == [2]
+
+
+def test_slots_beyond_the_task_count_are_not_built():
+    tasks = [_task(1, 'Weeding'), _task(2, 'Weeding')]
+    assert len(optimize_assignments(tasks, [_worker(10, 'Weeding')], max_tasks_per_worker=10 ** 9)) == 2
+
+
+@pytest.mark.parametrize('value', ['many', None, 0, -1, MAX_TASKS_PER_WORKER + 1])
+def test_route_rejects_a_bad_capacity(client, value):
+    response = client.post('/api/task-optimization', json={'max_tasks_per_worker': value})
+    assert response.status_code == 400
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+from sqlalchemy import inspect, text
+from werkzeug.exceptions import Forbidden
+
+import app as kisan
+
+SECOND_FARM = {'X-Farm-Id': '2'}
+
+
+@pytest.fixture
+def two_farms(client):
+    """Farm 1 owns field 1, farm 2 owns field 2; SECOND_FARM carries farm 2's key."""
+    SECOND_FARM['X-Farm-Key'] = client.post('/farms', json={'name': 'Second'}).get_json()['access_key']
+    field = {'area': '2', 'soil_type': 'Black Cotton Soil', 'irrigation_type': 'Drip', 'crop': 'Cotton', 'status': 'Growing'}
+    client.post('/farm/land/add', data=dict(field, name='Home field'))
+    client.post('/farm/land/add', data=dict(field, name='Other field'), headers=SECOND_FARM)
+    return client
+
+
+def test_unknown_farm_is_404(client):
+    assert client.get('/farm/land', headers={'X-Farm-Id': '99'}).status_code == 404
+
+
+def test_lists_show_only_the_farms_rows(two_farms):
+    assert b'Home field' in two_farms.get('/farm/land').data
+    page = two_farms.get('/farm/land', headers=SECOND_FARM).data
+    assert b'Other field' in page and b'Home field' not in page
+
+
+def test_other_farms_rows_are_404(two_farms):
+    assert two_farms.get('/farm/land/2/edit').status_code == 404
+    assert two_farms.post('/farm/land/2/delete').status_code == 404
+    assert two_farms.get('/api/sensors/2').status_code == 404
+
+
+def test_sensor_readings_for_other_farms_fields_are_rejected(two_farms):
+    response = two_farms.post('/api/sensors/readings', json={'readings': [
+        {'field_id': 1, 'metric': 'soil_moisture', 'ts': int(time.time()), 'value': 30},
+        {'field_id': 2, 'metric': 'soil_moisture', 'ts': int(time.time()), 'value': 30},
+    ]})
+    assert response.get_json()['unknown_fields'] == [2]
+
+
+def test_irrigation_calculator_only_reads_own_fields(two_farms):
+    body = {'crop_type': 'Cotton', 'soil_type': 'Black Cotton Soil', 'explain': False}
+    assert two_farms.post('/api/irrigation-calculator', json=dict(body, field_id=1)).status_code == 200
+    assert two_farms.post('/api/irrigation-calculator', json=dict(body, field_id=2)).status_code == 404
+    assert two_farms.post('/api/irrigation-calculator', json=dict(body, field_id='x')).status_code == 400
+
+
+def test_task_cannot_use_another_farms_field(two_farms):
+    two_farms.post('/farm/tasks/add', data={'name': 'Spray', 'priority': 'High', 'status': 'Pending', 'field_id': '2'})
+    assert two_farms.get('/api/sync/changes').get_json()['tables'].get('task') is None
+
+
+def test_a_farm_opens_only_with_its_key(two_farms):
+    assert two_farms.get('/farm/land', headers={'X-Farm-Id': '2'}).status_code == 403
+    assert two_farms.get('/farm/land', headers={'X-Farm-Id': '2', 'X-Farm-Key': 'guess'}).status_code == 403
+    assert two_farms.get('/farm/land', headers={'X-Farm-Id': '1'}).status_code == 200  # the default farm has no key
+    assert two_farms.post('/farms/2/select', data={'access_key': 'guess'}).status_code == 403
+    assert b'Home field' in two_farms.get('/farm/land').data
+    two_farms.post('/farms/2/select', data={'access_key': SECOND_FARM['X-Farm-Key']})
+    assert b'Other field' in two_farms.get('/farm/land').data
+
+
+def test_a_caught_refusal_does_not_open_the_farm(two_farms):
+    with kisan.app.test_request_context(headers={'X-Farm-Id': '2'}):
+        with pytest.raises(Forbidden):
+            kisan._current_farm_id()
+        with pytest.raises(Forbidden):
+            kisan.Land.query.all()
+
+
+def test_a_database_from_before_farms_is_upgraded(client):
+    old_schema = [
+        'CREATE TABLE farm (id INTEGER PRIMARY KEY, name VARCHAR(150) NOT NULL, created_at DATETIME)',
+        'CREATE TABLE land (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, area FLOAT NOT NULL, '
+        'soil_type VARCHAR(100), irrigation_type VARCHAR(100), status VARCHAR(50))',
+        'CREATE TABLE task (id INTEGER PRIMARY KEY, name VARCHAR(150) NOT NULL, description TEXT, '
+        'priority VARCHAR(50) NOT NULL, status VARCHAR(50), field_id INTEGER NOT NULL, worker_id INTEGER)',
+        "INSERT INTO farm (id, name) VALUES (1, 'My Farm')",
+        "INSERT INTO land VALUES (1, 'Old field', 3, 'Black Soil', 'Drip', 'Growing')",
+        "INSERT INTO task VALUES (1, 'Weeding', NULL, 'Low', 'Completed', 1, 1)",
+        "INSERT INTO worker (farm_id, full_name, daily_wage) VALUES (1, 'Ramesh Patil', 400)",
+    ]
+    with kisan.app.app_context(), kisan.db.engine.begin() as conn:
+        for table in ('farm', 'land', 'task'):
+            conn.execute(text(f'DROP TABLE {table}'))
+        for statement in old_schema:
+            conn.execute(text(statement))
+    kisan.prepare_app()
+    with kisan.app.app_context():
+        assert 'ix_task_farm_completed' in {i['name'] for i in inspect(kisan.db.engine).get_indexes('task')}
+        assert kisan.db.session.get(kisan.Land, 1).farm_id == 1
+    assert b'Old field' in client.get('/farm/land').data
+    body = client.post('/api/payroll', json={'start_date': '2026-03-01', 'end_date': '2026-03-31'}).get_json()
+    assert body['undated_tasks'] == [{'task_id': 1, 'task': 'Weeding', 'worker_id': 1, 'worker': 'Ramesh Patil'}]
@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+
+import yield_model
+from yield_model import DEFAULT_YIELD, OFF_SEASON_FACTOR, YieldModel, season_for
+
+
+def _predict(model, crop, soil='Black Soil', irrigation='Rain-fed', season='rabi', area=1):
+    result = model.predict([crop], [area], [soil], [irrigation], [season])
+    return float(result['per_acre'][0]), float(result['total'][0]), int(result['known_inputs'][0])
+
+
+def test_factors_multiply_the_reference_yield():
+    model = YieldModel()
+    assert _predict(model, 'Wheat') == (12, 12, 3)
+    per_acre, total, _ = _predict(model, 'wheat', soil='Alluvial', irrigation='Drip irrigation', area=2.5)
+    assert per_acre == pytest.approx(12 * 1.05 * 1.45) and total == pytest.approx(per_acre * 2.5)
+    assert _predict(model, 'wheat', season='kharif')[0] == pytest.approx(12 * OFF_SEASON_FACTOR)
+    assert _predict(model, 'cotton', soil='Black Cotton Soil', season='kharif')[0] == pytest.approx(8 * 1.15)
+
+
+def test_unknown_inputs_are_neutral_and_lower_confidence():
+    model = YieldModel()
+    assert _predict(model, 'quinoa', soil='Mystery', irrigation=None) == (DEFAULT_YIELD, DEFAULT_YIELD, 0)
+
+
+def test_whole_farm_in_one_call():
+    model = YieldModel()
+    result = model.predict(['rice', 'rice'], [1, 2], ['clay', 'sandy'], ['canal', 'canal'], ['kharif', 'kharif'])
+    assert result['per_acre'][0] > result['per_acre'][1]
+    assert result['total'][1] == pytest.approx(2 * result['per_acre'][1])
+
+
+@pytest.mark.parametrize('day, season', [(date(2026, 7, 1), 'kharif'), (date(2026, 1, 10), 'rabi'),
+                                         (date(2026, 5, 1), 'zaid'), (date(2026, 11, 1), 'rabi')])
+def test_season_for(day, season):
+    assert season_for(day) == season
+
+
+def test_a_missing_season_follows_the_calendar(monkeypatch):
+    model = YieldModel()
+    monkeypatch.setattr(yield_model, 'season_for', lambda day=None: 'kharif')
+    assert _predict(model, 'wheat', season=None)[0] == pytest.approx(12 * OFF_SEASON_FACTOR)
+    monkeypatch.setattr(yield_model, 'season_for', lambda day=None: 'rabi')
+    assert _predict(model, 'wheat', season='monsoon?')[0] == 12
+
+
+def test_only_recognised_inputs_are_remembered(monkeypatch):
+    monkeypatch.setattr(yield_model, 'CODE_CACHE_SIZE', 3)
+    model = YieldModel()
+    model.predict(['Wheat', ' wheat', 'quinoa'], [1] * 3, ['Black', 'mystery', 'Clay'], ['drip'] * 3, ['rabi'] * 3)
+    assert set(model._codes) == {('crop', 'wheat'), ('soil', 'black'), ('soil', 'clay')}
+    assert _predict(model, 'wheat', soil='Clay')[0] == pytest.approx(12 * 0.9)
+
+
+def test_batch_route_predicts_every_cropped_field(client):
+    for name, crop in (('North', 'Wheat'), ('South', '')):
+        client.post('/farm/land/add', data={'name': name, 'area': '2', 'soil_type': 'Black Soil',
+                                            'irrigation_type': 'Rain-fed', 'crop': crop, 'status': 'Growing'})
+    body = client.post('/api/crop-yield-prediction/batch', json={'season': 'rabi'}).get_json()
+    assert [(p['name'], p['total_expected_yield']) for p in body['predictions']] == [('North', 24)]
+    assert body['skipped_without_crop'] == [2]
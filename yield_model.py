@@ -0,0 +1,150 @@
+import re
+from datetime import date
+
+import numpy as np
+
+SEASONS = ('kharif', 'rabi', 'zaid')
+SOILS = ('black', 'red', 'alluvial', 'laterite', 'sandy', 'loamy', 'clay')
+IRRIGATION = ('rainfed', 'canal', 'borewell', 'sprinkler', 'drip')
+
+# Reference yield in quintals/acre for a rain-fed field on black soil in the
+# crop's main season, with the seasons it is normally grown in.
+CROPS = {
+    'soybean': (11, ('kharif',)),
+    'cotton': (8, ('kharif',)),
+    'moong': (5, ('kharif', 'zaid')),
+    'tur': (5, ('kharif',)),
+    'urad': (4.5, ('kharif',)),
+    'gram': (6, ('rabi',)),
+    'wheat': (12, ('rabi',)),
+    'jowar': (8, ('kharif', 'rabi')),
+    'bajra': (7, ('kharif',)),
+    'maize': (16, ('kharif', 'rabi')),
+    'rice': (14, ('kharif',)),
+    'groundnut': (8, ('kharif', 'zaid')),
+    'sugarcane': (280, ('kharif', 'rabi', 'zaid')),
+    'onion': (80, ('kharif', 'rabi')),
+    'tomato': (90, ('kharif', 'rabi', 'zaid')),
+}
+DEFAULT_YIELD = 10
+
+# Relative productivity of each soil against black soil.
+SOIL_FACTORS = {'black': 1.0, 'red': 0.85, 'alluvial': 1.05, 'laterite': 0.75, 'sandy': 0.7, 'loamy': 1.0, 'clay': 0.9}
+# Crops that do notably better or worse on a soil than the general factor says.
+SOIL_OVERRIDES = {
+    ('cotton', 'black'): 1.15, ('cotton', 'sandy'): 0.6,
+    ('groundnut', 'sandy'): 0.95, ('groundnut', 'red'): 1.0, ('groundnut', 'clay'): 0.7,
+    ('rice', 'clay'): 1.1, ('rice', 'sandy'): 0.55,
+    ('bajra', 'sandy'): 0.95, ('onion', 'alluvial'): 1.15,
+}
+
+# Yield gain over rain-fed for a crop with full water sensitivity.
+IRRIGATION_GAIN = {'rainfed': 0.0, 'canal': 0.25, 'borewell': 0.3, 'sprinkler': 0.35, 'drip': 0.45}
+# How much each crop responds to irrigation (1 = fully).
+WATER_SENSITIVITY = {
+    'sugarcane': 1.6, 'rice': 1.2, 'onion': 1.2, 'tomato': 1.3, 'wheat': 1.0, 'maize': 0.9, 'cotton': 0.8,
+    'soybean': 0.5, 'groundnut': 0.7, 'gram': 0.4, 'moong': 0.4, 'tur': 0.4, 'urad': 0.4, 'jowar': 0.4, 'bajra': 0.3,
+}
+# Crops that cannot really be grown without water take a heavy rain-fed penalty.
+RAINFED_PENALTY = {'sugarcane': 0.45, 'rice': 0.8, 'tomato': 0.75, 'onion': 0.8}
+OFF_SEASON_FACTOR = 0.7
+# Most distinct input spellings one model remembers the codes of.
+CODE_CACHE_SIZE = 4096
+
+SOIL_PATTERNS = (('black', 'black|regur'), ('red', 'red'), ('alluvial', 'alluvial'), ('laterite', 'laterit'),
+                 ('sandy', 'sand'), ('loamy', 'loam'), ('clay', 'clay'))
+IRRIGATION_PATTERNS = (('drip', 'drip'), ('sprinkler', 'sprinkl'), ('borewell', 'bore|well|tube'),
+                       ('canal', 'canal|river|tank|lift'), ('rainfed', 'rain|dry|none'))
+
+
+def season_for(day=None):
+    """Cropping season for a calendar date: kharif Jun-Oct, rabi Nov-Mar, zaid Apr-May."""
+    month = (day or date.today()).month
+    if 6 <= month <= 10:
+        return 'kharif'
+    return 'zaid' if month in (4, 5) else 'rabi'
+
+
+def match_category(value, patterns):
+    value = (value or '').lower()
+    for name, pattern in patterns:
+        if re.search(pattern, value):
+            return name
+    return None
+
+
+class YieldModel:
+    """
+    Multiplicative yield model: reference yield for the crop, scaled by soil,
+    irrigation and season factors. The factors are held as (crop x level)
+    tables so a whole farm is predicted with a few array lookups.
+    """
+
+    def __init__(self, crops=CROPS):
+        self.crops = list(crops)
+        self._crop_index = {name: i for i, name in enumerate(self.crops)}
+        n = len(self.crops) + 1  # last row: crops the model does not know
+        self.base = np.array([crops[c][0] for c in self.crops] + [DEFAULT_YIELD], dtype=float)
+
+        # Extra last column in each table holds the "unknown" level, neutral at 1.0.
+        self.soil = np.ones((n, len(SOILS) + 1))
+        for j, soil in enumerate(SOILS):
+            self.soil[:, j] = SOIL_FACTORS[soil]
+        for (crop, soil), factor in SOIL_OVERRIDES.items():
+            if crop in self._crop_index:
+                self.soil[self._crop_index[crop], SOILS.index(soil)] = factor
+
+        sensitivity = np.array([WATER_SENSITIVITY.get(c, 0.6) for c in self.crops] + [0.6])
+        gains = np.array([IRRIGATION_GAIN[i] for i in IRRIGATION] + [0.0])
+        self.irrigation = 1 + sensitivity[:, None] * gains[None, :]
+        for crop, penalty in RAINFED_PENALTY.items():
+            if crop in self._crop_index:
+                self.irrigation[self._crop_index[crop], IRRIGATION.index('rainfed')] = penalty
+
+        self.season = np.ones((n, len(SEASONS)))
+        for i, crop in enumerate(self.crops):
+            for j, season in enumerate(SEASONS):
+                if season not in crops[crop][1]:
+                    self.season[i, j] = OFF_SEASON_FACTOR
+
+        self._codes = {}
+
+    def _encode(self, kind, value):
+        value = (value or '').strip().lower()
+        if kind == 'season' and value not in SEASONS:
+            value = season_for()  # resolved on every call, so a missing season follows the calendar
+        key = (kind, value)
+        code = self._codes.get(key)
+        if code is None:
+            if kind == 'crop':
+                code, unknown = self._crop_index.get(value, len(self.crops)), len(self.crops)
+            elif kind == 'soil':
+                name = match_category(value, SOIL_PATTERNS)
+                code, unknown = (SOILS.index(name) if name else len(SOILS)), len(SOILS)
+            elif kind == 'irrigation':
+                name = match_category(value, IRRIGATION_PATTERNS)
+                code, unknown = (IRRIGATION.index(name) if name else len(IRRIGATION)), len(IRRIGATION)
+            else:
+                code, unknown = SEASONS.index(value), None
+            # Only recognised inputs are kept, and only up to a bound, so free text cannot grow the table.
+            if code != unknown and len(self._codes) < CODE_CACHE_SIZE:
+                self._codes[key] = code
+        return code
+
+    def predict(self, crops, areas, soils, irrigations, seasons):
+        """
+        Predicts all fields at once from parallel sequences. Returns arrays of
+        per-acre and total yield (quintals) and a 0-3 count of the inputs the
+        model recognised (crop, soil, irrigation), used as a confidence signal.
+        """
+        c = np.fromiter((self._encode('crop', v) for v in crops), dtype=np.intp, count=len(crops))
+        s = np.fromiter((self._encode('soil', v) for v in soils), dtype=np.intp, count=len(crops))
+        i = np.fromiter((self._encode('irrigation', v) for v in irrigations), dtype=np.intp, count=len(crops))
+        n = np.fromiter((self._encode('season', v) for v in seasons), dtype=np.intp, count=len(crops))
+        per_acre = self.base[c] * self.soil[c, s] * self.irrigation[c, i] * self.season[c, n]
+        known = (c < len(self.crops)).astype(int) + (s < len(SOILS)) + (i < len(IRRIGATION))
+        return {
+            'per_acre': per_acre,
+            'total': per_acre * np.asarray(areas, dtype=float),
+            'known_inputs': known,
+        }